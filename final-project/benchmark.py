@@ -0,0 +1,45 @@
+import os
+import sys
+import json
+from argparse import ArgumentParser
+
+# draw into memory without opening a window, must be set before pygame is imported
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+from src.benchmark import run_benchmarks, compare
+
+def main():
+    parser = ArgumentParser(description = 'Benchmark the frame rendering and rule paths headless')
+    parser.add_argument('--frames', type = int, default = 300, help = 'frames to play for each component and board state')
+    parser.add_argument('--save', help = 'write the results to this JSON file, for use as a baseline')
+    parser.add_argument('--baseline', help = 'compare against the results in this JSON file')
+    parser.add_argument('--threshold', type = float, default = 0.2, help = 'allowed slowdown against the baseline, 0.2 for 20 percent')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.frames)
+
+    # Report
+    print(f"{'frame':<36}{'ns/frame':>12}{'blits':>8}{'alloc B':>10}")
+    for component, states in results['frames'].items():
+        for state, values in states.items():
+            print(f"{component + ' / ' + state:<36}{values['ns per frame']:>12.0f}"
+                f"{values['blit calls per frame']:>8.1f}{values['peak bytes allocated per frame']:>10.0f}")
+    print(f"\n{'rules':<36}{'ns/call':>12}")
+    for name, value in results['rules'].items():
+        print(f"{name:<36}{value:>12.0f}")
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent = 2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for name, old, new in regressions:
+            print(f'SLOWER {name}: {old:.0f} -> {new:.0f}')
+        if regressions:
+            sys.exit(1)
+        print(f'No regressions over {args.threshold:.0%} against {args.baseline}')
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,63 @@
 import pygame
+from argparse import ArgumentParser, ArgumentTypeError
+from src.settings import *
 from src.controller import Controller
+from src.replay import Replay
+from src.profiler import Profiler
+from src.network import NetworkClient
+
+def board_count(text):
+    """
+    Reads the number of boards from the command line, at least one.
+
+    Args:
+        text (str): The argument.
+
+    Returns:
+        int: The number of boards.
+    """
+    boards = int(text)
+    if boards < 1:
+        raise ArgumentTypeError('there must be at least one board')
+    return boards
 
 def main():
+    parser = ArgumentParser(description = 'Tetris')
+    parser.add_argument('--replay', help = 'play back a recorded game from a .replay file')
+    parser.add_argument('--speed', type = float, default = 1, help = 'how many times faster than real time to run')
+    parser.add_argument('--bot', action = 'store_true', help = 'let the built-in bot play')
+    parser.add_argument('--profile', metavar = 'FILE', help = 'time each stage of every frame, show the times with F3 and write them to a .json or .csv file on exit')
+    parser.add_argument('--columns', type = int, default = COLUMNS, help = 'width of the field')
+    parser.add_argument('--rows', type = int, default = ROWS, help = 'height of the field, taller fields scroll')
+    parser.add_argument('--boards', type = board_count, default = 1, help = 'games played at once, 2 for a versus match with garbage, more for a wall of bots')
+    parser.add_argument('--players', type = int, default = 1, choices = (0, 1, 2), help = 'boards played from the keyboard, the second player uses WASD and left shift')
+    parser.add_argument('--connect', metavar = 'HOST[:PORT]', help = 'play a match on a server started with server.py')
+    parser.add_argument('--stream', metavar = 'FILE', help = 'write the changes of every board to a stream file for spectators, read it with spectate.py')
+    args = parser.parse_args()
+    if args.columns < MIN_COLUMNS or args.rows < MIN_ROWS:
+        parser.error(f'the field must be at least {MIN_COLUMNS} columns by {MIN_ROWS} rows')
+    if args.replay and args.boards > 1:
+        parser.error('a replay is played back on one board')
+    if args.connect and (args.replay or args.bot):
+        parser.error('a networked match is played from the keyboard')
+    if args.connect and args.stream:
+        parser.error('only local games are streamed')
+
     pygame.init()
 
     # Create the controller
-    controller = Controller()
+    replay = Replay.load(args.replay) if args.replay else None
+    profiler = Profiler() if args.profile else None
+    network = None
+    if args.connect:
+        host, separator, port = args.connect.partition(':')
+        network = NetworkClient(host, int(port) if port else SERVER_PORT)
+        print('Waiting for the match to start')
+    controller = Controller(replay, args.speed, args.bot, profiler, args.profile, args.columns, args.rows, args.boards, args.players, network,
+        args.stream)
 
     # Main game loop
-    running = True
-    while running:
-        controller.run()
-        # Update game state
-        game.run()
-
-        # Update preview and score
-        preview.run()
-        score.run()
-
-        # Update display
-        pygame.display.update()
-
-        # Cap the frame rate
-        pygame.time.Clock().tick(60)
+    controller.run()
 
 if __name__ == "__main__":
     main()
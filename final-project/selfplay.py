@@ -0,0 +1,66 @@
+import json
+from argparse import ArgumentParser
+from src.settings import *
+from src.harness import run_games, summarize
+from src.bot import DEFAULT_WEIGHTS
+
+def main():
+    parser = ArgumentParser(description = 'Play seeded Tetris games headless in parallel and report the results')
+    parser.add_argument('--games', type = int, default = 100, help = 'number of bot games to play')
+    parser.add_argument('--seed', type = int, default = 0, help = 'seed of the first game, the others count up from it')
+    parser.add_argument('--replay', nargs = '+', default = [], help = 'play these .replay files instead of bot games')
+    parser.add_argument('--workers', type = int, help = 'worker processes, defaults to one per CPU core')
+    parser.add_argument('--max-ticks', type = int, default = TICK_RATE * 60 * 30, help = 'stop a game after this many simulation steps')
+    parser.add_argument('--update-speed', type = float, default = UPDATE_SPEED, help = 'milliseconds between falls on the first level')
+    parser.add_argument('--score-data', type = int, nargs = 4, default = list(SCORE_DATA.values()), help = 'points for 1, 2, 3 and 4 lines')
+    parser.add_argument('--level-lines', type = int, default = LEVEL_LINES, help = 'lines to clear for each level')
+    parser.add_argument('--level-speedup', type = float, default = LEVEL_SPEEDUP, help = 'fall time factor for each level')
+    parser.add_argument('--lookahead', type = int, default = 3, help = 'preview pieces the bot looks ahead over')
+    parser.add_argument('--beam-width', type = int, default = 4, help = 'fields the bot keeps at each lookahead depth')
+    parser.add_argument('--weights', type = float, nargs = 4, default = list(DEFAULT_WEIGHTS.values()),
+        help = "weights of the bot's heuristic for lines, holes, height and bumpiness")
+    parser.add_argument('--columns', type = int, default = COLUMNS, help = 'width of the field')
+    parser.add_argument('--rows', type = int, default = ROWS, help = 'height of the field')
+    parser.add_argument('--json', help = 'also write the results to this file')
+    args = parser.parse_args()
+    if args.columns < MIN_COLUMNS or args.rows < MIN_ROWS:
+        parser.error(f'the field must be at least {MIN_COLUMNS} columns by {MIN_ROWS} rows')
+
+    rules = {
+        'update_speed': args.update_speed,
+        'score_data': dict(zip(range(1, 5), args.score_data)),
+        'level_lines': args.level_lines,
+        'level_speedup': args.level_speedup,
+        'columns': args.columns,
+        'rows': args.rows
+    }
+    bot = {
+        'lookahead': args.lookahead,
+        'beam_width': args.beam_width,
+        'weights': dict(zip(DEFAULT_WEIGHTS, args.weights))
+    }
+    if args.replay:
+        jobs = [{'seed': None, 'replay': path, 'max_ticks': args.max_ticks, 'rules': rules, 'bot': bot} for path in args.replay]
+    else:
+        jobs = [{'seed': args.seed + i, 'replay': None, 'max_ticks': args.max_ticks, 'rules': rules, 'bot': bot} for i in range(args.games)]
+
+    results, seconds = run_games(jobs, args.workers)
+    summary = summarize(results, seconds)
+
+    # Report
+    print(f"{summary['games']} games in {seconds:.2f}s")
+    for key in ('score', 'lines', 'level', 'pieces per second'):
+        if key in summary:
+            values = summary[key]
+            print(f"{key:>18}: mean {values['mean']:.2f}  min {values['min']:.2f}  max {values['max']:.2f}")
+    print(f"{'ticks per second':>18}: {summary['ticks per second']:.0f}")
+    table = summary['table']
+    if table['hits'] + table['misses']:
+        print(f"{'table hit rate':>18}: {table['hit rate']:.1%}  ({table['hits']} hits, {table['misses']} misses)")
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump({'rules': rules, 'bot': bot, 'summary': summary, 'games': sorted(results, key = lambda result: result['seed'])}, file, indent = 2)
+
+if __name__ == "__main__":
+    main()
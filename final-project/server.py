@@ -0,0 +1,65 @@
+import asyncio
+from argparse import ArgumentParser
+from src.settings import *
+from src.server import GameServer, LoopbackClient
+
+async def selftest(server, matches, tap_chance):
+    """
+    Plays matches between loopback stand-in clients on a server listening on a free port, and checks
+    that every client's copy of every board ended up the same as the server's.
+
+    Args:
+        server (GameServer): The server, not started yet.
+        matches (int): The number of matches to play at once.
+        tap_chance (float): The chance of a stand-in client changing its buttons each time states arrive.
+
+    Returns:
+        bool: True if every copy matched; otherwise, False.
+    """
+    ended = {}
+    server.on_end = lambda match: ended.setdefault(match.seed, match)
+    port = await server.start(port = 0)
+
+    clients = [LoopbackClient(seed = i, tap_chance = tap_chance) for i in range(matches * server.players)]
+    await asyncio.gather(*(client.play(port = port) for client in clients))
+    await server.stop()
+
+    mismatches = sum(client.seed not in ended or client.states != ended[client.seed].sent for client in clients)
+    ticks = sum(match.tick for match in ended.values())
+    late = sum(match.late_inputs for match in ended.values())
+    times = sorted(server.step_times)
+    print(f'{len(ended)} matches, {ticks} steps, {late} late inputs')
+    print(f'step of all matches: p50 {times[len(times) // 2] * 1000:.2f} ms  p99 {times[len(times) * 99 // 100] * 1000:.2f} ms  '
+        f'max {times[-1] * 1000:.2f} ms')
+    print(f'{len(clients) - mismatches} of {len(clients)} clients in sync')
+    return not mismatches and len(ended) == matches
+
+def main():
+    parser = ArgumentParser(description = 'Run networked Tetris matches')
+    parser.add_argument('--host', default = '0.0.0.0', help = 'address to listen on')
+    parser.add_argument('--port', type = int, default = SERVER_PORT, help = 'TCP port')
+    parser.add_argument('--websocket-port', type = int, default = WEBSOCKET_PORT, help = 'WebSocket port, 0 to turn WebSocket off')
+    parser.add_argument('--players', type = int, default = 2, help = 'boards in each match')
+    parser.add_argument('--columns', type = int, default = COLUMNS, help = 'width of the fields')
+    parser.add_argument('--rows', type = int, default = ROWS, help = 'height of the fields')
+    parser.add_argument('--selftest', type = int, metavar = 'MATCHES', help = 'play this many matches between loopback clients and exit')
+    parser.add_argument('--tap-chance', type = float, default = 0.5, help = 'how busy the self-test clients are')
+    args = parser.parse_args()
+    if args.columns < MIN_COLUMNS or args.rows < MIN_ROWS:
+        parser.error(f'the field must be at least {MIN_COLUMNS} columns by {MIN_ROWS} rows')
+
+    server = GameServer(args.players, args.columns, args.rows)
+    if args.selftest:
+        if not asyncio.run(selftest(server, args.selftest, args.tap_chance)):
+            exit(1)
+        return
+
+    async def serve():
+        await server.start(args.host, args.port, args.websocket_port or None)
+        print(f'Listening on {args.host}:{args.port}' + (f', WebSocket on port {args.websocket_port}' if args.websocket_port else ''))
+        await server.ticker
+
+    asyncio.run(serve())
+
+if __name__ == "__main__":
+    main()
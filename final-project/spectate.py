@@ -0,0 +1,33 @@
+from argparse import ArgumentParser
+from src.settings import *
+from src.stream import StreamReader, header_size, keyframe_offsets
+from src.encoding import decode_varint
+
+def main():
+    parser = ArgumentParser(description = 'Read a Tetris stream written with main.py --stream')
+    parser.add_argument('stream', help = 'the stream file')
+    parser.add_argument('--join', action = 'store_true', help = 'start from the latest key frame, the way a late spectator joins')
+    args = parser.parse_args()
+
+    with open(args.stream, 'rb') as file:
+        data = file.read()
+
+    # a late joiner needs the header and everything from the latest key frame on
+    header = header_size(data)
+    offsets = keyframe_offsets(data)
+    start = offsets[-1] if args.join and offsets else header
+    reader = StreamReader()
+    frames = reader.feed(data[:header] + data[start:])
+
+    # key frames hold the step they were taken after
+    first_tick = decode_varint(data, start + 1)[0] if start > header else 0
+    read = header + len(data) - start
+    seconds = (reader.tick - first_tick) * TICK_TIME / 1000
+    print(f'{frames} frames, {len(offsets)} key frames, {read} bytes read for {seconds:.1f} s of play'
+        + (f', {read / seconds:.0f} bytes/s' if seconds else ''))
+    for board, view in enumerate(reader.views):
+        state = 'game over' if view.game_over else f'{view.shape} falling'
+        print(f'board {board}: score {view.score}, lines {view.lines}, level {view.level}, {state}')
+
+if __name__ == "__main__":
+    main()
@@ -1,98 +1,111 @@
 import pygame
-from os.path import join
 from .settings import *
-from .timer import Timer
-from .tetrominos import Tetromino, TETROMINOS, Block
-from random import choice
-from pygame.time import get_ticks
+from .text import render_text
+from .tiles import get_tiles
+from .clock import VirtualClock
+from .engine import Engine
+from .controls import Controls
+from .keyboard import Keyboard, KEY_BUTTONS
+from .replay import Replay, ReplayCursor
+from .bot import Bot
+
+def fit_block_size(columns, width = MAX_GAME_WIDTH):
+	"""
+    Finds the block size a field is drawn at to fit a width, from MIN_BLOCK_SIZE to BLOCK_SIZE.
+
+    Args:
+        columns (int): The width of the field.
+        width (int, optional): The most pixels the field can take. Defaults to MAX_GAME_WIDTH.
+
+    Returns:
+        int: The block size in pixels.
+    """
+	return max(MIN_BLOCK_SIZE, min(BLOCK_SIZE, width // columns))
 
 class Game:
-	def __init__(self, get_next_shape, update_score):
+	def __init__(self, update_score, seed = None, replay = None, bot = False, columns = COLUMNS, rows = ROWS,
+		area = None, key_buttons = KEY_BUTTONS, clock = None, scheduler = None, undo_limit = UNDO_LIMIT):
 		"""
-    Initializes the Tetris game instance, setting up the game window, field, timers, and Tetrominoes.
+    Initializes the Tetris game instance, setting up its field in the window, timers, and the rules engine.
+    The window is made by the Controller, which can place several games in it.
+    Every game is recorded, and a recorded game or the bot can play instead of the keyboard.
+    Fields wider than the area get smaller blocks, and fields taller than it are shown
+    through a viewport that scrolls with the falling Tetromino, so drawing only ever touches the visible rows.
 
     Args:
-        get_next_shape (function): Function to fetch the next Tetromino shape.
         update_score (function): Function to update the player's score.
+        seed (int, optional): Seed for the engine's shape generator. Defaults to None for a random seed.
+        replay (Replay, optional): A recorded game to play back, on its own field size. Defaults to None.
+        bot (bool, optional): Whether the bot plays the game. Defaults to False.
+        columns (int, optional): The width of the field. Defaults to COLUMNS.
+        rows (int, optional): The height of the field. Defaults to ROWS.
+        area (pygame.Rect, optional): The part of the window the field is drawn in. Defaults to None
+            for MAX_GAME_WIDTH by GAME_HEIGHT at the top left.
+        key_buttons (dict, optional): The button for each key of the player. Defaults to KEY_BUTTONS.
+        clock (VirtualClock, optional): A simulation clock shared with other games. Defaults to None for the game's own clock.
+        scheduler (Scheduler, optional): A scheduler on the shared clock. Defaults to None for the engine's own scheduler.
+        undo_limit (int, optional): How many Tetrominoes can be taken back, 0 for none. Defaults to UNDO_LIMIT.
 
     Returns:
         None
     """
-		pygame.init()
-		self.display_surface = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-		self.clock = pygame.time.Clock()
-		pygame.display.set_caption('Tetris')
+		if replay:
+			columns, rows = replay.columns, replay.rows
+		if area is None:
+			area = pygame.Rect(PADDING, PADDING, MAX_GAME_WIDTH, GAME_HEIGHT)
+
+		# viewport, the first field row shown is view_top
+		self.block_size = fit_block_size(columns, area.width)
+		self.view_rows = min(rows, area.height // self.block_size)
+		self.view_top = 0
 
 		# general 
-		self.surface = pygame.Surface((GAME_WIDTH, GAME_HEIGHT))
+		self.surface = pygame.Surface((columns * self.block_size, self.view_rows * self.block_size))
 		self.display_surface = pygame.display.get_surface()
-		self.rect = self.surface.get_rect(topleft = (PADDING, PADDING))
-		self.sprites = pygame.sprite.Group()
-
-		# game connection
-		self.get_next_shape = get_next_shape
-		self.update_score = update_score
-
-		# gameover
-		self.game_over = False
-
+		self.rect = self.surface.get_rect(topleft = area.topleft)
 
 		# lines 
 		self.line_surface = self.surface.copy()
 		self.line_surface.fill((0,255,0))
 		self.line_surface.set_colorkey((0,255,0))
 		self.line_surface.set_alpha(120)
+		self.draw_grid()
 
-		# tetromino
-		self.field_data = [[0 for x in range(COLUMNS)] for y in range(ROWS)]
-		self.tetromino = Tetromino(
-			choice(list(TETROMINOS.keys())), 
-			self.sprites, 
-			self.create_new_tetromino,
-			self.field_data)
-
-		# timer 
-		self.down_speed = UPDATE_SPEED
-		self.down_speed_faster = self.down_speed * 0.3
-		self.down_pressed = False
-		self.timers = {
-			'vertical move': Timer(self.down_speed, True, self.move_down),
-			'horizontal move': Timer(MOVE_WAIT_TIME),
-			'rotate': Timer(ROTATE_WAIT_TIME),
-			'drop': Timer(DROP_WAIT_TIME)
-			
-		}
-		self.timers['vertical move'].activate()
+		# block tiles, shared by all games with the same block size
+		self.tiles = get_tiles(self.block_size)
 
-		# score
-		self.current_level = 1
-		self.current_score = 0
-		self.current_lines = 0
+		# placed blocks in view with the grid on top, redrawn only where the board changed or the view scrolled
+		self.stack_surface = self.surface.copy()
+		self.stack_version = None
+		self.stack_top = 0
 
-	def calculate_score(self, num_lines):
-		"""
-    Updates the score, level, and speed based on the number of cleared lines.
+		# dirty rects, the cells the falling Tetromino was drawn on last frame
+		self.tetromino_rects = []
+		self.needs_redraw = True
+		self.game_over_drawn = False
 
-    Args:
-        num_lines (int): The number of lines cleared in a single move.
+		# interpolation, the Tetromino and its position before the last update
+		self.previous_position = None
 
-    Returns:
-        None
-    """
-		self.current_lines += num_lines
-		self.current_score += SCORE_DATA[num_lines] * self.current_level
-
-		if self.current_lines / 10 > self.current_level:
-			self.current_level += 1
-			self.down_speed *= 0.75
-			self.down_speed_faster = self.down_speed * 0.3
-			self.timers['vertical move'].duration = self.down_speed
-			
-		self.update_score(self.current_lines, self.current_score, self.current_level)
+		# rules, running on a simulation clock that only moves in fixed steps
+		self.clock = clock or VirtualClock()
+		self.engine = Engine(replay.seed if replay else seed, update_score, self.clock, columns = columns, rows = rows, scheduler = scheduler,
+			undo_limit = undo_limit)
+
+		# input
+		self.controls = Controls(self.engine)
+		self.keyboard = Keyboard(key_buttons)
+		self.playback = ReplayCursor(replay) if replay else None
+		self.bot = Bot(self.engine) if bot else None
+		self.recording = Replay(self.engine.seed, columns = columns, rows = rows)
 
-	def check_game_over(self):
+		# times the input and rules of each step when set
+		self.profiler = None
+
+	def draw_grid(self):
 		"""
-    Checks if the game is over by detecting if any block is above the visible field.
+    Draws the grid lines onto the line surface. This is done once, the lines are then
+    composited into the stack layer and over the falling Tetromino.
 
     Args:
         None
@@ -100,14 +113,18 @@ class Game:
     Returns:
         None
     """
-		for block in self.tetromino.blocks:
-			if block.pos.y < 0:
-				self.game_over = True
-				return
+		for col in range(1, self.surface.get_width() // self.block_size):
+			x = col * self.block_size
+			pygame.draw.line(self.line_surface, LINE_COLOR, (x,0), (x,self.surface.get_height()), 1)
+
+		for row in range(1, self.view_rows):
+			y = row * self.block_size
+			pygame.draw.line(self.line_surface, LINE_COLOR, (0,y), (self.surface.get_width(),y))
 
-	def create_new_tetromino(self):
+	def scroll(self):
 		"""
-    Replaces the current Tetromino with a new one and processes game state.
+    Moves the viewport as little as possible to keep the falling Tetromino SCROLL_MARGIN rows from its edges,
+    and its landing preview too when both fit.
 
     Args:
         None
@@ -115,184 +132,279 @@ class Game:
     Returns:
         None
     """
-		self.check_game_over()
-		self.check_finished_rows()
-		self.tetromino = Tetromino(
-			self.get_next_shape(), 
-			self.sprites, 
-			self.create_new_tetromino,
-			self.field_data)
-
-	def timer_update(self):
+		board = self.engine.board
+		if self.view_rows == board.height:
+			return
+
+		tetromino = self.engine.tetromino
+		top = min(y for x, y in tetromino.blocks) - SCROLL_MARGIN
+		bottom = max(y for x, y in tetromino.blocks) + SCROLL_MARGIN
+		landing = max(y for x, y in tetromino.ghost_blocks()) + SCROLL_MARGIN
+		if landing - top < self.view_rows:
+			bottom = landing
+
+		view_top = self.view_top
+		if top < view_top:
+			view_top = top
+		elif bottom >= view_top + self.view_rows:
+			view_top = bottom - self.view_rows + 1
+		self.view_top = max(0, min(view_top, board.height - self.view_rows))
+
+	def draw_stack_rows(self, rows):
 		"""
-    Updates all active timers, triggering their respective events.
+    Redraws the placed blocks and grid lines of some field rows in the cached layer. Rows out of view are left out.
 
     Args:
-        None
+        rows (range): The field rows.
 
     Returns:
         None
     """
-		for timer in self.timers.values():
-			timer.update()
+		first = max(rows.start, self.view_top)
+		last = min(rows.stop, self.view_top + self.view_rows)
+		if first >= last:
+			return
+
+		rect = pygame.Rect(0, (first - self.view_top) * self.block_size, self.surface.get_width(), (last - first) * self.block_size)
+		self.stack_surface.fill(GRAY, rect)
+		self.tiles.draw_field(self.stack_surface, self.engine.board.field_data, first, last, self.view_top)
+		self.stack_surface.blit(self.line_surface, rect, rect)
 
-	def move_down(self):
+	def draw_stack(self):
 		"""
-    Moves the current Tetromino down by one unit.
+    Updates the cached layer of placed blocks and grid lines if the board changed or the view scrolled since the last frame.
+    A scroll moves the layer and draws the rows that came into view; after a single board change only its rows are redrawn.
 
     Args:
         None
 
     Returns:
-        None
+        bool: True if the layer changed; otherwise, False.
     """
-		self.tetromino.move_down()
-
-	def draw_grid(self):
+		board = self.engine.board
+		moved = self.view_top - self.stack_top
+		if self.stack_version == board.version and not moved:
+			return False
+
+		view = range(self.view_top, self.view_top + self.view_rows)
+		if self.stack_version is None or abs(moved) >= self.view_rows:
+			self.draw_stack_rows(view)
+		else:
+			if moved:
+				# the grid has no line along the top of the view, so the row that moved to or from the top is drawn again
+				# along with the rows that came into view
+				self.stack_surface.scroll(0, -moved * self.block_size)
+				if moved > 0:
+					self.draw_stack_rows(range(view.start, view.start + 1))
+					self.draw_stack_rows(range(view.stop - moved, view.stop))
+				else:
+					self.draw_stack_rows(range(view.start, view.start - moved + 1))
+			if board.version == self.stack_version + 1:
+				self.draw_stack_rows(board.changed_rows)
+			elif board.version != self.stack_version:
+				self.draw_stack_rows(view)
+
+		self.stack_version = board.version
+		self.stack_top = self.view_top
+		return True
+
+	def fall_offset(self, alpha, ghost_blocks):
 		"""
-    Draws the grid overlay on the game field.
+    Finds how far above its current row the falling Tetromino should be drawn, so a fall between
+    two updates is shown partway according to the time left over between them.
 
     Args:
-        None
+        alpha (float): How far the frame is between the last update and the next one, from 0 to 1.
+        ghost_blocks (list): The cells of the landing preview.
 
     Returns:
-        None
+        int: The offset in pixels, 0 or negative.
     """
-		for col in range(1, COLUMNS):
-			x = col * BLOCK_SIZE
-			pygame.draw.line(self.line_surface, LINE_COLOR, (x,0), (x,self.surface.get_height()), 1)
-
-		for row in range(1, ROWS):
-			y = row * BLOCK_SIZE
-			pygame.draw.line(self.line_surface, LINE_COLOR, (0,y), (self.surface.get_width(),y))
+		tetromino = self.engine.tetromino
+		if not self.previous_position or alpha >= 1:
+			return 0
+
+		# only a fall of the same Tetromino by one row is interpolated
+		previous_tetromino, x, y, rotation = self.previous_position
+		if previous_tetromino is not tetromino or (x, rotation, y + 1) != (tetromino.x, tetromino.rotation, tetromino.y):
+			return 0
+
+		# the landing preview is drawn on whole cells, don't draw the Tetromino over it partway
+		covered_blocks = set(tetromino.blocks)
+		covered_blocks.update((block_x, block_y - 1) for block_x, block_y in tetromino.blocks)
+		if covered_blocks & set(ghost_blocks):
+			return 0
+		return -round((1 - alpha) * self.block_size)
+
+	def draw_tetromino(self, alpha = 1):
+		"""
+    Draws the falling Tetromino and its landing preview over the stack layer,
+    then puts the grid lines back over just the cells that were drawn.
 
-		self.surface.blit(self.line_surface, (0,0))
+    Args:
+        alpha (float, optional): How far the frame is between the last update and the next one. Defaults to 1.
 
-	def input(self):
+    Returns:
+        list: The rects that were drawn, relative to the game surface.
+    """
+		tetromino = self.engine.tetromino
+		ghost_blocks = tetromino.ghost_blocks()
+		size = self.block_size
+		view_offset = -self.view_top * size
+		offset = self.fall_offset(alpha, ghost_blocks) + view_offset
+
+		self.tiles.draw_ghost(self.surface, ghost_blocks, tetromino.shape, view_offset)
+		self.tiles.draw(self.surface, tetromino.blocks, tetromino.shape, offset)
+
+		# each area only once, blending the lines twice would brighten them
+		areas = {(x * size, y * size + view_offset) for x, y in ghost_blocks}
+		areas.update((x * size, y * size + offset) for x, y in tetromino.blocks)
+		rects = [pygame.Rect(x, y, size, size) for x, y in sorted(areas)]
+		for rect in rects:
+			self.surface.blit(self.line_surface, rect, rect)
+		return rects
+
+	def draw(self, alpha = 1):
 		"""
-    Handles player input for movement, rotation, and instant drop.
+    Draws the game field in view and copies the changed parts to the window.
+    A finished game among others draws its game over screen over its field once.
 
     Args:
-        None
+        alpha (float, optional): How far the frame is between the last update and the next one. Defaults to 1.
 
     Returns:
-        None
+        list: The rects of the window that changed.
     """
-		keys = pygame.key.get_pressed()
-
-		# checking horizontal movement
-		if not self.timers['horizontal move'].active:
-			if keys[pygame.K_LEFT]:
-				self.tetromino.move_horizontal(-1)
-				self.timers['horizontal move'].activate()
-			if keys[pygame.K_RIGHT]:
-				self.tetromino.move_horizontal(1)	
-				self.timers['horizontal move'].activate()
-		
-		# check for rotation
-		if not self.timers['rotate'].active:
-			if keys[pygame.K_UP]:
-				self.tetromino.rotate()
-				self.timers['rotate'].activate()
-
-		# down speedup
-		if not self.down_pressed and keys[pygame.K_DOWN]:
-			self.down_pressed = True
-			self.timers['vertical move'].duration = self.down_speed_faster
-
-		if self.down_pressed and not keys[pygame.K_DOWN]:
-			self.down_pressed = False
-			self.timers['vertical move'].duration = self.down_speed
-		
-		# instant drop
-		if keys[pygame.K_SPACE] and not self.timers['drop'].active:
-			self.tetromino.instant_drop()
-			self.timers['drop'].activate()
-
-	def check_finished_rows(self):
+		if self.engine.game_over:
+			if self.game_over_drawn and not self.needs_redraw:
+				return []
+			self.game_over_drawn = True
+			self.needs_redraw = False
+			return self.display_game_over(whole_window = False)
+
+		self.scroll()
+		if self.draw_stack() or self.needs_redraw:
+			self.surface.blit(self.stack_surface, (0,0))
+			self.tetromino_rects = self.draw_tetromino(alpha)
+			self.display_surface.blit(self.surface, self.rect)
+			pygame.draw.rect(self.display_surface, LINE_COLOR, self.rect, 2, 2)
+			self.needs_redraw = False
+			return [self.rect.copy()]
+
+		# erase the last frame's Tetromino with the stack layer, then draw it again
+		old_rects = self.tetromino_rects
+		for rect in old_rects:
+			self.surface.blit(self.stack_surface, rect, rect)
+		self.tetromino_rects = self.draw_tetromino(alpha)
+
+		# nothing moved
+		if self.tetromino_rects == old_rects:
+			return []
+
+		dirty_rects = []
+		for rect in old_rects + self.tetromino_rects:
+			dirty_rect = rect.move(self.rect.topleft).clip(self.rect)
+			if dirty_rect:
+				self.display_surface.blit(self.surface, dirty_rect, rect.clip(self.surface.get_rect()))
+				dirty_rects.append(dirty_rect)
+		pygame.draw.rect(self.display_surface, LINE_COLOR, self.rect, 2, 2)
+		return dirty_rects
+
+	def input(self):
 		"""
-    Checks and clears any fully completed rows, updates the score, and moves remaining blocks down.
+    Reads the keyboard into a bitmask of held buttons for the next simulation step.
 
     Args:
         None
 
     Returns:
-        None
+        int: A bitmask of the held buttons.
     """
-		# get the full row indexes 
-		delete_rows = []
-		for i, row in enumerate(self.field_data):
-			if all(row):
-				delete_rows.append(i)
-
-		if delete_rows:
-			for delete_row in delete_rows:
-
-				# delete full rows
-				for block in self.field_data[delete_row]:
-					block.kill()
-
-				# move down blocks
-				for row in self.field_data:
-					for block in row:
-						if block and block.pos.y < delete_row:
-							block.pos.y += 1
-
-			# rebuild the field data 
-			self.field_data = [[0 for x in range(COLUMNS)] for y in range(ROWS)]
-			for block in self.sprites:
-				self.field_data[int(block.pos.y)][int(block.pos.x)] = block
-
-			# update score
-			self.calculate_score(len(delete_rows))
-
-	def display_game_over(self):
+		return self.keyboard.read()
+
+	def display_game_over(self, whole_window = True):
 		"""
     Displays the game over screen with restart instructions.
 
     Args:
-        None
+        whole_window (bool, optional): Whether the screen fills the window, or only covers the field
+            of a game among others. Defaults to True.
 
     Returns:
-        None
+        list: The rects of the window that changed.
     """
-		font = pygame.font.Font(join('final-project','assets','font','NotoSans-Regular.ttf'), 50)  
-		text_surface = font.render("GAME OVER", True, "red")
-		restart_surface = font.render("Press R to Restart", True, "white")
+		if not whole_window:
+			text_surface = render_text("GAME OVER", min(50, self.rect.width // 5), "red")
+			self.display_surface.fill(GRAY, self.rect)
+			self.display_surface.blit(text_surface, text_surface.get_rect(center = self.rect.center))
+			pygame.draw.rect(self.display_surface, LINE_COLOR, self.rect, 2, 2)
+			return [self.rect.copy()]
+
+		text_surface = render_text("GAME OVER", 50, "red")
+		restart_surface = render_text("Press R to Restart", 50, "white")
 			
-		text_rect = text_surface.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 3))
-		restart_rect = restart_surface.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
+		width, height = self.display_surface.get_size()
+		text_rect = text_surface.get_rect(center=(width // 2, height // 3))
+		restart_rect = restart_surface.get_rect(center=(width // 2, height // 2))
 			
 		self.display_surface.fill(GRAY)
 		self.display_surface.blit(text_surface, text_rect)
 		self.display_surface.blit(restart_surface, restart_rect)
-		pygame.display.update()
+		return [self.display_surface.get_rect()]
+
+	def update(self, advance = True):
+		"""
+    Advances the game by one fixed simulation step of TICK_TIME milliseconds,
+    with the buttons from the replay being played back, the bot or the keyboard.
+
+    Args:
+        advance (bool, optional): Whether to advance the clock and fire the timers. Games sharing a clock only apply
+            their buttons, and the clock is advanced once for all of them. Defaults to True.
+
+    Returns:
+        bool: False if a played back replay has ended and nothing was done; otherwise, True.
+    """
+		tetromino = self.engine.tetromino
+		self.previous_position = (tetromino, tetromino.x, tetromino.y, tetromino.rotation)
+
+		if self.playback:
+			if self.playback.done():
+				return False
+			buttons = self.playback.next_buttons()
+		elif self.bot:
+			buttons = self.bot.get_buttons()
+		else:
+			buttons = self.input()
+
+		if self.profiler:
+			self.profiler.lap('input')
+
+		self.recording.record(buttons)
+		if advance:
+			self.controls.step(buttons)
+		else:
+			self.controls.apply(buttons)
+		if self.profiler:
+			self.profiler.lap('rules')
+		return True
 
 	def run(self):
 		"""
-    Runs the main game loop, updating the game state and drawing the current frame.
+    Runs the main game loop, updating the game state by one step and drawing the current frame.
 
     Args:
         None
 
     Returns:
-        None
+        list: The rects of the window that changed.
     """
-		if self.game_over:
-			self.display_game_over()
-			return
+		if self.engine.game_over:
+			return self.display_game_over()
 
 		# update
-		self.input()
-		self.timer_update()
-		self.sprites.update()
+		self.update()
 
 		# drawing 
-		self.surface.fill(GRAY)
-		self.sprites.draw(self.surface)
-
-		self.draw_grid()
-		self.display_surface.blit(self.surface, (PADDING,PADDING))
-		pygame.draw.rect(self.display_surface, LINE_COLOR, self.rect, 2, 2)
+		return self.draw()
 
 	
\ No newline at end of file
@@ -1,31 +1,52 @@
 import pygame
 from pygame.image import load
 from os.path import join
+from functools import lru_cache
 from .settings import *
 from .tetrominos import TETROMINOS
 
+@lru_cache(maxsize = None)
+def load_shape(shape):
+	"""
+    Loads the preview image of a Tetromino shape. Each image is only read from disk once and shared by all previews.
+
+    Args:
+        shape (str): The identifier for the Tetromino shape.
+
+    Returns:
+        pygame.Surface: The image.
+    """
+	return load(join('final-project','assets','tetromino',f'{shape}.png')).convert_alpha()
+
 class Preview:
-	def __init__(self):
+	def __init__(self, rect = None):
 		"""
     Initializes the preview sidebar to display upcoming Tetromino shapes.
 
     Args:
-        None
+        rect (pygame.Rect, optional): The area of the window to draw in. Defaults to None for the top right of the window.
 
     Returns:
         None
     """
 		# general
 		self.display_surface = pygame.display.get_surface()
-		self.surface = pygame.Surface((SIDEBAR_WIDTH, GAME_HEIGHT * PREVIEW_HEIGHT))
-		self.rect = self.surface.get_rect(topright = (WINDOW_WIDTH - PADDING,PADDING))
+		if rect is None:
+			rect = pygame.Rect(0, 0, SIDEBAR_WIDTH, GAME_HEIGHT * PREVIEW_HEIGHT)
+			rect.topright = (self.display_surface.get_width() - PADDING, PADDING)
+		self.surface = pygame.Surface(rect.size)
+		self.rect = pygame.Rect(rect)
 
 		# shapes
-		self.shape_surfaces = {shape: load(join('final-project','assets','tetromino',f'{shape}.png')).convert_alpha() for shape in TETROMINOS.keys()}
+		self.shape_surfaces = {shape: load_shape(shape) for shape in TETROMINOS.keys()}
 
 		# image position data
 		self.increment_height = self.surface.get_height() / 3
 
+		# shapes shown on the last drawn frame
+		self.drawn_shapes = None
+		self.needs_redraw = True
+
 	def display_pieces(self, shapes):
 		"""
     Displays the upcoming Tetromino shapes in the preview sidebar.
@@ -46,14 +67,22 @@ class Preview:
 	def run(self, next_shapes):
 		"""
     Updates and renders the preview sidebar with the upcoming Tetromino shapes.
+    Nothing is drawn while the shapes stay the same.
 
     Args:
         next_shapes (list): A list of strings representing the next Tetromino shapes.
 
     Returns:
-        None
+        list: The rects of the window that changed.
     """
+		shapes = tuple(next_shapes)
+		if shapes == self.drawn_shapes and not self.needs_redraw:
+			return []
+		self.drawn_shapes = shapes
+		self.needs_redraw = False
+
 		self.surface.fill(GRAY)
 		self.display_pieces(next_shapes)
 		self.display_surface.blit(self.surface, self.rect)
 		pygame.draw.rect(self.display_surface, LINE_COLOR, self.rect, 2, 2)
+		return [self.rect.copy()]
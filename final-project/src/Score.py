@@ -1,24 +1,28 @@
 import pygame
-from os.path import join
 from .settings import *
+from .text import render_text
 
 class Score:
-	def __init__(self):
+	def __init__(self, rect = None, font_size = 30):
 		"""
     Initializes the sidebar to display score, level, and lines completed in the game.
 
     Args:
-        None
+        rect (pygame.Rect, optional): The area of the window to draw in. Defaults to None for the bottom right of the window.
+        font_size (int, optional): The font size of the labels. Defaults to 30.
 
     Returns:
         None
     """
-		self.surface = pygame.Surface((SIDEBAR_WIDTH,GAME_HEIGHT * SCORE_HEIGHT - PADDING))
-		self.rect = self.surface.get_rect(bottomright = (WINDOW_WIDTH - PADDING,WINDOW_HEIGHT - PADDING))
 		self.display_surface = pygame.display.get_surface()
+		if rect is None:
+			rect = pygame.Rect(0, 0, SIDEBAR_WIDTH, GAME_HEIGHT * SCORE_HEIGHT - PADDING)
+			rect.bottomright = (self.display_surface.get_width() - PADDING, self.display_surface.get_height() - PADDING)
+		self.surface = pygame.Surface(rect.size)
+		self.rect = pygame.Rect(rect)
 
 		# font
-		self.font = pygame.font.Font(join('final-project','assets','font','NotoSans-Regular.ttf'), 30)
+		self.font_size = font_size
 
 		# increment
 		self.increment_height = self.surface.get_height() / 3
@@ -28,6 +32,26 @@ class Score:
 		self.level = 1
 		self.lines = 0
 
+		# values shown on the last drawn frame
+		self.drawn_data = None
+		self.needs_redraw = True
+
+	def update(self, lines, score, level):
+		"""
+    Sets the score, level, and lines to display, as a game's update_score function.
+
+    Args:
+        lines (int): The number of lines cleared.
+        score (int): The current score.
+        level (int): The current level.
+
+    Returns:
+        None
+    """
+		self.lines = lines
+		self.score = score
+		self.level = level
+
 	def display_text(self, pos, text):
 		"""
     Renders and displays a text label on the sidebar.
@@ -39,20 +63,27 @@ class Score:
     Returns:
         None
     """
-		text_surface = self.font.render(f'{text[0]}: {text[1]}', True, 'white')
+		text_surface = render_text(f'{text[0]}: {text[1]}', self.font_size, 'white')
 		text_rext = text_surface.get_rect(center = pos)
 		self.surface.blit(text_surface, text_rext)
 
 	def run(self):
 		"""
     Updates and renders the sidebar with current score, level, and lines completed.
+    Nothing is drawn while the values stay the same.
 
     Args:
         None
 
     Returns:
-        None
+        list: The rects of the window that changed.
     """
+		data = (self.score, self.level, self.lines)
+		if data == self.drawn_data and not self.needs_redraw:
+			return []
+		self.drawn_data = data
+		self.needs_redraw = False
+
 		self.surface.fill(GRAY)
 		for i, text in enumerate([('Score',self.score), ('Level', self.level), ('Lines', self.lines)]):
 			x = self.surface.get_width() / 2
@@ -61,3 +92,4 @@ class Score:
 
 		self.display_surface.blit(self.surface,self.rect)
 		pygame.draw.rect(self.display_surface, LINE_COLOR, self.rect, 2, 2)
+		return [self.rect.copy()]
@@ -0,0 +1,286 @@
+import sys
+import tracemalloc
+from statistics import median
+from time import perf_counter_ns
+from timeit import Timer as TimeitTimer
+import pygame
+from .settings import *
+from .board import SHAPE_CODES
+from .tetrominos import Tetromino
+from .controller import Controller
+
+# scripted board states as the number of filled rows at the bottom, each with one hole
+BOARD_STATES = {
+	'empty': 0,
+	'half-full': ROWS // 2,
+	'near-top': ROWS - 3,
+	'line clear': 4
+}
+
+# frames between restoring a board state, so the falling Tetromino stays close to the scripted one
+RESTORE_FRAMES = 120
+
+# names of the pygame calls counted as blits
+BLIT_CALLS = ('blit', 'blits')
+
+def state_cells(name):
+	"""
+    Builds the cell bytes of a scripted board state. Every filled row has one hole, in a different column from the row below,
+    except for 'line clear', where the rows are only open in the first column for a vertical I to fill.
+
+    Args:
+        name (str): One of BOARD_STATES.
+
+    Returns:
+        bytearray: One SHAPE_CODES byte per cell, row by row.
+    """
+	codes = list(SHAPE_CODES.values())
+	cells = bytearray(ROWS * COLUMNS)
+	for y in range(ROWS - BOARD_STATES[name], ROWS):
+		hole = 0 if name == 'line clear' else y * 3 % COLUMNS
+		for x in range(COLUMNS):
+			if x != hole:
+				cells[y * COLUMNS + x] = codes[(x + y) % len(codes)]
+	return cells
+
+def state_snapshot(engine, name):
+	"""
+    Puts an engine in a scripted board state and takes a snapshot of it. The falling Tetromino is a T at its spawn position,
+    so the results do not depend on the random shapes, except for 'line clear', where it is a vertical I right above the open column,
+    so dropping it clears four lines.
+
+    Args:
+        engine (Engine): The engine, which is changed.
+        name (str): One of BOARD_STATES.
+
+    Returns:
+        bytes: The snapshot.
+    """
+	engine.restore(engine.history[0])
+	engine.board.load_cells(state_cells(name))
+	engine.tetromino = Tetromino('I' if name == 'line clear' else 'T', engine.create_new_tetromino, engine.board)
+	if name == 'line clear':
+		for rotation in range(4):
+			cells = engine.tetromino.cells(0, 0, rotation)
+			if len({x for x, y in cells}) == 1:
+				x = -cells[0][0]
+				y = -max(y for x, y in cells) - 1
+				engine.tetromino.set_position(x, y, rotation)
+				break
+	return engine.snapshot()
+
+def frame_functions(controller):
+	"""
+    Lists the frames to benchmark. Score and Preview are forced to redraw, since they draw nothing when their values stay the same.
+
+    Args:
+        controller (Controller): The controller whose components are run.
+
+    Returns:
+        dict: A function drawing one frame for each component.
+    """
+	def score():
+		controller.score.needs_redraw = True
+		return controller.score.run()
+
+	def preview():
+		controller.preview.needs_redraw = True
+		return controller.preview.run(controller.game.engine.next_shapes)
+
+	def full_frame():
+		alpha = controller.update_simulation(TICK_TIME)
+		dirty_rects = controller.run_frame(alpha)
+		if dirty_rects:
+			pygame.display.update(dirty_rects)
+
+	return {
+		'Game.run': controller.game.run,
+		'Score.run': score,
+		'Preview.run': preview,
+		'Controller frame': full_frame
+	}
+
+def run_frames(controller, frame, state, frames, measure):
+	"""
+    Plays frames from a board state and measures each one. The state is set up between frames, outside of the measurement:
+    'line clear' is restored and its I dropped before every frame, the others are restored every RESTORE_FRAMES frames and on game over.
+
+    Args:
+        controller (Controller): The controller.
+        frame (function): Draws one frame.
+        state (str): One of BOARD_STATES.
+        frames (int): The number of frames.
+        measure (function): Called with the frame function, returns the measurement of one frame.
+
+    Returns:
+        list: The measurement of each frame.
+    """
+	engine = controller.game.engine
+	snapshot = state_snapshot(engine, state)
+	controller.screen = None
+	results = []
+	for i in range(frames):
+		if state == 'line clear':
+			engine.restore(snapshot)
+			engine.instant_drop()
+		elif i % RESTORE_FRAMES == 0 or engine.game_over:
+			engine.restore(snapshot)
+		results.append(measure(frame))
+	return results
+
+def time_frame(frame):
+	"""
+    Measures the nanoseconds a frame takes.
+    """
+	start = perf_counter_ns()
+	frame()
+	return perf_counter_ns() - start
+
+def count_blits(frame):
+	"""
+    Counts the blit and blits calls of a frame, through the profiler hook for calls into C functions.
+    """
+	count = 0
+	def profile(stack_frame, event, function):
+		nonlocal count
+		if event == 'c_call' and function.__name__ in BLIT_CALLS:
+			count += 1
+	sys.setprofile(profile)
+	try:
+		frame()
+	finally:
+		sys.setprofile(None)
+	return count
+
+def peak_allocated(frame):
+	"""
+    Measures the most memory a frame allocated above what was allocated before it. tracemalloc must be tracing.
+    """
+	tracemalloc.reset_peak()
+	before = tracemalloc.get_traced_memory()[0]
+	frame()
+	return tracemalloc.get_traced_memory()[1] - before
+
+def benchmark_frames(frames):
+	"""
+    Benchmarks each component's frame in each board state, with one pass for the times, one for the blit calls
+    and one for the allocations, since counting and tracing slow the frames down.
+
+    Args:
+        frames (int): Frames to play in each pass.
+
+    Returns:
+        dict: For each component and state the median and mean ns per frame, blit calls per frame and peak bytes allocated per frame.
+    """
+	controller = Controller()
+	results = {}
+	for component, frame in frame_functions(controller).items():
+		results[component] = {}
+		for state in BOARD_STATES:
+			times = run_frames(controller, frame, state, frames, time_frame)
+			blits = run_frames(controller, frame, state, frames, count_blits)
+			tracemalloc.start()
+			allocated = run_frames(controller, frame, state, frames, peak_allocated)
+			tracemalloc.stop()
+
+			results[component][state] = {
+				'ns per frame': median(times),
+				'mean ns per frame': sum(times) / frames,
+				'blit calls per frame': sum(blits) / frames,
+				'peak bytes allocated per frame': sum(allocated) / frames
+			}
+	return results
+
+def time_call(func, setup = None, number = 2000, repeat = 5):
+	"""
+    Times a function with timeit, keeping the best of several runs.
+
+    Args:
+        func (function): The function.
+        setup (function, optional): Called before each call, its time is subtracted. Defaults to None.
+        number (int, optional): Calls per run. Defaults to 2000.
+        repeat (int, optional): Runs. Defaults to 5.
+
+    Returns:
+        float: Nanoseconds per call.
+    """
+	if setup:
+		both = min(TimeitTimer(lambda: (setup(), func())).repeat(repeat, number))
+		alone = min(TimeitTimer(setup).repeat(repeat, number))
+		return max(both - alone, 0) / number * 1e9
+	return min(TimeitTimer(func).repeat(repeat, number)) / number * 1e9
+
+def benchmark_rules(engine):
+	"""
+    Microbenchmarks the rule paths with a T on the half-full board: row checks, rotation, instant drops and the collision helpers.
+    Calls that change the state restore it in an untimed setup step.
+
+    Args:
+        engine (Engine): An engine to benchmark, which is changed.
+
+    Returns:
+        dict: Nanoseconds per call for each path.
+    """
+	half_full = state_snapshot(engine, 'half-full')
+	line_clear = state_snapshot(engine, 'line clear')
+	engine.restore(half_full)
+	board = engine.board
+	tetromino = engine.tetromino
+	blocks = tetromino.blocks
+
+	def place_line_clear():
+		engine.restore(line_clear)
+		tetromino = engine.tetromino
+		tetromino.set_position(tetromino.x, tetromino.y + board.drop_distance(tetromino.blocks), tetromino.rotation)
+		board.place(tetromino.blocks, tetromino.shape)
+
+	results = {
+		'check_finished_rows (no lines)': time_call(engine.check_finished_rows),
+		'check_finished_rows (4 lines)': time_call(engine.check_finished_rows, place_line_clear),
+		'Tetromino.rotate': time_call(tetromino.rotate),
+		'instant_drop': time_call(engine.instant_drop, lambda: engine.restore(half_full)),
+		'Board.collide': time_call(lambda: board.collide(blocks)),
+		'Board.drop_distance': time_call(lambda: board.drop_distance(blocks)),
+		'next_move_horizontal_collide': time_call(lambda: tetromino.next_move_horizontal_collide(blocks, 1)),
+		'next_move_vertical_collide': time_call(lambda: tetromino.next_move_vertical_collide(blocks, 1))
+	}
+	return results
+
+def run_benchmarks(frames):
+	"""
+    Runs the whole suite. The SDL video driver should be set to dummy before pygame is imported to run it headless.
+
+    Args:
+        frames (int): Frames to play for each component, state and pass.
+
+    Returns:
+        dict: The 'frames' and 'rules' results.
+    """
+	frame_results = benchmark_frames(frames)
+	controller = Controller()
+	return {'frames': frame_results, 'rules': benchmark_rules(controller.game.engine)}
+
+def compare(results, baseline, threshold):
+	"""
+    Finds the results that got worse than a baseline by more than a threshold: frame times, blit calls and rule call times.
+
+    Args:
+        results (dict): Results from run_benchmarks.
+        baseline (dict): Earlier results from run_benchmarks.
+        threshold (float): The allowed slowdown, 0.2 for 20 percent.
+
+    Returns:
+        list: (name, baseline value, new value) for each regression.
+    """
+	regressions = []
+	for component, states in baseline.get('frames', {}).items():
+		for state, values in states.items():
+			for key in ('ns per frame', 'blit calls per frame'):
+				new = results['frames'].get(component, {}).get(state, {}).get(key)
+				if new is not None and new > values[key] * (1 + threshold):
+					regressions.append((f'{component} / {state} / {key}', values[key], new))
+	for name, value in baseline.get('rules', {}).items():
+		new = results['rules'].get(name)
+		if new is not None and new > value * (1 + threshold):
+			regressions.append((f'{name} ns per call', value, new))
+	return regressions
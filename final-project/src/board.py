@@ -0,0 +1,291 @@
+from .settings import *
+from .zobrist import cell_keys, row_hash, board_hash
+
+# byte stored in Board.cells for each shape, 0 for an empty cell, and for garbage lines after the shapes
+SHAPE_CODES = {shape: code for code, shape in enumerate(TETROMINOS, 1)}
+GARBAGE_CODE = len(TETROMINOS) + 1
+CODE_SHAPES = [0] + list(TETROMINOS.keys()) + [GARBAGE]
+
+# turns cell bytes into b'0' for empty and b'1' for filled cells, to read them as binary numbers
+BIT_DIGITS = bytes.maketrans(bytes(range(256)), b'0' + b'1' * 255)
+
+class Board:
+	def __init__(self, columns = COLUMNS, rows = ROWS):
+		"""
+    Initializes an empty game field where each row is stored as an integer bitmask,
+    with bit x set when column x is filled.
+
+    Args:
+        columns (int, optional): The width of the field. Defaults to COLUMNS.
+        rows (int, optional): The height of the field. Defaults to ROWS.
+
+    Returns:
+        None
+    """
+		# size
+		self.width = columns
+		self.height = rows
+		self.full_row = (1 << columns) - 1
+		self.cell_keys = cell_keys(columns, rows)
+
+		# pivot cell of a new Tetromino, centered above the field
+		self.spawn = (columns // 2, BLOCK_OFFSET[1])
+
+		# occupancy, one bitmask per row
+		self.rows = [0 for y in range(rows)]
+
+		# shape of each placed block, only needed for rendering
+		self.field_data = [[0 for x in range(columns)] for y in range(rows)]
+
+		# the same as field_data as one SHAPE_CODES byte per cell, row by row, changed in place
+		# so views of it stay valid
+		self.cells = bytearray(rows * columns)
+
+		# row of the top filled cell in each column, the height when the column is empty
+		self.heights = [rows for x in range(columns)]
+
+		# Zobrist hash of the filled cells, updated as blocks are placed and rows cleared
+		self.hash = 0
+
+		# counts the changes to the placed blocks, so renderers know when to redraw
+		self.version = 0
+
+		# the rows the last change touched, so a renderer one version behind only redraws those
+		self.changed_rows = range(rows)
+
+	def collide(self, blocks):
+		"""
+    Checks if any of the given cells is outside the field or occupied by a placed block.
+    Cells above the visible field (negative y) only collide with the side walls.
+
+    Args:
+        blocks (list): A list of (x, y) cells to check.
+
+    Returns:
+        bool: True if a collision is detected; otherwise, False.
+    """
+		rows = self.rows
+		width = self.width
+		height = self.height
+		for x, y in blocks:
+			if not 0 <= x < width or y >= height:
+				return True
+			if y >= 0 and rows[y] & (1 << x):
+				return True
+		return False
+
+	def place(self, blocks, shape):
+		"""
+    Writes the given cells into the field. Cells above the visible field are left out.
+
+    Args:
+        blocks (list): A list of (x, y) cells to fill.
+        shape (str): The shape the cells belong to.
+
+    Returns:
+        None
+    """
+		placed_rows = []
+		for x, y in blocks:
+			if y >= 0:
+				if not self.rows[y] & 1 << x:
+					self.hash ^= self.cell_keys[y][x]
+				self.rows[y] |= 1 << x
+				self.field_data[y][x] = shape
+				self.cells[y * self.width + x] = SHAPE_CODES[shape]
+				if y < self.heights[x]:
+					self.heights[x] = y
+				placed_rows.append(y)
+		self.version += 1
+		self.changed_rows = range(min(placed_rows), max(placed_rows) + 1) if placed_rows else range(0)
+
+	def clear_rows(self, rows):
+		"""
+    Removes the full rows among the given row indexes and moves the rows above them down.
+    Only the rows from the top of the stack down to the lowest cleared row change,
+    so the work doesn't grow with the empty rows above the stack or the rows below the clear.
+
+    Args:
+        rows (iterable): The row indexes to check, usually the rows a Tetromino was just placed in.
+
+    Returns:
+        int: The number of rows cleared.
+    """
+		full_rows = sorted((y for y in set(rows) if 0 <= y < self.height and self.rows[y] == self.full_row), reverse = True)
+		num_lines = len(full_rows)
+		if not num_lines:
+			return 0
+
+		# rows above the top of the stack are empty before and after the clear
+		moved_rows = range(min(self.heights), full_rows[0] + 1)
+		keys = self.cell_keys
+		for y in moved_rows:
+			self.hash ^= row_hash(y, self.rows[y], keys)
+
+		self.rows[moved_rows.start:moved_rows.stop] = (
+			[0] * num_lines + [row for y, row in zip(moved_rows, self.rows[moved_rows.start:moved_rows.stop]) if y not in full_rows])
+		self.field_data[moved_rows.start:moved_rows.stop] = (
+			[[0] * self.width for y in range(num_lines)]
+			+ [row for y, row in zip(moved_rows, self.field_data[moved_rows.start:moved_rows.stop]) if y not in full_rows])
+		self.clear_cells(full_rows, moved_rows)
+		self.update_heights(full_rows)
+
+		for y in moved_rows:
+			self.hash ^= row_hash(y, self.rows[y], keys)
+		self.version += 1
+		self.changed_rows = moved_rows
+		return num_lines
+
+	def clear_cells(self, cleared_rows, moved_rows):
+		"""
+    Removes rows from the cell bytes. The moved rows are rewritten at the same length,
+    since a bytearray can't be resized while views of it exist.
+
+    Args:
+        cleared_rows (list): The row indexes that were removed.
+        moved_rows (range): The rows that change, from the top of the stack down to the lowest cleared row.
+
+    Returns:
+        None
+    """
+		cells = self.cells
+		width = self.width
+		kept = b''.join(cells[y * width:(y + 1) * width] for y in moved_rows if y not in cleared_rows)
+		cells[moved_rows.start * width:moved_rows.stop * width] = bytes(len(cleared_rows) * width) + kept
+
+	def add_garbage(self, lines, hole):
+		"""
+    Pushes the field up and fills the bottom rows with garbage, full except for one hole column.
+    Only the rows from the top of the stack down change, as with clear_rows.
+
+    Args:
+        lines (int): The number of garbage rows.
+        hole (int): The empty column of the garbage rows.
+
+    Returns:
+        bool: True if placed blocks were pushed out of the top of the field; otherwise, False.
+    """
+		lines = min(lines, self.height)
+		width = self.width
+		top = min(self.heights)
+		overflow = top < lines
+		moved_rows = range(max(top - lines, 0), self.height)
+		keys = self.cell_keys
+		for y in moved_rows:
+			self.hash ^= row_hash(y, self.rows[y], keys)
+
+		garbage_row = self.full_row & ~(1 << hole)
+		garbage_cells = bytes(0 if x == hole else GARBAGE_CODE for x in range(width))
+		start, stop = moved_rows.start, self.height
+		self.rows[start:stop] = self.rows[start + lines:stop] + [garbage_row] * lines
+		self.field_data[start:stop] = (
+			self.field_data[start + lines:stop] + [[0 if x == hole else GARBAGE for x in range(width)] for y in range(lines)])
+		self.cells[start * width:stop * width] = self.cells[(start + lines) * width:stop * width] + garbage_cells * lines
+
+		# blocks pushed out of the top leave columns whose top cell is unknown
+		if overflow:
+			for x in range(width):
+				bit = 1 << x
+				height = 0
+				while height < self.height and not self.rows[height] & bit:
+					height += 1
+				self.heights[x] = height
+		else:
+			# an empty hole column stays empty, every other column rises by the garbage
+			self.heights[:] = [
+				height if x == hole and height == self.height else height - lines
+				for x, height in enumerate(self.heights)]
+
+		for y in moved_rows:
+			self.hash ^= row_hash(y, self.rows[y], keys)
+		self.version += 1
+		self.changed_rows = moved_rows
+		return overflow
+
+	def load_cells(self, cells):
+		"""
+    Replaces the whole field with cell bytes, such as from a snapshot, and rebuilds the rows,
+    field_data and heights from them. The lists and the bytearray are changed in place.
+    Loading the cells the field already has keeps its version, so renderers don't redraw it.
+
+    Args:
+        cells (bytes): One SHAPE_CODES byte per cell, row by row.
+
+    Returns:
+        None
+    """
+		changed = self.cells != cells
+		width = self.width
+		self.cells[:] = cells
+		empty_row = bytes(width)
+		for y in range(self.height):
+			row = cells[y * width:(y + 1) * width]
+			if row == empty_row:
+				self.field_data[y] = [0] * width
+				self.rows[y] = 0
+			else:
+				self.field_data[y] = [CODE_SHAPES[code] for code in row]
+				self.rows[y] = int(row.translate(BIT_DIGITS)[::-1], 2)
+
+		for x in range(width):
+			top = cells[x::width].translate(BIT_DIGITS).find(b'1')
+			self.heights[x] = self.height if top < 0 else top
+		self.hash = board_hash(self.rows, self.cell_keys)
+		if changed:
+			self.version += 1
+			self.changed_rows = range(self.height)
+
+	def update_heights(self, cleared_rows):
+		"""
+    Moves the column heights down after rows were cleared. A column whose top cell was cleared
+    is scanned downwards from its old height, since everything above it is still empty.
+
+    Args:
+        cleared_rows (list): The row indexes that were removed, before the removal.
+
+    Returns:
+        None
+    """
+		for x, height in enumerate(self.heights):
+			if height in cleared_rows:
+				bit = 1 << x
+				while height < self.height and not self.rows[height] & bit:
+					height += 1
+				self.heights[x] = height
+			else:
+				self.heights[x] = height + sum(1 for y in cleared_rows if y > height)
+
+	def drop_distance(self, blocks):
+		"""
+    Finds how many rows the given cells can fall before landing, using the column heights.
+    If a cell is already below the surface of its column, the cells are stepped down instead.
+
+    Args:
+        blocks (list): A list of (x, y) cells to drop.
+
+    Returns:
+        int: The number of rows the cells can fall.
+    """
+		heights = self.heights
+		distance = self.height
+		for x, y in blocks:
+			if y >= heights[x]:
+				return self.step_distance(blocks)
+			if heights[x] - 1 - y < distance:
+				distance = heights[x] - 1 - y
+		return distance
+
+	def step_distance(self, blocks):
+		"""
+    Finds how many rows the given cells can fall by checking each row on the way down.
+
+    Args:
+        blocks (list): A list of (x, y) cells to drop.
+
+    Returns:
+        int: The number of rows the cells can fall.
+    """
+		distance = 0
+		while not self.collide([(x, y + distance + 1) for x, y in blocks]):
+			distance += 1
+		return distance
@@ -0,0 +1,384 @@
+from operator import sub
+from .settings import *
+from .tetrominos import ROTATIONS
+from .controls import LEFT, RIGHT, ROTATE, DROP
+from .zobrist import SHAPE_KEYS, TranspositionTable, cell_keys, row_hash, board_hash
+
+# weights for the default heuristic, tuned for lines over survival
+DEFAULT_WEIGHTS = {'lines': 0.760666, 'holes': -0.35663, 'height': -0.510066, 'bumpiness': -0.184483}
+
+# simulation steps the bot keeps pressing without the Tetromino moving before it drops it where it is
+STALL_STEPS = 30
+
+# (field, shape) pairs whose list of placements is kept, each list holds a few dozen fields
+EXPANSION_TABLE_SIZE = 1024
+
+def build_placements(shape, columns = COLUMNS):
+	"""
+    Precomputes what the bot needs to place a shape in each distinct rotation: the row masks
+    of the blocks, the lowest block in each column and the pivot columns that fit in the field.
+
+    Args:
+        shape (str): The type of Tetromino (e.g., 'I', 'O', 'T', etc.).
+        columns (int, optional): The width of the field. Defaults to COLUMNS.
+
+    Returns:
+        list: (rotation, row masks, column bottoms, first pivot column, last pivot column) for each rotation.
+    """
+	placements = []
+	seen = set()
+	for rotation, offsets in enumerate(ROTATIONS[shape]):
+		offsets = tuple(sorted(offsets))
+		if offsets in seen:
+			continue
+		seen.add(offsets)
+
+		min_dx = min(dx for dx, dy in offsets)
+		max_dx = max(dx for dx, dy in offsets)
+
+		# (dy, mask) with bit 0 standing for column min_dx
+		row_masks = {}
+		for dx, dy in offsets:
+			row_masks[dy] = row_masks.get(dy, 0) | 1 << (dx - min_dx)
+
+		# (dx, lowest dy) for each column of the shape
+		bottoms = {}
+		for dx, dy in offsets:
+			bottoms[dx] = max(dy, bottoms.get(dx, dy))
+
+		placements.append((rotation, tuple(row_masks.items()), tuple(bottoms.items()), -min_dx, columns - 1 - max_dx))
+	return placements
+
+# placements for every shape, built once for each field width in use
+PLACEMENTS = {shape: build_placements(shape) for shape in TETROMINOS}
+_placements = {COLUMNS: PLACEMENTS}
+
+def width_placements(columns):
+	"""
+    Gets the placements of every shape for a field width.
+
+    Args:
+        columns (int): The width of the field.
+
+    Returns:
+        dict: The result of build_placements for each shape.
+    """
+	placements = _placements.get(columns)
+	if placements is None:
+		placements = _placements[columns] = {shape: build_placements(shape, columns) for shape in TETROMINOS}
+	return placements
+
+def board_features(rows, columns = COLUMNS):
+	"""
+    Measures a field given as row bitmasks.
+
+    Args:
+        rows (list): One bitmask per row, from the top.
+        columns (int, optional): The width of the field. Defaults to COLUMNS.
+
+    Returns:
+        tuple: The top filled row of each column (the number of rows when empty), the number of holes,
+        the aggregate height and the bumpiness of the columns.
+    """
+	tops = [len(rows)] * columns
+	seen = 0
+	holes = 0
+
+	# the rows above the stack are empty and change nothing, found in C as the first occurrence of the first filled row
+	first = next(filter(None, rows), 0)
+	for y in range(rows.index(first) if first else len(rows), len(rows)):
+		row = rows[y]
+		new = row & ~seen
+		while new:
+			bit = new & -new
+			tops[bit.bit_length() - 1] = y
+			new ^= bit
+		seen |= row
+		holes += (seen & ~row).bit_count()
+
+	height = columns * len(rows) - sum(tops)
+	bumpiness = sum(map(abs, map(sub, tops, tops[1:])))
+	return tuple(tops), holes, height, bumpiness
+
+def weighted_score(lines, holes, height, bumpiness, weights = DEFAULT_WEIGHTS):
+	"""
+    The default heuristic, a weighted sum of the field measurements. Higher is better.
+
+    Args:
+        lines (int): The number of lines cleared on the way to this field.
+        holes (int): The number of empty cells with a filled cell above them.
+        height (int): The sum of the column heights.
+        bumpiness (int): The sum of the height differences between neighbouring columns.
+        weights (dict, optional): The weight of each measurement. Defaults to DEFAULT_WEIGHTS.
+
+    Returns:
+        float: The score of the field.
+    """
+	return (weights['lines'] * lines + weights['holes'] * holes
+		+ weights['height'] * height + weights['bumpiness'] * bumpiness)
+
+def drop_shape(rows, tops, shape, key, columns = COLUMNS):
+	"""
+    Lists every field reachable by dropping a shape straight down in each rotation and column.
+    Placements that would leave a block above the field are left out.
+
+    Args:
+        rows (list): One bitmask per row, from the top.
+        tops (list): The top filled row of each column.
+        shape (str): The type of Tetromino to drop.
+        key (int): The Zobrist hash of the rows, updated with the placed cells for each new field.
+        columns (int, optional): The width of the field. Defaults to COLUMNS.
+
+    Returns:
+        list: (rotation, pivot column, new rows, lines cleared, new hash) for each placement.
+    """
+	full_row = (1 << columns) - 1
+	keys = cell_keys(columns, len(rows))
+	results = []
+	for rotation, row_masks, bottoms, first_x, last_x in width_placements(columns)[shape]:
+		for x in range(first_x, last_x + 1):
+			# the pivot row where the first block lands
+			y = min(tops[x + dx] - 1 - dy for dx, dy in bottoms)
+			if y + min(dy for dy, mask in row_masks) < 0:
+				continue
+
+			new_rows = list(rows)
+			new_key = key
+			shift = x - first_x
+			for dy, mask in row_masks:
+				new_rows[y + dy] |= mask << shift
+				new_key ^= row_hash(y + dy, mask << shift, keys)
+
+			# clear full rows, the rows move so the hash starts over. Only the rows the shape went into can have filled up,
+			# so the whole field is only scanned when one did
+			lines = 0
+			if any(new_rows[y + dy] == full_row for dy, mask in row_masks):
+				remaining = [row for row in new_rows if row != full_row]
+				lines = len(rows) - len(remaining)
+				new_rows = [0] * lines + remaining
+				new_key = board_hash(new_rows, keys)
+
+			# cached as tuples, which the garbage collector stops scanning, so big caches don't cause pauses
+			results.append((rotation, x, tuple(new_rows), lines, new_key))
+	return results
+
+class Bot:
+	def __init__(self, engine, evaluate = weighted_score, lookahead = 3, beam_width = 4, table = None):
+		"""
+    Initializes a bot that picks a placement for each Tetromino by trying every rotation and column,
+    looking ahead over the preview queue, and then presses buttons to get there.
+
+    Args:
+        engine (Engine): The engine the bot plays.
+        evaluate (function, optional): Heuristic called with (lines, holes, height, bumpiness), higher is better. Defaults to weighted_score.
+        lookahead (int, optional): How many preview pieces to look ahead over. Defaults to 3.
+        beam_width (int, optional): How many of the best fields are kept at each lookahead depth. Defaults to 4.
+        table (TranspositionTable, optional): Cache of field measurements by hash, can be shared between bots. Defaults to None for a new one.
+
+    Returns:
+        None
+    """
+		self.engine = engine
+		self.columns = engine.board.width
+		self.evaluate = evaluate
+		self.lookahead = lookahead
+		self.beam_width = beam_width
+		self.table = table or TranspositionTable()
+		self.expansions = TranspositionTable(EXPANSION_TABLE_SIZE)
+
+		# plan for the current Tetromino, and the search for it while it is spread over several steps
+		self.tetromino = None
+		self.target = None
+		self.planning = None
+		self.last_position = None
+		self.stalled = 0
+
+		# button pressed on the last step
+		self.buttons = 0
+
+	def reachable(self, tetromino, rotation, x):
+		"""
+    Checks if the Tetromino can be rotated where it is and then moved sideways to a column without collisions.
+
+    Args:
+        tetromino (Tetromino): The falling Tetromino.
+        rotation (int): The target rotation.
+        x (int): The target pivot column.
+
+    Returns:
+        bool: True if the placement can be reached; otherwise, False.
+    """
+		board = tetromino.board
+		y = tetromino.y
+		step = 1 if x >= tetromino.x else -1
+		for column in range(tetromino.x, x + step, step):
+			if board.collide(tetromino.cells(column, y, rotation)):
+				return False
+		return True
+
+	def features(self, rows, key):
+		"""
+    Measures a field, or looks the measurements up in the transposition table.
+
+    Args:
+        rows (list): One bitmask per row, from the top.
+        key (int): The Zobrist hash of the rows.
+
+    Returns:
+        tuple: The result of board_features.
+    """
+		features = self.table.get(key)
+		if features is None:
+			features = board_features(rows, self.columns)
+			self.table.put(key, features)
+		return features
+
+	def expand(self, rows, tops, shape, key):
+		"""
+    Lists the placements of a shape on a field, or looks them up if the same field and shape were expanded before,
+    which happens when the next search starts from a field the last one looked ahead to.
+
+    Args:
+        rows (list): One bitmask per row, from the top.
+        tops (list): The top filled row of each column.
+        shape (str): The type of Tetromino to drop.
+        key (int): The Zobrist hash of the rows.
+
+    Returns:
+        list: The result of drop_shape.
+    """
+		expansion_key = key ^ SHAPE_KEYS[shape]
+		placements = self.expansions.get(expansion_key)
+		if placements is None:
+			placements = drop_shape(rows, tops, shape, key, self.columns)
+			self.expansions.put(expansion_key, placements)
+		return placements
+
+	def search_steps(self, rows, shapes, tetromino = None, key = None):
+		"""
+    Runs the beam search for the best first placement over the given shapes, pausing whenever it has done
+    BOT_SEARCH_WORK work, so a search on a big field can be spread over several simulation steps.
+    Fields reached by different orders of placements are only kept once, with the best score.
+
+    Args:
+        rows (list): One bitmask per row, from the top.
+        shapes (list): The shapes to place, the falling one first.
+        tetromino (Tetromino, optional): The falling Tetromino, to check that its placements can be reached. Defaults to None.
+        key (int, optional): The Zobrist hash of the rows. Defaults to None to hash them here.
+
+    Returns:
+        generator: Yields None at each pause and returns the (rotation, pivot column) of the best first placement,
+        or None if nothing fits.
+    """
+		key = board_hash(rows, cell_keys(self.columns, len(rows))) if key is None else key
+		tops = self.features(rows, key)[0]
+		beam = [(0, rows, tops, 0, None, key)]
+
+		# work done since the last pause, each field tried costs its rows and columns
+		work = 0
+		field_work = len(rows) + self.columns
+
+		for depth, shape in enumerate(shapes):
+			candidates = {}
+			for score, rows, tops, total_lines, first, key in beam:
+				for rotation, x, new_rows, lines, new_key in self.expand(rows, tops, shape, key):
+					if depth == 0 and tetromino and not self.reachable(tetromino, rotation, x):
+						continue
+					new_tops, holes, height, bumpiness = self.features(new_rows, new_key)
+					score = self.evaluate(total_lines + lines, holes, height, bumpiness)
+					if new_key not in candidates or score > candidates[new_key][0]:
+						candidates[new_key] = (score, new_rows, new_tops, total_lines + lines, first or (rotation, x), new_key)
+
+					work += field_work
+					if work >= BOT_SEARCH_WORK:
+						yield
+						work = 0
+
+			if not candidates:
+				break
+			beam = sorted(candidates.values(), key = lambda candidate: candidate[0], reverse = True)[:self.beam_width]
+
+		return beam[0][4]
+
+	def plan_steps(self):
+		"""
+    Starts the search for the best placement of the engine's falling Tetromino, to be run a step at a time.
+
+    Args:
+        None
+
+    Returns:
+        generator: The result of search_steps.
+    """
+		tetromino = self.engine.tetromino
+		shapes = [tetromino.shape] + self.engine.next_shapes[:self.lookahead]
+		return self.search_steps(list(self.engine.board.rows), shapes, tetromino, self.engine.board.hash)
+
+	def needs_plan(self):
+		"""
+    Checks if a new Tetromino appeared or the search for its placement isn't done, so the next step runs the search.
+
+    Args:
+        None
+
+    Returns:
+        bool: True if the next step plans a placement; otherwise, False.
+    """
+		return self.engine.tetromino is not self.tetromino or self.planning is not None
+
+	def get_buttons(self):
+		"""
+    Decides which buttons to hold on this simulation step to move the Tetromino to its planned placement.
+    The controls act on presses, so a button is tapped: held for one step and let go for the next.
+
+    Args:
+        None
+
+    Returns:
+        int: A bitmask of the held buttons.
+    """
+		buttons = self.next_button()
+		if buttons == self.buttons:
+			buttons = 0
+		self.buttons = buttons
+		return buttons
+
+	def next_button(self):
+		"""
+    Picks the button that brings the Tetromino closest to its planned placement, planning one for a new Tetromino.
+    While the search is spread over several steps, nothing is pressed and the Tetromino keeps falling.
+
+    Args:
+        None
+
+    Returns:
+        int: The button.
+    """
+		tetromino = self.engine.tetromino
+		if tetromino is not self.tetromino:
+			self.tetromino = tetromino
+			self.planning = self.plan_steps()
+			self.stalled = 0
+		if self.planning:
+			try:
+				next(self.planning)
+				return 0
+			except StopIteration as done:
+				self.target = done.value
+				self.planning = None
+
+		# give up on a placement the Tetromino can't get to
+		position = (tetromino.x, tetromino.rotation)
+		self.stalled = self.stalled + 1 if position == self.last_position else 0
+		self.last_position = position
+		if not self.target or self.stalled > STALL_STEPS:
+			return DROP
+
+		rotation, x = self.target
+		if tetromino.rotation != rotation:
+			return ROTATE
+		if tetromino.x < x:
+			return RIGHT
+		if tetromino.x > x:
+			return LEFT
+		return DROP
@@ -0,0 +1,37 @@
+class VirtualClock:
+	def __init__(self, start_time = 0):
+		"""
+    Initializes a simulation clock that only moves forward when it is advanced,
+    so games run the same way no matter how fast frames are drawn.
+
+    Args:
+        start_time (float, optional): The starting time in milliseconds. Defaults to 0.
+
+    Returns:
+        None
+    """
+		self.time = start_time
+
+	def get_ticks(self):
+		"""
+    Gets the current simulation time.
+
+    Args:
+        None
+
+    Returns:
+        float: The time in milliseconds.
+    """
+		return self.time
+
+	def advance(self, amount):
+		"""
+    Moves the simulation time forward.
+
+    Args:
+        amount (float): The number of milliseconds to move forward.
+
+    Returns:
+        None
+    """
+		self.time += amount
@@ -1,75 +1,255 @@
 import pygame
-from os.path import join
+from functools import partial
+from random import Random
 from .settings import *
-from pygame.time import get_ticks
-from .game import Game
-from .preview import Preview
-from .score import Score
-from .tetrominos import TETROMINOS
-from .timer import Timer
-from random import choice
+from .text import render_text, get_font
+from .clock import VirtualClock
+from .timer import Scheduler
+from .keyboard import KEY_BUTTONS, PLAYER_KEYS, MATCH_KEYS
+from .zobrist import TranspositionTable
+from .bot import EXPANSION_TABLE_SIZE
+from .engine import send_garbage
+from .network import Prediction, split_state
+from .stream import StreamWriter
+from .Game import Game, fit_block_size
+from .Preview import Preview
+from .Score import Score
 
 
 class Controller:
-    def __init__(self):
+    def __init__(self, replay = None, speed = 1, bot = False, profiler = None, profile_path = None, columns = COLUMNS, rows = ROWS,
+        boards = 1, players = 1, network = None, stream_path = None):
         """
     Initializes the main game controller, setting up components, state, and the game window.
+    Several boards share the window, the simulation clock and its timer scheduler: up to two are shown side by side
+    with their own sidebars for a versus match, where clearing lines sends garbage to the next board, and more are laid
+    out as a wall with the score below each board.
+    With a network client, the match is played on a server: the boards come from the server's states,
+    and the player's own board is simulated ahead of them with the keyboard and corrected when the server disagrees.
+    With a stream path, the changes of every board of a local game are written to a stream file for spectators.
 
     Args:
-        None
+        replay (Replay, optional): A recorded game to play back instead of a new game. Defaults to None.
+        speed (float, optional): How many times faster than real time the game runs. Defaults to 1.
+        bot (bool, optional): Whether the bot plays instead of the keyboard. Defaults to False.
+        profiler (Profiler, optional): Times each stage of every frame, F3 shows the times. Defaults to None for no timing.
+        profile_path (str, optional): The file the profiler's times are written to on exit. Defaults to None.
+        columns (int, optional): The width of the field. Defaults to COLUMNS.
+        rows (int, optional): The height of the field. Defaults to ROWS.
+        boards (int, optional): The number of games played at once. Defaults to 1.
+        players (int, optional): The number of boards played from the keyboard, up to two, the bot plays the others.
+            Defaults to 1.
+        network (NetworkClient, optional): A connection to a server to play a match on. Defaults to None for a local game.
+        stream_path (str, optional): The file the boards are streamed to, across restarts. Defaults to None for no stream.
 
     Returns:
         None
     """
         # General setup
         pygame.init()
-        self.display_surface = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
         self.clock = pygame.time.Clock()
         pygame.display.set_caption('Tetris')
 
-        # Shapes
-        self.next_shapes = [choice(list(TETROMINOS.keys())) for shape in range(3)]
+        # Playback
+        self.replay = replay
+        self.speed = speed
+        self.bot = bot
+        if replay:
+            columns, rows = replay.columns, replay.rows
+        self.columns = columns
+        self.rows = rows
+        self.boards = boards
+        self.players = 0 if bot or replay else min(players, len(PLAYER_KEYS), boards)
 
-        # Components
-        self.game = Game(self.get_next_shape, self.update_score)
-        self.score = Score()
-        self.preview = Preview()
+        # Networked match, set up by the server
+        self.network = network
+        if network:
+            network.wait_welcome()
+            self.columns, self.rows, self.boards, self.players = network.columns, network.rows, network.players, 1
+
+        # Window, made once for all boards
+        window_size, self.layout = self.layout_boards()
+        self.display_surface = pygame.display.set_mode(window_size)
+
+        # Components of each board, the wall has no previews
+        self.scores = [Score(score_rect, font_size) for area, score_rect, preview_rect, font_size in self.layout]
+        self.previews = [preview_rect and Preview(preview_rect) for area, score_rect, preview_rect, font_size in self.layout]
+        self.score = self.scores[0]
+        self.preview = self.previews[0]
+
+        # Profiling, the overlay is remade every PROFILE_OVERLAY_FRAMES frames
+        self.profiler = profiler
+        self.profile_path = profile_path
+        self.show_profile = False
+        self.profile_surface = None
+
+        # Caches of the bots on several boards, shared so there is one copy to fill and for the garbage collector
+        # to scan instead of one for each board
+        self.bot_table = TranspositionTable()
+        self.bot_expansions = TranspositionTable(EXPANSION_TABLE_SIZE)
+
+        # Spectator stream, made by the first game and moved to the games of each restart
+        self.stream_path = stream_path
+        self.stream = None
+
+        # Games, with the simulation clock and scheduler they share
+        self.start_games()
 
         # Game state
         self.paused = False
 
-        # Font for the pause menu
-        self.font = pygame.font.Font(join('final-project', 'assets','font','NotoSans-Regular.ttf'), 40)
+        # Nobody sees a minimized window, so bot games and replays wait for it to come back
+        self.minimized = False
+
+        # Screen shown on the last frame, the whole window is redrawn when it changes
+        self.screen = None
+
+        # Milliseconds of real time not yet simulated
+        self.accumulator = 0
+
+        # Font size for the pause menu
+        self.font_size = 40
+
+    def layout_boards(self):
+        """
+    Works out the window size and where each board goes. One or two boards get a sidebar each, wider fields
+    getting smaller blocks. More boards are laid out in the grid that fits them in WALL_WIDTH by WALL_HEIGHT
+    with the largest blocks, each board with a strip of STATUS_HEIGHT below it for the score.
+
+    Args:
+        None
+
+    Returns:
+        tuple: The window size, and for each board the area of its field, the rect of its score,
+            the rect of its preview or None, and the font size of its score.
+    """
+        boards, columns, rows = self.boards, self.columns, self.rows
+        layout = []
+        if boards <= 2:
+            game_width = columns * fit_block_size(columns, MAX_GAME_WIDTH // boards)
+            panel_width = game_width + SIDEBAR_WIDTH + PADDING * 3
+            for i in range(boards):
+                right = (i + 1) * panel_width - PADDING
+                preview_rect = pygame.Rect(0, 0, SIDEBAR_WIDTH, GAME_HEIGHT * PREVIEW_HEIGHT)
+                preview_rect.topright = (right, PADDING)
+                score_rect = pygame.Rect(0, 0, SIDEBAR_WIDTH, GAME_HEIGHT * SCORE_HEIGHT - PADDING)
+                score_rect.bottomright = (right, WINDOW_HEIGHT - PADDING)
+                layout.append((pygame.Rect(i * panel_width + PADDING, PADDING, game_width, GAME_HEIGHT), score_rect, preview_rect, 30))
+            return (panel_width * boards, WINDOW_HEIGHT), layout
+
+        # the grid with the largest blocks, taller fields scroll
+        grids = []
+        for grid_columns in range(1, boards + 1):
+            grid_rows = -(-boards // grid_columns)
+            cell_width = (WALL_WIDTH - PADDING) // grid_columns - PADDING
+            cell_height = (WALL_HEIGHT - PADDING) // grid_rows - PADDING * 3 // 2 - STATUS_HEIGHT
+            block_size = max(MIN_BLOCK_SIZE, min(BLOCK_SIZE, cell_width // columns, cell_height // rows))
+            grids.append((block_size, grid_rows, grid_columns, cell_height))
+        block_size, grid_rows, grid_columns, cell_height = max(grids, key = lambda grid: (grid[0], -grid[1]))
 
-    def update_score(self, lines, score, level):
+        game_width = columns * block_size
+        game_height = min(rows, max(cell_height // block_size, 1)) * block_size
+        pitch_x = game_width + PADDING
+        pitch_y = game_height + PADDING // 2 + STATUS_HEIGHT + PADDING
+        for i in range(boards):
+            x = PADDING + i % grid_columns * pitch_x
+            y = PADDING + i // grid_columns * pitch_y
+            score_rect = pygame.Rect(x, y + game_height + PADDING // 2, game_width, STATUS_HEIGHT)
+            layout.append((pygame.Rect(x, y, game_width, game_height), score_rect, None, STATUS_FONT_SIZE))
+        return (PADDING + grid_columns * pitch_x, PADDING + grid_rows * pitch_y), layout
+
+    def start_games(self):
         """
-    Updates the score, level, and lines displayed in the score component.
+    Creates a new game for each board, on a new simulation clock and scheduler shared by all of them.
+    The boards of a versus match get the same shapes, the boards of a wall different ones.
+    Only a single keyboard board or a played back replay can undo: on several boards, taking back a clear
+    would keep the garbage it sent.
 
     Args:
-        lines (int): The number of lines cleared.
-        score (int): The current score.
-        level (int): The current level.
+        None
 
     Returns:
         None
     """
-        self.score.lines = lines
-        self.score.score = score
-        self.score.level = level
+        if self.network:
+            self.start_network_games()
+            return
+
+        self.simulation_clock = VirtualClock()
+        self.scheduler = Scheduler(self.simulation_clock)
+        seed = None if self.boards == 1 else Random().getrandbits(32)
+
+        self.games = []
+        for i, (area, score_rect, preview_rect, font_size) in enumerate(self.layout):
+            game = Game(
+                self.scores[i].update,
+                seed if self.boards <= 2 else seed + i,
+                replay = self.replay,
+                bot = i >= self.players,
+                columns = self.columns,
+                rows = self.rows,
+                area = area,
+                key_buttons = PLAYER_KEYS[i] if i < self.players else KEY_BUTTONS,
+                clock = self.simulation_clock,
+                scheduler = self.scheduler,
+                undo_limit = UNDO_LIMIT if self.boards == 1 and (i < self.players or self.replay) else 0)
+            game.profiler = self.profiler
+            if self.boards > 1 and game.bot:
+                game.bot.table = self.bot_table
+                game.bot.expansions = self.bot_expansions
+            self.games.append(game)
+        self.game = self.games[0]
+
+        # clearing lines sends garbage to the other boards
+        engines = [game.engine for game in self.games]
+        if self.boards > 1:
+            for engine in engines:
+                engine.on_clear = partial(send_garbage, engines, engine)
+
+        if self.stream:
+            self.stream.attach(engines)
+        elif self.stream_path:
+            self.stream = StreamWriter(engines, open(self.stream_path, 'wb'))
 
-    def get_next_shape(self):
+        # board going first on the next step
+        self.turn = 0
+
+    def start_network_games(self):
         """
-    Retrieves the next Tetromino shape and updates the preview queue.
+    Creates a game for each board of a networked match, each on its own simulation clock. The other players' boards
+    are only ever put in the states from the server, and the player's own board is stepped ahead of them.
+    Like the server's, the boards can't undo.
 
     Args:
         None
 
     Returns:
-        str: The identifier for the next Tetromino shape.
+        None
     """
-        next_shape = self.next_shapes.pop(0)
-        self.next_shapes.append(choice(list(TETROMINOS.keys())))
-        return next_shape
+        network = self.network
+        self.games = []
+        for i, (area, score_rect, preview_rect, font_size) in enumerate(self.layout):
+            game = Game(self.scores[i].update, network.seed, columns = self.columns, rows = self.rows, area = area,
+                key_buttons = MATCH_KEYS, undo_limit = 0)
+            game.profiler = self.profiler
+            self.games.append(game)
+        self.game = self.games[network.player]
+        self.prediction = Prediction(self.game.engine, self.game.controls)
+
+    def over(self):
+        """
+    Checks if the game has ended: with one board when its game is over, with several when at most one is still playing.
+
+    Args:
+        None
+
+    Returns:
+        bool: True if the game has ended; otherwise, False.
+    """
+        if self.network:
+            return self.network.winner is not None or self.network.closed
+        playing = sum(not game.engine.game_over for game in self.games)
+        return playing == 0 if len(self.games) == 1 else playing <= 1
 
     def draw_pause_menu(self):
         """
@@ -79,33 +259,311 @@ class Controller:
         None
 
     Returns:
-        None
+        list: The rects of the window that changed.
     """
-        pause_text = self.font.render("PAUSED", True, "white")
-        resume_text = self.font.render("Press 'P' to Resume", True, "white")
+        self.display_surface.fill(GRAY)
+        pause_text = render_text("PAUSED", self.font_size, "white")
+        resume_text = render_text("Press 'P' to Resume", self.font_size, "white")
         
-        pause_rect = pause_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 3))
-        resume_rect = resume_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
+        width, height = self.display_surface.get_size()
+        pause_rect = pause_text.get_rect(center=(width // 2, height // 3))
+        resume_rect = resume_text.get_rect(center=(width // 2, height // 2))
         
         self.display_surface.blit(pause_text, pause_rect)
         self.display_surface.blit(resume_text, resume_rect)
-    
+        return [self.display_surface.get_rect()]
+
+    def draw_result(self):
+        """
+    Displays the winner of a game with several boards over the boards, with restart instructions.
+    The last board playing wins, or the highest score if the last boards lost at once.
+    The server decides the winner of a networked match, which can't be restarted.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+        if self.network:
+            winner = self.network.winner
+        else:
+            playing = [i for i, game in enumerate(self.games) if not game.engine.game_over]
+            winner = playing[0] if playing else max(range(len(self.games)), key = lambda i: self.games[i].engine.current_score)
+        result_text = render_text(f"BOARD {winner + 1} WINS" if winner is not None else "DISCONNECTED", self.font_size, "white")
+        restart_text = render_text("Close the Window to Quit" if self.network else "Press R to Restart", self.font_size, "white")
+
+        width, height = self.display_surface.get_size()
+        result_rect = result_text.get_rect(center=(width // 2, height // 2 - self.font_size))
+        restart_rect = restart_text.get_rect(center=(width // 2, height // 2 + self.font_size))
+        box = result_rect.union(restart_rect).inflate(PADDING * 2, PADDING * 2)
+
+        self.display_surface.fill(GRAY, box)
+        pygame.draw.rect(self.display_surface, LINE_COLOR, box, 2, 2)
+        self.display_surface.blit(result_text, result_rect)
+        self.display_surface.blit(restart_text, restart_rect)
+
     def restart_game(self):
         """
-    Restarts the game by reinitializing the game and preview components.
+    Restarts the game by reinitializing the games of all boards.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+        self.save_recording()
+        self.start_games()
+
+    def save_recording(self):
+        """
+    Saves the recording of the current game to the replay folder, unless it is a played back replay or empty.
+    Games on several boards and networked games are not saved, since a recording can't play back
+    the garbage the other boards sent or the server's corrections.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+        if self.boards == 1 and not self.replay and not self.network and self.game.recording.ticks:
+            self.game.recording.save()
+
+    def update_simulation(self, frame_time):
+        """
+    Advances the game in fixed steps of TICK_TIME milliseconds to catch up with the real time
+    that passed. Any time left over is kept for the next frame.
+
+    Args:
+        frame_time (float): The milliseconds of real time since the last frame.
+
+    Returns:
+        float: How far the current frame is between the last step and the next one, from 0 to 1.
+    """
+        if self.network:
+            return self.update_network()
+        if self.paused or self.over():
+            self.accumulator = 0
+            return 1
+
+        # don't try to catch up on long stalls
+        self.accumulator += min(frame_time, MAX_FRAME_TIME) * self.speed
+        steps = 0
+        while self.accumulator >= TICK_TIME and not self.over():
+            steps += self.step()
+            self.accumulator -= TICK_TIME
+
+        # one stream frame for all the steps of a frame
+        if self.stream and steps:
+            self.stream.write_frame(steps)
+        return self.accumulator / TICK_TIME
+
+    def step(self):
+        """
+    Advances every game still playing by one simulation step: each applies its buttons, then the shared clock
+    is advanced once and the shared scheduler fires the timers of all of them. Only BOT_PLANS_PER_STEP bots
+    may search for a placement on one step, so a wall of bots doesn't stall frames when many pieces land at once.
 
     Args:
         None
 
     Returns:
+        bool: True if the clock advanced; otherwise, False.
+    """
+        # the boards take turns going first, so the planning budget is shared fairly
+        games = self.games[self.turn:] + self.games[:self.turn]
+        self.turn = (self.turn + 1) % len(self.games)
+
+        stepped = False
+        plans = BOT_PLANS_PER_STEP
+        for game in games:
+            if game.engine.game_over:
+                continue
+
+            # bots over the budget think on a later step, while their Tetromino keeps falling
+            if game.bot and game.bot.needs_plan():
+                if not plans:
+                    continue
+                plans -= 1
+            if game.update(advance = False):
+                stepped = True
+
+        # the clock stops with a played back replay that ended
+        if stepped:
+            self.simulation_clock.advance(TICK_TIME)
+            self.scheduler.update()
+            if self.profiler:
+                self.profiler.lap('rules')
+        return stepped
+
+    def update_network(self):
+        """
+    Puts the boards of a networked match in the states that came from the server, correcting the player's own board
+    if it was predicted wrong, then steps the player's board with the keyboard until it is ahead of the server
+    by the round trip time and INPUT_LEAD_TICKS, sending the buttons of each step. At most MAX_FRAME_TIME
+    milliseconds of steps are caught up on in one frame, the server's states catch the board up after longer stalls.
+
+    Args:
         None
+
+    Returns:
+        float: 1, the boards are drawn where they are.
     """
-        self.game = Game(self.get_next_shape, self.update_score)
-        self.next_shapes = [choice(list(TETROMINOS.keys())) for shape in range(3)]
+        network = self.network
+        prediction = self.prediction
+
+        # only the latest state of each board is kept
+        for board, tick in dict(network.poll()).items():
+            if board == network.player:
+                prediction.reconcile(tick, network.states[board])
+            else:
+                engine_snapshot, controls_snapshot = split_state(network.states[board])
+                self.games[board].engine.restore(engine_snapshot)
+                self.games[board].controls.restore(controls_snapshot)
+
+        # a board predicted to lose that the server kept playing goes back to its field
+        for game in self.games:
+            if game.game_over_drawn and not game.engine.game_over:
+                game.game_over_drawn = False
+                game.needs_redraw = True
+        if self.over():
+            return 1
+
+        game = self.game
+        target = min(network.target_tick(), prediction.tick + MAX_FRAME_TIME // TICK_TIME)
+        while prediction.tick < target and not game.engine.game_over:
+            tick = prediction.tick
+            game.update()
+            network.send_input(tick, game.recording.buttons)
+            prediction.stepped(game.recording.buttons)
+        return 1
+
+    def run_frame(self, alpha = 1):
+        """
+    Draws one frame of the current screen. The pause and game over screens are
+    only drawn when they are entered, and the whole window is only redrawn when the screen changes.
+    All boards are drawn into the window in one pass and their changed rects are returned together.
+
+    Args:
+        alpha (float, optional): How far the frame is between the last simulation step and the next one. Defaults to 1.
+
+    Returns:
+        list: The rects of the window that changed.
+    """
+        if self.paused:
+            screen = 'paused'
+        elif self.over():
+            screen = 'game over' if len(self.games) == 1 and not self.network else 'result'
+        else:
+            screen = 'game'
+        redraw = screen != self.screen
+        self.screen = screen
+
+        if screen == 'paused':
+            # Display pause menu
+            return self.draw_pause_menu() if redraw else []
+        if screen == 'game over':
+            return self.game.display_game_over() if redraw else []
+        if screen == 'result' and not redraw:
+            return []
+
+        # Normal game rendering
+        if redraw:
+            self.display_surface.fill(GRAY)
+            for component in self.games + self.scores + self.previews:
+                if component:
+                    component.needs_redraw = True
+
+        # Components
+        profiler = self.profiler
+        dirty_rects = []
+        for game in self.games:
+            dirty_rects += game.draw(alpha)
+        if profiler:
+            profiler.lap('draw')
+        for score in self.scores:
+            dirty_rects += score.run()
+        if profiler:
+            profiler.lap('score')
+        for game, preview in zip(self.games, self.previews):
+            if preview:
+                dirty_rects += preview.run(game.engine.next_shapes)
+        if profiler:
+            profiler.lap('preview')
+        if screen == 'result':
+            self.draw_result()
+        if self.show_profile:
+            dirty_rects += self.draw_profile()
+            profiler.lap('overlay')
+
+        if redraw:
+            return [self.display_surface.get_rect()]
+        return dirty_rects
+
+    def draw_profile(self):
+        """
+    Draws the profiler's rolling percentiles of each stage over the top left of the game field.
+    The text is only rendered again every PROFILE_OVERLAY_FRAMES frames.
+
+    Args:
+        None
+
+    Returns:
+        list: The rects of the window that changed.
+    """
+        if self.profile_surface is None or self.profiler.frames % PROFILE_OVERLAY_FRAMES == 0:
+            font = get_font(PROFILE_FONT_SIZE)
+            lines = ['stage  p50 / p95 / p99 ms']
+            for stage, values in self.profiler.rolling().items():
+                lines.append(f'{stage}  ' + ' / '.join(f'{value / 1e6:.2f}' for value in values))
+            line_height = font.get_linesize()
+            size = (max(font.size(line)[0] for line in lines) + PADDING, line_height * len(lines) + PADDING)
+
+            # the box only grows, so it always covers the last one
+            if self.profile_surface:
+                size = (max(size[0], self.profile_surface.get_width()), max(size[1], self.profile_surface.get_height()))
+            self.profile_surface = pygame.Surface(size)
+            self.profile_surface.fill('black')
+            for i, line in enumerate(lines):
+                self.profile_surface.blit(font.render(line, True, 'white'), (PADDING // 2, PADDING // 2 + i * line_height))
+
+        return [self.display_surface.blit(self.profile_surface, (PADDING, PADDING))]
+
+    def save_profile(self):
+        """
+    Writes the profiler's times to the profile file, if profiling.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+        if self.profiler and self.profile_path:
+            self.profiler.save(self.profile_path)
+
+    def idle(self):
+        """
+    Checks if the screen can only change because of an event: while paused, while the window of a local game
+    is minimized, on the game over screen or at the end of a played back replay.
+
+    Args:
+        None
+
+    Returns:
+        bool: True if the loop can wait for events instead of drawing frames; otherwise, False.
+    """
+        playback = self.game.playback
+        # a networked match goes on at the server, so it keeps running while minimized
+        minimized = self.minimized and not self.network
+        return self.paused or minimized or self.over() or bool(playback and playback.done())
 
     def run(self):
         """
     Runs the main game loop, managing events, rendering components, and updating the game state.
+    While idle, the loop sleeps until the next event instead of drawing frames.
 
     Args:
         None
@@ -113,34 +571,66 @@ class Controller:
     Returns:
         None
     """
+        profiler = self.profiler
+        frame_time = 0
         while True:
-            for event in pygame.event.get():
+            # Frames spent waiting for events are not timed
+            idle = self.idle()
+            if profiler and not idle:
+                profiler.begin()
+
+            events = pygame.event.get()
+            if idle and not events:
+                events = [pygame.event.wait()]
+
+            for event in events:
                 if event.type == pygame.QUIT:
+                    self.save_recording()
+                    self.save_profile()
+                    if self.stream:
+                        self.stream.file.close()
                     pygame.quit()
                     exit()
-                elif event.type == pygame.KEYDOWN and event.key == pygame.K_p:
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_p and not self.network:
                     self.paused = not self.paused  # Toggle pause state
-                if self.game.game_over and event.type == pygame.KEYDOWN and event.key == pygame.K_r:
+                    for game in self.games:
+                        game.keyboard.release_all()
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3 and profiler:
+                    self.show_profile = not self.show_profile
+                    self.screen = None  # Redraw everything to clear or show the overlay
+                elif event.type in (pygame.KEYDOWN, pygame.KEYUP):
+                    for game in self.games:
+                        game.keyboard.handle(event)  # Applied on the next simulation step
+                elif event.type in (pygame.WINDOWFOCUSLOST, pygame.WINDOWMINIMIZED):
+                    for game in self.games:
+                        game.keyboard.release_all()  # Key ups go to other windows
+                    if self.players and not self.network:
+                        self.paused = True  # Nobody is playing, so wait on the pause menu
+                    if event.type == pygame.WINDOWMINIMIZED:
+                        self.minimized = True
+                elif event.type == pygame.WINDOWRESTORED:
+                    self.minimized = False
+                    self.screen = None  # Redraw everything once the window can be seen again
+                elif event.type == pygame.WINDOWEXPOSED:
+                    self.screen = None  # Window contents were lost, redraw everything
+                if self.over() and event.type == pygame.KEYDOWN and event.key == pygame.K_r and not self.network:
                     self.restart_game()
 
-            if self.paused:
-                # Display pause menu
-                self.display_surface.fill(GRAY)
-                self.draw_pause_menu()
-            elif self.game.game_over:
-                self.game.display_game_over()
-            else:
-                # Normal game rendering
-                self.display_surface.fill(GRAY)
-
-                # Components
-                self.game.run()
-                self.score.run()
-                self.preview.run(self.next_shapes)
+            if profiler:
+                profiler.lap('events')
 
+            # Simulate in fixed steps, then draw once
+            alpha = self.update_simulation(frame_time)
 
-            # Update the screen
-            pygame.display.update()
-            self.clock.tick(60)
-        
+            # Update only the changed parts of the screen
+            dirty_rects = self.run_frame(alpha)
+            if dirty_rects:
+                pygame.display.update(dirty_rects)
+            if profiler:
+                profiler.lap('display update')
+                profiler.end()
 
+            # The time spent waiting for events is not simulated
+            frame_time = self.clock.tick(60)
+            if idle:
+                frame_time = 0
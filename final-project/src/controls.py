@@ -0,0 +1,152 @@
+import struct
+from .settings import *
+
+# buttons, combined into a bitmask for each simulation step
+LEFT = 1
+RIGHT = 2
+ROTATE = 4
+DOWN = 8
+DROP = 16
+UNDO = 32
+
+# buttons held on the last step, the auto-shift direction and the time of the next automatic move
+CONTROLS_SNAPSHOT = struct.Struct('<Bbd')
+
+class Controls:
+	def __init__(self, engine):
+		"""
+    Initializes the player controls for an engine. Buttons come in as a bitmask each step,
+    so the same input rules work for the keyboard, replays and bots without pygame.
+    Rotating, dropping and undoing happen once per press. Holding left or right moves once,
+    then again after DAS_TIME and every ARR_TIME after that, timed on the simulation clock.
+
+    Args:
+        engine (Engine): The engine the controls move the Tetromino in.
+
+    Returns:
+        None
+    """
+		self.engine = engine
+
+		# buttons held on the last step, to tell presses from holds
+		self.buttons = 0
+
+		# auto-shift
+		self.shift = 0
+		self.shift_time = 0
+
+	def apply(self, buttons):
+		"""
+    Handles player input for movement, rotation, and instant drop.
+
+    Args:
+        buttons (int): A bitmask of the held buttons (LEFT, RIGHT, ROTATE, DOWN, DROP, UNDO).
+
+    Returns:
+        None
+    """
+		pressed = buttons & ~self.buttons
+		self.buttons = buttons
+		now = self.engine.clock.get_ticks()
+
+		# horizontal movement, a new press wins over the direction already held
+		if pressed & LEFT:
+			self.start_shift(-1, now)
+		elif pressed & RIGHT:
+			self.start_shift(1, now)
+		elif self.shift and not buttons & (LEFT if self.shift < 0 else RIGHT):
+			if buttons & (RIGHT if self.shift < 0 else LEFT):
+				self.start_shift(-self.shift, now)
+			else:
+				self.shift = 0
+		elif self.shift:
+			self.auto_shift(now)
+
+		# check for rotation
+		if pressed & ROTATE:
+			self.engine.rotate()
+
+		# down speedup
+		if bool(buttons & DOWN) != self.engine.down_pressed:
+			self.engine.set_down_pressed(bool(buttons & DOWN))
+
+		# instant drop
+		if pressed & DROP:
+			self.engine.instant_drop()
+
+		# take back the last Tetromino
+		if pressed & UNDO:
+			self.engine.undo()
+
+	def start_shift(self, direction, now):
+		"""
+    Moves the Tetromino one column for a new press and starts the delay before it auto-shifts.
+
+    Args:
+        direction (int): -1 for left, 1 for right.
+        now (float): The simulation time.
+
+    Returns:
+        None
+    """
+		self.engine.move_horizontal(direction)
+		self.shift = direction
+		self.shift_time = now + DAS_TIME
+
+	def auto_shift(self, now):
+		"""
+    Moves the Tetromino for a held direction once the delay has passed, as many columns as the repeat rate allows.
+    A repeat time of 0 moves it all the way to the wall.
+
+    Args:
+        now (float): The simulation time.
+
+    Returns:
+        None
+    """
+		if now < self.shift_time:
+			return
+		if ARR_TIME <= 0:
+			for column in range(self.engine.board.width):
+				self.engine.move_horizontal(self.shift)
+			return
+		while self.shift_time <= now:
+			self.engine.move_horizontal(self.shift)
+			self.shift_time += ARR_TIME
+
+	def snapshot(self):
+		"""
+    Packs the state of the controls.
+
+    Args:
+        None
+
+    Returns:
+        bytes: The snapshot.
+    """
+		return CONTROLS_SNAPSHOT.pack(self.buttons, self.shift, self.shift_time)
+
+	def restore(self, data):
+		"""
+    Puts the controls back in the state of a snapshot. The engine's clock should be restored first.
+
+    Args:
+        data (bytes): A snapshot from snapshot.
+
+    Returns:
+        None
+    """
+		self.buttons, self.shift, self.shift_time = CONTROLS_SNAPSHOT.unpack(data)
+
+	def step(self, buttons):
+		"""
+    Advances the game by one fixed simulation step of TICK_TIME milliseconds with the given buttons held.
+
+    Args:
+        buttons (int): A bitmask of the held buttons.
+
+    Returns:
+        None
+    """
+		self.apply(buttons)
+		self.engine.update(TICK_TIME)
@@ -0,0 +1,65 @@
+def encode_varint(value):
+	"""
+    Encodes a non-negative integer in as few bytes as needed, 7 bits per byte
+    with the high bit set on every byte but the last.
+
+    Args:
+        value (int): The integer to encode.
+
+    Returns:
+        bytes: The encoded integer.
+    """
+	data = bytearray()
+	while value > 0x7f:
+		data.append((value & 0x7f) | 0x80)
+		value >>= 7
+	data.append(value)
+	return bytes(data)
+
+def decode_varint(data, pos):
+	"""
+    Decodes an integer written by encode_varint.
+
+    Args:
+        data (bytes): The data to read from.
+        pos (int): The index of the first byte of the integer.
+
+    Returns:
+        tuple: The decoded integer and the index just after it.
+    """
+	value = 0
+	shift = 0
+	while True:
+		byte = data[pos]
+		pos += 1
+		value |= (byte & 0x7f) << shift
+		if not byte & 0x80:
+			return value, pos
+		shift += 7
+
+def encode_signed(value):
+	"""
+    Encodes an integer that can be negative as a varint, zigzagged so small values of either sign stay one byte:
+    0, -1, 1, -2 are written as 0, 1, 2, 3.
+
+    Args:
+        value (int): The integer to encode.
+
+    Returns:
+        bytes: The encoded integer.
+    """
+	return encode_varint(value * 2 if value >= 0 else -value * 2 - 1)
+
+def decode_signed(data, pos):
+	"""
+    Decodes an integer written by encode_signed.
+
+    Args:
+        data (bytes): The data to read from.
+        pos (int): The index of the first byte of the integer.
+
+    Returns:
+        tuple: The decoded integer and the index just after it.
+    """
+	value, pos = decode_varint(data, pos)
+	return (value >> 1) ^ -(value & 1), pos
@@ -0,0 +1,429 @@
+import struct
+from collections import deque
+from random import Random
+from .settings import *
+from .tetrominos import Tetromino
+from .board import Board, SHAPE_CODES, CODE_SHAPES
+from .rng import XorShiftRandom
+from .clock import VirtualClock
+from .timer import Timer, Scheduler
+
+# clock time, generator state, garbage hole generator state, queued garbage lines, game over, fall speed, down pressed, fall timer start and active,
+# score, lines, level, pieces, Tetromino shape, x, y and rotation, preview queue;
+# the board's cell bytes follow
+SNAPSHOT = struct.Struct('<dQQI?d?d?QIIIBhhB3s')
+
+# mixed into the seed for the garbage hole generator
+GARBAGE_SEED = 0x6a09e667f3bcc908
+
+def send_garbage(engines, sender, lines):
+	"""
+    Sends the garbage for a line clear to the next engine of a match still playing.
+    Garbage on its way to the sender is cancelled first.
+
+    Args:
+        engines (list): The engines of the match, in board order.
+        sender (Engine): The engine that cleared the lines.
+        lines (int): The number of lines cleared.
+
+    Returns:
+        None
+    """
+	garbage = GARBAGE_LINES[lines]
+	cancelled = min(garbage, sender.pending_garbage)
+	sender.pending_garbage -= cancelled
+	garbage -= cancelled
+	if not garbage:
+		return
+
+	index = engines.index(sender)
+	for engine in engines[index + 1:] + engines[:index]:
+		if not engine.game_over:
+			engine.receive_garbage(garbage)
+			return
+
+class Engine:
+	def __init__(self, seed = None, update_score = None, clock = None,
+		update_speed = UPDATE_SPEED, score_data = SCORE_DATA, level_lines = LEVEL_LINES, level_speedup = LEVEL_SPEEDUP,
+		columns = COLUMNS, rows = ROWS, scheduler = None, undo_limit = UNDO_LIMIT):
+		"""
+    Initializes the rules of a Tetris game without any window or pygame objects, so that
+    games can be simulated headless and rendered by the Game class.
+
+    Args:
+        seed (int, optional): Seed for the shape generator. Defaults to None for a random seed.
+        update_score (function, optional): Function called with (lines, score, level) after a line clear. Defaults to None.
+        clock (VirtualClock, optional): The simulation clock. Defaults to None for a new clock starting at 0.
+        update_speed (float, optional): Milliseconds between falls on the first level. Defaults to UPDATE_SPEED.
+        score_data (dict, optional): Points for clearing 1 to 4 lines at once, multiplied by the level. Defaults to SCORE_DATA.
+        level_lines (int, optional): Lines to clear for each level. Defaults to LEVEL_LINES.
+        level_speedup (float, optional): Factor the time between falls is multiplied by on each level. Defaults to LEVEL_SPEEDUP.
+        columns (int, optional): The width of the field. Defaults to COLUMNS.
+        rows (int, optional): The height of the field. Defaults to ROWS.
+        scheduler (Scheduler, optional): A scheduler on the same clock shared with other games, so one update fires
+            the timers of all of them. Defaults to None for the game's own scheduler.
+        undo_limit (int, optional): How many snapshots are kept for undo. 0 turns undo off, and then no snapshot
+            is taken as each Tetromino appears, which matters on big fields. Defaults to UNDO_LIMIT.
+
+    Returns:
+        None
+    """
+		# game connection
+		self.update_score = update_score
+
+		# versus, called with the number of lines of each clear to send garbage to other games
+		self.on_clear = None
+
+		# streaming, called with each Tetromino as it locks, before the rows it completed are cleared
+		self.on_lock = None
+
+		# shape generator, the seed is kept so the game can be replayed
+		self.seed = Random().getrandbits(32) if seed is None else seed
+		self.random = XorShiftRandom(self.seed)
+
+		# garbage lines waiting to be added when the next Tetromino appears, with their own generator for the holes
+		# so the shapes don't change with the garbage received
+		self.pending_garbage = 0
+		self.garbage_random = XorShiftRandom(self.seed ^ GARBAGE_SEED)
+
+		# gameover
+		self.game_over = False
+
+		# shapes
+		self.next_shapes = [self.random_shape() for shape in range(3)]
+
+		# tetromino
+		self.board = Board(columns, rows)
+		self.field_data = self.board.field_data
+		self.tetromino = Tetromino(
+			self.random_shape(),
+			self.create_new_tetromino,
+			self.board)
+
+		# rules
+		self.score_data = score_data
+		self.level_lines = level_lines
+		self.level_speedup = level_speedup
+
+		# speed
+		self.down_speed = update_speed
+		self.down_speed_faster = self.down_speed * 0.3
+		self.down_pressed = False
+
+		# timer
+		self.clock = clock or VirtualClock()
+		self.scheduler = scheduler or Scheduler(self.clock)
+		self.timers = {
+			'vertical move': Timer(self.down_speed, True, self.move_down)
+		}
+		self.scheduler.start(self.timers['vertical move'])
+
+		# score
+		self.current_level = 1
+		self.current_score = 0
+		self.current_lines = 0
+		self.pieces = 1
+
+		# snapshots taken as each Tetromino appears, for undo, starting with the new game
+		self.undo_limit = undo_limit
+		self.history = deque([self.snapshot()], maxlen = max(undo_limit, 1))
+
+	def random_shape(self):
+		"""
+    Picks a random Tetromino shape from the game's own generator.
+
+    Args:
+        None
+
+    Returns:
+        str: The identifier for the Tetromino shape.
+    """
+		return self.random.choice(list(TETROMINOS.keys()))
+
+	def get_next_shape(self):
+		"""
+    Retrieves the next Tetromino shape and updates the preview queue.
+
+    Args:
+        None
+
+    Returns:
+        str: The identifier for the next Tetromino shape.
+    """
+		next_shape = self.next_shapes.pop(0)
+		self.next_shapes.append(self.random_shape())
+		return next_shape
+
+	def calculate_score(self, num_lines):
+		"""
+    Updates the score, level, and speed based on the number of cleared lines.
+
+    Args:
+        num_lines (int): The number of lines cleared in a single move.
+
+    Returns:
+        None
+    """
+		self.current_lines += num_lines
+		self.current_score += self.score_data[num_lines] * self.current_level
+
+		if self.current_lines / self.level_lines > self.current_level:
+			self.current_level += 1
+			self.down_speed *= self.level_speedup
+			self.down_speed_faster = self.down_speed * 0.3
+			self.scheduler.set_duration(self.timers['vertical move'], self.down_speed_faster if self.down_pressed else self.down_speed)
+
+		if self.update_score:
+			self.update_score(self.current_lines, self.current_score, self.current_level)
+
+	def check_game_over(self):
+		"""
+    Checks if the game is over by detecting if any block is above the visible field.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+		for x, y in self.tetromino.blocks:
+			if y < 0:
+				self.game_over = True
+				return
+
+	def create_new_tetromino(self):
+		"""
+    Replaces the current Tetromino with a new one and processes game state.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+		if self.on_lock:
+			self.on_lock(self.tetromino)
+
+		self.check_game_over()
+		if self.game_over:
+			return
+
+		self.check_finished_rows()
+		if self.pending_garbage:
+			self.add_garbage()
+			if self.game_over:
+				return
+
+		self.tetromino = Tetromino(
+			self.get_next_shape(),
+			self.create_new_tetromino,
+			self.board)
+		self.pieces += 1
+		if self.undo_limit:
+			self.history.append(self.snapshot())
+
+	def check_finished_rows(self):
+		"""
+    Checks and clears any fully completed rows, updates the score, and moves remaining blocks down.
+    Only the rows the last Tetromino was placed in can have been completed.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+		num_lines = self.board.clear_rows(y for x, y in self.tetromino.blocks)
+
+		if num_lines:
+			# update score
+			self.calculate_score(num_lines)
+			if self.on_clear:
+				self.on_clear(num_lines)
+
+	def receive_garbage(self, lines):
+		"""
+    Queues garbage lines sent by another game, added below the field when the next Tetromino appears.
+
+    Args:
+        lines (int): The number of garbage lines.
+
+    Returns:
+        None
+    """
+		self.pending_garbage += lines
+
+	def add_garbage(self):
+		"""
+    Adds the queued garbage lines below the field, all with the same hole. The game is over if that pushes
+    blocks out of the top. Tetrominoes placed before the garbage can't be taken back.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+		hole = self.garbage_random.choice(range(self.board.width))
+		if self.board.add_garbage(self.pending_garbage, hole):
+			self.game_over = True
+		self.pending_garbage = 0
+		self.history.clear()
+
+	def snapshot(self):
+		"""
+    Packs the game state into a header and one byte per field cell, a few hundred bytes on the default field:
+    the board, the falling Tetromino, the preview queue, the generator states, the garbage waiting to be added,
+    the fall timer, the score, level and lines.
+
+    Args:
+        None
+
+    Returns:
+        bytes: The snapshot.
+    """
+		tetromino = self.tetromino
+		timer = self.timers['vertical move']
+		return SNAPSHOT.pack(
+			self.clock.get_ticks(), self.random.state, self.garbage_random.state, self.pending_garbage, self.game_over,
+			self.down_speed, self.down_pressed, timer.start_time, timer.active,
+			self.current_score, self.current_lines, self.current_level, self.pieces,
+			SHAPE_CODES[tetromino.shape], tetromino.x, tetromino.y, tetromino.rotation,
+			bytes(SHAPE_CODES[shape] for shape in self.next_shapes)) + self.board.cells
+
+	def restore(self, data, restore_clock = True):
+		"""
+    Puts the game back in the state of a snapshot.
+
+    Args:
+        data (bytes): A snapshot from snapshot.
+        restore_clock (bool, optional): Whether to set the clock back to the snapshot's time. If not, the fall timer
+            is moved to the current time instead. Defaults to True.
+
+    Returns:
+        None
+    """
+		(time, self.random.state, self.garbage_random.state, self.pending_garbage, self.game_over,
+			self.down_speed, self.down_pressed, start_time, active,
+			self.current_score, self.current_lines, self.current_level, self.pieces,
+			shape, x, y, rotation, next_shapes) = SNAPSHOT.unpack_from(data)
+
+		if restore_clock:
+			self.clock.time = time
+		else:
+			start_time += self.clock.get_ticks() - time
+
+		# speed
+		self.down_speed_faster = self.down_speed * 0.3
+		timer = self.timers['vertical move']
+		timer.duration = self.down_speed_faster if self.down_pressed else self.down_speed
+		if active:
+			self.scheduler.start(timer, start_time)
+		else:
+			self.scheduler.stop(timer)
+
+		# field and Tetrominoes
+		self.board.load_cells(data[SNAPSHOT.size:])
+		self.next_shapes = [CODE_SHAPES[code] for code in next_shapes]
+		self.tetromino = Tetromino(
+			CODE_SHAPES[shape],
+			self.create_new_tetromino,
+			self.board)
+		self.tetromino.set_position(x, y, rotation)
+
+		if self.update_score:
+			self.update_score(self.current_lines, self.current_score, self.current_level)
+
+	def undo(self):
+		"""
+    Takes back the last placed Tetromino, with the line clears and score that came with it.
+    A game that sends garbage can't undo, since the garbage its clears sent can't be taken back.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+		if not self.game_over and not self.on_clear and len(self.history) > 1:
+			self.history.pop()
+			self.restore(self.history[-1], restore_clock = False)
+
+	def update(self, amount = TICK_TIME):
+		"""
+    Advances the simulation clock and fires any timers that are due, such as the Tetromino falling.
+
+    Args:
+        amount (float, optional): The number of milliseconds to advance. Defaults to one tick.
+
+    Returns:
+        None
+    """
+		self.clock.advance(amount)
+		self.scheduler.update()
+
+	# player actions
+	def set_down_pressed(self, pressed):
+		"""
+    Switches the fall speed between normal and sped up while the down key is held.
+
+    Args:
+        pressed (bool): Whether the down key is held.
+
+    Returns:
+        None
+    """
+		self.down_pressed = pressed
+		self.scheduler.set_duration(self.timers['vertical move'], self.down_speed_faster if pressed else self.down_speed)
+
+	def move_horizontal(self, amount):
+		"""
+    Moves the current Tetromino horizontally.
+
+    Args:
+        amount (int): The number of units to move horizontally.
+
+    Returns:
+        None
+    """
+		if not self.game_over:
+			self.tetromino.move_horizontal(amount)
+
+	def move_down(self):
+		"""
+    Moves the current Tetromino down by one unit, placing it if it lands.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+		if not self.game_over:
+			self.tetromino.move_down()
+
+	def rotate(self, direction = 1):
+		"""
+    Rotates the current Tetromino.
+
+    Args:
+        direction (int, optional): 1 to rotate clockwise, -1 to rotate counterclockwise. Defaults to 1.
+
+    Returns:
+        None
+    """
+		if not self.game_over:
+			self.tetromino.rotate(direction)
+
+	def instant_drop(self):
+		"""
+    Drops the current Tetromino to the bottom and places it.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+		if not self.game_over:
+			self.tetromino.instant_drop()
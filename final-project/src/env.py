@@ -0,0 +1,153 @@
+from .engine import Engine
+from .board import SHAPE_CODES
+
+class TetrisEnv:
+	def __init__(self, seed = None, **rules):
+		"""
+    Initializes a programmatic, headless game for agents with reset, step and legal_actions.
+    Each step places the falling Tetromino: it is turned and moved at the top of the field and then dropped.
+    Observations are read-only memoryviews of the game state, so nothing is copied on a step;
+    numpy.asarray turns them into arrays without copying either.
+
+    Args:
+        seed (int, optional): Seed for the first game's shape generator. Defaults to None for a random seed.
+        **rules: Keyword arguments for the Engine, such as update_speed, score_data or the field's columns and rows.
+
+    Returns:
+        None
+    """
+		# agents place pieces and never take them back, so no undo snapshots are taken
+		self.rules = dict(rules, undo_limit = 0)
+		self.reset(seed)
+
+	def reset(self, seed = None):
+		"""
+    Starts a new game.
+
+    Args:
+        seed (int, optional): Seed for the shape generator. Defaults to None for a random seed.
+
+    Returns:
+        tuple: The observation of the new game.
+    """
+		self.engine = Engine(seed, **self.rules)
+
+		# falling shape and preview queue as SHAPE_CODES bytes, updated in place after each step
+		self.pieces = bytearray(1 + len(self.engine.next_shapes))
+		self.update_pieces()
+
+		# actions are rotation * columns + pivot column, the same as in VectorEnv
+		board = self.engine.board
+		self.num_actions = 4 * board.width
+
+		self.board_view = memoryview(board.cells).toreadonly().cast('B', (board.height, board.width))
+		self.pieces_view = memoryview(self.pieces).toreadonly()
+		return self.observe()
+
+	def update_pieces(self):
+		"""
+    Writes the falling shape and the preview queue into the pieces bytes.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+		self.pieces[0] = SHAPE_CODES[self.engine.tetromino.shape]
+		for i, shape in enumerate(self.engine.next_shapes, 1):
+			self.pieces[i] = SHAPE_CODES[shape]
+
+	def observe(self):
+		"""
+    Gets the observation of the game. The views always show the current state.
+
+    Args:
+        None
+
+    Returns:
+        tuple: The field as a (rows, columns) view and the falling shape followed by the preview queue as a view.
+    """
+		return self.board_view, self.pieces_view
+
+	def snapshot(self):
+		"""
+    Takes a snapshot of the game, for rollouts and search.
+
+    Args:
+        None
+
+    Returns:
+        bytes: The snapshot.
+    """
+		return self.engine.snapshot()
+
+	def restore(self, data):
+		"""
+    Puts the game back in the state of a snapshot. The observation views stay valid.
+
+    Args:
+        data (bytes): A snapshot from snapshot.
+
+    Returns:
+        None
+    """
+		self.engine.restore(data)
+		self.update_pieces()
+
+	def reachable(self, action):
+		"""
+    Checks if the falling Tetromino can be turned where it is and moved sideways to an action's column without collisions.
+
+    Args:
+        action (int): The action, rotation * columns + pivot column.
+
+    Returns:
+        bool: True if the placement can be reached; otherwise, False.
+    """
+		tetromino = self.engine.tetromino
+		rotation, x = divmod(action, self.engine.board.width)
+		step = 1 if x >= tetromino.x else -1
+		for column in range(tetromino.x, x + step, step):
+			if self.engine.board.collide(tetromino.cells(column, tetromino.y, rotation)):
+				return False
+		return True
+
+	def legal_actions(self):
+		"""
+    Lists the actions the falling Tetromino can reach.
+
+    Args:
+        None
+
+    Returns:
+        list: The legal actions, empty once the game is over.
+    """
+		if self.engine.game_over:
+			return []
+		return [action for action in range(self.num_actions) if self.reachable(action)]
+
+	def step(self, action):
+		"""
+    Places the falling Tetromino with an action and plays the line clears and scoring that follow.
+
+    Args:
+        action (int): The action, rotation * columns + pivot column.
+
+    Returns:
+        tuple: The observation, the points scored by the placement and whether the game is over.
+    """
+		engine = self.engine
+		if engine.game_over:
+			raise ValueError('The game is over, call reset to start a new one')
+		if not 0 <= action < self.num_actions or not self.reachable(action):
+			raise ValueError(f'Action {action} is not legal')
+
+		score = engine.current_score
+		tetromino = engine.tetromino
+		rotation, x = divmod(action, self.engine.board.width)
+		tetromino.set_position(x, tetromino.y, rotation)
+		engine.instant_drop()
+		self.update_pieces()
+
+		return self.observe(), engine.current_score - score, engine.game_over
@@ -0,0 +1,107 @@
+from time import perf_counter
+from functools import partial
+from multiprocessing import Pool
+from .settings import *
+from .engine import Engine
+from .controls import Controls
+from .bot import Bot, weighted_score
+from .replay import Replay, ReplayCursor
+
+def play_game(job):
+	"""
+    Plays one headless game to the end with the bot or a replay's recorded input.
+    Runs in a worker process, so it only takes and returns plain data.
+
+    Args:
+        job (dict): The game to play, with 'seed', 'replay' (a file path or None), 'max_ticks', 'rules'
+            (keyword arguments for the Engine such as update_speed, score_data or the field's columns and rows;
+            a replay is always played on its own field size) and 'bot' (the bot's 'lookahead', 'beam_width'
+            and heuristic 'weights').
+
+    Returns:
+        dict: The seed, score, lines, level, pieces, simulation steps and wall clock seconds of the game,
+        and the hits and misses of the bot's transposition table.
+    """
+	replay = Replay.load(job['replay']) if job['replay'] else None
+	if replay:
+		engine = Engine(replay.seed, **dict(job['rules'], columns = replay.columns, rows = replay.rows))
+	else:
+		# the bot never takes a Tetromino back
+		engine = Engine(job['seed'], **dict(job['rules'], undo_limit = 0))
+	controls = Controls(engine)
+	cursor = ReplayCursor(replay) if replay else None
+	settings = job['bot']
+	bot = None if replay else Bot(engine, partial(weighted_score, weights = settings['weights']),
+		settings['lookahead'], settings['beam_width'])
+
+	start = perf_counter()
+	ticks = 0
+	while not engine.game_over and ticks < job['max_ticks']:
+		if cursor:
+			if cursor.done():
+				break
+			buttons = cursor.next_buttons()
+		else:
+			buttons = bot.get_buttons()
+		controls.step(buttons)
+		ticks += 1
+
+	return {
+		'seed': engine.seed,
+		'score': engine.current_score,
+		'lines': engine.current_lines,
+		'level': engine.current_level,
+		'pieces': engine.pieces,
+		'ticks': ticks,
+		'seconds': perf_counter() - start,
+		'table hits': bot.table.hits if bot else 0,
+		'table misses': bot.table.misses if bot else 0
+	}
+
+def run_games(jobs, workers = None):
+	"""
+    Plays games in parallel across a pool of worker processes.
+
+    Args:
+        jobs (list): The games to play, as taken by play_game.
+        workers (int, optional): The number of worker processes. Defaults to None for one per CPU core.
+
+    Returns:
+        tuple: The list of game results and the wall clock seconds for all of them.
+    """
+	start = perf_counter()
+	with Pool(workers) as pool:
+		results = list(pool.imap_unordered(play_game, jobs))
+	return results, perf_counter() - start
+
+def summarize(results, seconds):
+	"""
+    Aggregates game results into averages, ranges and throughput.
+
+    Args:
+        results (list): Results from play_game.
+        seconds (float): The wall clock seconds it took to play all of them.
+
+    Returns:
+        dict: For score, lines, level and pieces per second of game time the mean, min and max,
+        plus the total simulation steps per wall clock second and the bots' transposition table hits, misses and hit rate.
+    """
+	summary = {'games': len(results)}
+	for key in ('score', 'lines', 'level'):
+		values = [result[key] for result in results]
+		summary[key] = {'mean': sum(values) / len(values), 'min': min(values), 'max': max(values)}
+
+	# pieces per second of simulated play, the pace the rules allow
+	rates = [result['pieces'] / (result['ticks'] / TICK_RATE) for result in results if result['ticks']]
+	if rates:
+		summary['pieces per second'] = {'mean': sum(rates) / len(rates), 'min': min(rates), 'max': max(rates)}
+
+	summary['ticks'] = sum(result['ticks'] for result in results)
+	summary['ticks per second'] = summary['ticks'] / seconds if seconds else 0
+	summary['seconds'] = seconds
+
+	# how often the bots found a field they had measured before
+	hits = sum(result['table hits'] for result in results)
+	misses = sum(result['table misses'] for result in results)
+	summary['table'] = {'hits': hits, 'misses': misses, 'hit rate': hits / (hits + misses) if hits + misses else 0}
+	return summary
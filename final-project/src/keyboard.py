@@ -0,0 +1,100 @@
+import pygame
+from .controls import LEFT, RIGHT, ROTATE, DOWN, DROP, UNDO
+
+# button for each key
+KEY_BUTTONS = {
+	pygame.K_LEFT: LEFT,
+	pygame.K_RIGHT: RIGHT,
+	pygame.K_UP: ROTATE,
+	pygame.K_DOWN: DOWN,
+	pygame.K_SPACE: DROP,
+	pygame.K_u: UNDO
+}
+
+# keys of the second player in a versus match, on the other side of the keyboard, with no undo since versus has none
+PLAYER_TWO_KEYS = {
+	pygame.K_a: LEFT,
+	pygame.K_d: RIGHT,
+	pygame.K_w: ROTATE,
+	pygame.K_s: DOWN,
+	pygame.K_LSHIFT: DROP
+}
+
+# keys of the player in a networked match, which has no undo
+MATCH_KEYS = {key: button for key, button in KEY_BUTTONS.items() if button != UNDO}
+
+# keys of each keyboard player, in board order
+PLAYER_KEYS = (KEY_BUTTONS, PLAYER_TWO_KEYS)
+
+class Keyboard:
+	def __init__(self, key_buttons = KEY_BUTTONS):
+		"""
+    Initializes the keyboard state, built from KEYDOWN and KEYUP events rather than polled each frame.
+    A key pressed since the last simulation step counts as held on the next step even if it was already let go,
+    so taps shorter than a frame are not lost.
+
+    Args:
+        key_buttons (dict, optional): The button for each key. Defaults to KEY_BUTTONS.
+
+    Returns:
+        None
+    """
+		self.key_buttons = key_buttons
+		self.held = 0
+		self.pressed = 0
+		self.released = 0
+
+		# buttons handed out for the last step
+		self.last = 0
+
+	def handle(self, event):
+		"""
+    Updates the held buttons from a key event. Other events and keys are ignored.
+
+    Args:
+        event (pygame.event.Event): The event.
+
+    Returns:
+        None
+    """
+		key_buttons = self.key_buttons
+		if event.type == pygame.KEYDOWN and event.key in key_buttons:
+			self.held |= key_buttons[event.key]
+			self.pressed |= key_buttons[event.key]
+		elif event.type == pygame.KEYUP and event.key in key_buttons:
+			self.held &= ~key_buttons[event.key]
+			self.released |= key_buttons[event.key]
+
+	def release_all(self):
+		"""
+    Lets go of every button, for when the window loses focus and the key up events would go elsewhere.
+    Key ups still waiting for the next step are dropped. The buttons handed out for the last step count as let go,
+    so pressing one again before the next step is still seen as a new press.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+		self.held = 0
+		self.pressed = 0
+		self.released = self.last
+
+	def read(self):
+		"""
+    Gets the buttons for the next simulation step.
+
+    Args:
+        None
+
+    Returns:
+        int: A bitmask of the held buttons.
+    """
+		# a button let go and pressed again since the last step is let go for this step, so the new press is seen on the next
+		again = self.pressed & self.released & self.last
+		buttons = (self.held | self.pressed) & ~again
+		self.pressed &= again
+		self.released = 0
+		self.last = buttons
+		return buttons
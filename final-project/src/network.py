@@ -0,0 +1,452 @@
+import socket
+from time import perf_counter
+from .settings import *
+from functools import partial
+from .engine import SNAPSHOT, send_garbage
+from .controls import CONTROLS_SNAPSHOT, LEFT, RIGHT, ROTATE, DOWN, DROP
+from .encoding import encode_varint, decode_varint
+
+PROTOCOL_VERSION = 1
+
+# message types, the first byte of every message
+JOIN = 1
+INPUT = 2
+PING = 3
+WELCOME = 4
+STATE = 5
+PONG = 6
+END = 7
+
+# buttons a client may hold, a match has no undo since the garbage a clear sent can't be taken back
+INPUT_BUTTONS = LEFT | RIGHT | ROTATE | DOWN | DROP
+
+# the largest message either side accepts
+MAX_MESSAGE_SIZE = 1 << 16
+
+# changed bytes closer than this are sent as one run, since a run header costs two bytes
+RUN_GAP = 3
+GAP = bytes(RUN_GAP)
+
+def encode_message(kind, *values, data = b''):
+	"""
+    Encodes a message as its type byte followed by varint values and raw data.
+
+    Args:
+        kind (int): The message type.
+        *values (int): Non-negative integers, written as varints.
+        data (bytes, optional): Bytes written after the values. Defaults to b''.
+
+    Returns:
+        bytes: The message.
+    """
+	return bytes([kind]) + b''.join(encode_varint(value) for value in values) + data
+
+def decode_values(message, count):
+	"""
+    Decodes the varint values after the type byte of a message.
+
+    Args:
+        message (bytes): The message.
+        count (int): The number of values.
+
+    Returns:
+        tuple: The values, followed by the index of the first byte after them.
+    """
+	values = []
+	pos = 1
+	for i in range(count):
+		value, pos = decode_varint(message, pos)
+		values.append(value)
+	return (*values, pos)
+
+def frame(message):
+	"""
+    Prefixes a message with its varint length for sending over a stream.
+
+    Args:
+        message (bytes): The message.
+
+    Returns:
+        bytes: The framed message.
+    """
+	return encode_varint(len(message)) + message
+
+def unframe(buffer):
+	"""
+    Takes the complete framed messages off the front of a receive buffer.
+
+    Args:
+        buffer (bytearray): Received bytes. The complete messages are removed from it.
+
+    Returns:
+        list: The messages.
+    """
+	messages = []
+	pos = 0
+	while pos < len(buffer):
+		# the length itself can be cut off
+		length_end = pos
+		while length_end < len(buffer) and buffer[length_end] & 0x80:
+			length_end += 1
+		if length_end >= len(buffer):
+			break
+		length, start = decode_varint(buffer, pos)
+		if length > MAX_MESSAGE_SIZE:
+			raise ValueError(f'message of {length} bytes is too long')
+		if start + length > len(buffer):
+			break
+		messages.append(bytes(buffer[start:start + length]))
+		pos = start + length
+	del buffer[:pos]
+	return messages
+
+def state_size(columns, rows):
+	"""
+    Finds the length of a board's state: the engine snapshot with its cells, then the controls snapshot.
+
+    Args:
+        columns (int): The width of the field.
+        rows (int): The height of the field.
+
+    Returns:
+        int: The length in bytes.
+    """
+	return SNAPSHOT.size + columns * rows + CONTROLS_SNAPSHOT.size
+
+def split_state(state):
+	"""
+    Splits a board's state into its engine and controls snapshots.
+
+    Args:
+        state (bytes): The state.
+
+    Returns:
+        tuple: The engine snapshot and the controls snapshot.
+    """
+	return state[:-CONTROLS_SNAPSHOT.size], state[-CONTROLS_SNAPSHOT.size:]
+
+def encode_diff(old, new):
+	"""
+    Encodes the changes from one state to the next, both of the same length, as runs of changed bytes:
+    a varint count of unchanged bytes skipped since the last run, a varint length and the new bytes.
+    The changed bytes are found by XORing the states as integers and the runs by searching for gaps of zeros,
+    so the scans run in C.
+
+    Args:
+        old (bytes): The previous state.
+        new (bytes): The next state.
+
+    Returns:
+        bytes: The diff, empty if nothing changed.
+    """
+	if old == new:
+		return b''
+	changed = (int.from_bytes(old, 'little') ^ int.from_bytes(new, 'little')).to_bytes(len(new), 'little')
+	end = len(changed.rstrip(b'\x00'))
+
+	data = bytearray()
+	last = 0
+	start = len(changed) - len(changed.lstrip(b'\x00'))
+	while start < end:
+		stop = changed.find(GAP, start, end)
+		if stop < 0:
+			stop = end
+		data += encode_varint(start - last)
+		data += encode_varint(stop - start)
+		data += new[start:stop]
+		last = stop
+		start = end - len(changed[stop:end].lstrip(b'\x00'))
+	return bytes(data)
+
+def apply_diff(old, data, pos = 0):
+	"""
+    Applies a diff from encode_diff.
+
+    Args:
+        old (bytes): The previous state.
+        data (bytes): The data holding the diff, which runs to its end.
+        pos (int, optional): The index of the first byte of the diff. Defaults to 0.
+
+    Returns:
+        bytes: The next state.
+    """
+	new = bytearray(old)
+	end = 0
+	while pos < len(data):
+		skip, pos = decode_varint(data, pos)
+		length, pos = decode_varint(data, pos)
+		start = end + skip
+		end = start + length
+		if end > len(new):
+			raise ValueError('diff runs past the end of the state')
+		new[start:end] = data[pos:pos + length]
+		pos += length
+	return bytes(new)
+
+class NetworkClient:
+	def __init__(self, host, port):
+		"""
+    Initializes a connection to a game server over TCP and joins a match. The socket is read without blocking,
+    so the game loop polls it once a frame.
+
+    Args:
+        host (str): The server's host name or address.
+        port (int): The server's TCP port.
+
+    Returns:
+        None
+    """
+		self.socket = socket.create_connection((host, port))
+		self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+		self.buffer = bytearray()
+		self.send(encode_message(JOIN, PROTOCOL_VERSION))
+
+		# match, set by the welcome message
+		self.player = None
+		self.players = 0
+		self.seed = 0
+		self.columns = COLUMNS
+		self.rows = ROWS
+
+		# each board's last state from the server and the server step it was taken after
+		self.states = []
+		self.server_tick = 0
+		self.server_time = perf_counter()
+
+		# round trip time in milliseconds, smoothed, and when the last ping was sent
+		self.round_trip = 0
+		self.ping_time = 0
+
+		# the held buttons last sent, only changes are sent
+		self.buttons = 0
+
+		# board that won, set when the match ends
+		self.winner = None
+		self.closed = False
+
+	def send(self, message):
+		"""
+    Sends a message to the server.
+
+    Args:
+        message (bytes): The message.
+
+    Returns:
+        None
+    """
+		self.socket.sendall(frame(message))
+
+	def receive(self):
+		"""
+    Reads whatever the server has sent so far without waiting.
+
+    Args:
+        None
+
+    Returns:
+        list: The complete messages.
+    """
+		self.socket.setblocking(False)
+		try:
+			while True:
+				data = self.socket.recv(65536)
+				if not data:
+					self.closed = True
+					break
+				self.buffer += data
+		except BlockingIOError:
+			pass
+		finally:
+			self.socket.setblocking(True)
+		return unframe(self.buffer)
+
+	def wait_welcome(self):
+		"""
+    Waits until the match starts, when the server says which board is this player's, and sets up the boards.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+		while self.player is None:
+			data = self.socket.recv(65536)
+			if not data:
+				raise ConnectionError('the server closed the connection before the match started')
+			self.buffer += data
+			for message in unframe(self.buffer):
+				if message[0] == WELCOME:
+					self.player, self.players, self.seed, self.columns, self.rows, pos = decode_values(message, 5)
+					self.states = [bytes(state_size(self.columns, self.rows))] * self.players
+					self.server_time = perf_counter()
+
+	def poll(self):
+		"""
+    Handles the messages that arrived since the last poll and pings the server every second.
+
+    Args:
+        None
+
+    Returns:
+        list: (board, server step) for each state that came in, in order.
+    """
+		now = perf_counter()
+		if now - self.ping_time >= 1:
+			self.ping_time = now
+			self.send(encode_message(PING, int(now * 1000)))
+
+		updates = []
+		for message in self.receive():
+			kind = message[0]
+			if kind == STATE:
+				tick, board, pos = decode_values(message, 2)
+				self.states[board] = apply_diff(self.states[board], message, pos)
+				if tick > self.server_tick:
+					self.server_tick = tick
+					self.server_time = now
+				updates.append((board, tick))
+			elif kind == PONG:
+				sent, pos = decode_values(message, 1)
+				sample = now * 1000 - sent
+				self.round_trip = sample if not self.round_trip else self.round_trip * 0.8 + sample * 0.2
+			elif kind == END:
+				self.winner, pos = decode_values(message, 1)
+		return updates
+
+	def target_tick(self):
+		"""
+    Finds the step the local board should be at, ahead of the server by the round trip time and INPUT_LEAD_TICKS,
+    so its inputs reach the server before the server plays their steps.
+
+    Args:
+        None
+
+    Returns:
+        int: The step.
+    """
+		server_tick = self.server_tick + (perf_counter() - self.server_time) * 1000 / TICK_TIME
+		return int(server_tick + self.round_trip / TICK_TIME) + INPUT_LEAD_TICKS
+
+	def send_input(self, tick, buttons):
+		"""
+    Sends the buttons held on a step of the local board, if they changed.
+
+    Args:
+        tick (int): The step.
+        buttons (int): A bitmask of the held buttons.
+
+    Returns:
+        None
+    """
+		if buttons != self.buttons:
+			self.buttons = buttons
+			self.send(encode_message(INPUT, tick, buttons))
+
+	def close(self):
+		"""
+    Closes the connection.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+		self.socket.close()
+		self.closed = True
+
+class Prediction:
+	def __init__(self, engine, controls):
+		"""
+    Initializes the prediction of the local board in a networked match. The board is simulated ahead of the server
+    with the local buttons, and the predicted state after each step is kept until the server's state for that step comes in.
+    If they differ, as when garbage arrived or an input reached the server late, the board is put back in the server's state
+    and the steps since then are simulated again with the same buttons. Garbage the server queued comes with its state,
+    and the board's own clears cancel it like on the server, so it spawns on the same step on both.
+
+    Args:
+        engine (Engine): The local board's engine.
+        controls (Controls): The local board's controls.
+
+    Returns:
+        None
+    """
+		self.engine = engine
+		self.controls = controls
+
+		# the garbage sent to the other boards reaches them from the server, only the cancelling of the board's own is predicted
+		engine.on_clear = partial(send_garbage, [engine], engine)
+
+		# steps simulated so far
+		self.tick = 0
+
+		# buttons of each step and the state after it, for the steps the server hasn't confirmed
+		self.inputs = {}
+		self.predicted = {}
+
+		# how often a wrong prediction was simulated again
+		self.rollbacks = 0
+
+	def state(self):
+		"""
+    Packs the local board's state the way the server does.
+
+    Args:
+        None
+
+    Returns:
+        bytes: The state.
+    """
+		return self.engine.snapshot() + self.controls.snapshot()
+
+	def stepped(self, buttons):
+		"""
+    Keeps the buttons of the step just simulated and the state after it.
+
+    Args:
+        buttons (int): A bitmask of the buttons held on the step.
+
+    Returns:
+        None
+    """
+		self.inputs[self.tick] = buttons
+		self.tick += 1
+		self.predicted[self.tick] = self.state()
+
+	def reconcile(self, tick, state):
+		"""
+    Checks the server's state after a step against the prediction, and corrects the board if they differ.
+
+    Args:
+        tick (int): The server step the state was taken after.
+        state (bytes): The server's state.
+
+    Returns:
+        None
+    """
+		predicted = self.predicted.get(tick)
+		for old_tick in [old_tick for old_tick in self.predicted if old_tick <= tick]:
+			del self.predicted[old_tick]
+		for old_tick in [old_tick for old_tick in self.inputs if old_tick < tick]:
+			del self.inputs[old_tick]
+		if predicted == state:
+			return
+
+		engine_snapshot, controls_snapshot = split_state(state)
+		self.engine.restore(engine_snapshot)
+		self.controls.restore(controls_snapshot)
+
+		# the server got ahead, as when the board stopped after losing, and the board jumps to its state
+		if tick >= self.tick:
+			self.tick = tick
+			self.inputs.clear()
+			return
+
+		self.rollbacks += 1
+		end = self.tick
+		self.tick = tick
+		while self.tick < end:
+			buttons = self.inputs[self.tick]
+			self.controls.step(buttons)
+			self.stepped(buttons)
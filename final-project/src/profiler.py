@@ -0,0 +1,157 @@
+import csv
+import json
+from collections import deque
+from time import perf_counter_ns
+
+# stages of a frame, in the order Controller.run goes through them
+STAGES = ('events', 'input', 'rules', 'draw', 'score', 'preview', 'overlay', 'display update')
+
+# frames kept for the rolling percentiles, 10 seconds at 60 frames per second
+PROFILE_WINDOW = 600
+
+# whole-session histograms, 10 microsecond bins up to 100 milliseconds
+HISTOGRAM_BIN = 10_000
+HISTOGRAM_BINS = 10_000
+
+def percentiles(samples):
+	"""
+    Finds the median, 95th and 99th percentile of some samples.
+
+    Args:
+        samples (iterable): Times in nanoseconds.
+
+    Returns:
+        tuple: The p50, p95 and p99, or zeros if there are no samples.
+    """
+	ordered = sorted(samples)
+	if not ordered:
+		return 0, 0, 0
+	return tuple(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] for fraction in (0.5, 0.95, 0.99))
+
+class Profiler:
+	def __init__(self, window = PROFILE_WINDOW):
+		"""
+    Initializes frame timing for each stage of the main loop. Stages are timed as laps:
+    each call to lap charges the time since the previous one to a stage.
+
+    Args:
+        window (int, optional): The number of recent frames kept for the rolling percentiles. Defaults to PROFILE_WINDOW.
+
+    Returns:
+        None
+    """
+		self.recent = {stage: deque(maxlen = window) for stage in STAGES + ('frame',)}
+		self.histograms = {stage: [0] * HISTOGRAM_BINS for stage in STAGES + ('frame',)}
+		self.frames = 0
+
+		# times of the frame being measured, None between frames
+		self.current = None
+		self.last_time = 0
+
+	def begin(self):
+		"""
+    Starts timing a frame.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+		self.current = dict.fromkeys(STAGES, 0)
+		self.last_time = perf_counter_ns()
+
+	def lap(self, stage):
+		"""
+    Charges the time since the last lap to a stage. Does nothing outside of a timed frame.
+
+    Args:
+        stage (str): One of STAGES. A stage can be lapped more than once per frame, the times add up.
+
+    Returns:
+        None
+    """
+		if self.current is not None:
+			now = perf_counter_ns()
+			self.current[stage] += now - self.last_time
+			self.last_time = now
+
+	def end(self):
+		"""
+    Finishes the frame and adds its times to the rolling windows and the histograms.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+		times = self.current
+		if times is None:
+			return
+		times['frame'] = sum(times.values())
+		for stage, time in times.items():
+			self.recent[stage].append(time)
+			self.histograms[stage][min(time // HISTOGRAM_BIN, HISTOGRAM_BINS - 1)] += 1
+		self.frames += 1
+		self.current = None
+
+	def rolling(self):
+		"""
+    Gets the percentiles of each stage over the recent frames.
+
+    Args:
+        None
+
+    Returns:
+        dict: (p50, p95, p99) in nanoseconds for each stage and the whole frame.
+    """
+		return {stage: percentiles(samples) for stage, samples in self.recent.items()}
+
+	def summary(self):
+		"""
+    Gets the percentiles of each stage over the whole session, from the histograms.
+
+    Args:
+        None
+
+    Returns:
+        dict: For each stage and the whole frame, the p50, p95 and p99 in milliseconds,
+        as the upper edge of the histogram bin they fall in.
+    """
+		summary = {}
+		for stage, histogram in self.histograms.items():
+			total = sum(histogram)
+			values = {}
+			for name, fraction in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99)):
+				target = total * fraction
+				seen = 0
+				for index, count in enumerate(histogram):
+					seen += count
+					if seen >= target:
+						break
+				values[name] = (index + 1) * HISTOGRAM_BIN / 1e6 if total else 0
+			summary[stage] = values
+		return summary
+
+	def save(self, path):
+		"""
+    Writes the session percentiles of each stage to a file, as CSV if the path ends in .csv and as JSON otherwise.
+    The JSON file also holds the recent frame times.
+
+    Args:
+        path (str): The file to write.
+
+    Returns:
+        None
+    """
+		summary = self.summary()
+		with open(path, 'w', newline = '') as file:
+			if path.endswith('.csv'):
+				writer = csv.writer(file)
+				writer.writerow(['stage', 'p50 ms', 'p95 ms', 'p99 ms'])
+				for stage, values in summary.items():
+					writer.writerow([stage, values['p50'], values['p95'], values['p99']])
+			else:
+				recent = {stage: [time / 1e6 for time in samples] for stage, samples in self.recent.items()}
+				json.dump({'frames': self.frames, 'stages': summary, 'recent ms': recent}, file, indent = 2)
@@ -0,0 +1,298 @@
+import struct
+from collections import deque
+from os import makedirs
+from os.path import join
+from time import strftime
+from .settings import *
+from .engine import Engine
+from .controls import Controls
+from .encoding import encode_varint, decode_varint
+
+REPLAY_MAGIC = b'TRPL'
+REPLAY_VERSION = 1
+REPLAY_HEADER = struct.Struct('<4sBQ')
+REPLAY_FOLDER = join('final-project', 'replays')
+
+# simulation steps between the states kept for seeking, 10 seconds at 60 steps per second
+CHECKPOINT_INTERVAL = 600
+
+class Replay:
+	def __init__(self, seed, changes = None, ticks = 0, columns = COLUMNS, rows = ROWS):
+		"""
+    Initializes a recording of a game as its seed, its field size and the buttons held on each simulation step.
+    Only the steps where the held buttons change are stored.
+
+    Args:
+        seed (int): The seed of the recorded game's shape generator.
+        changes (list, optional): (tick, buttons) pairs for every change of the held buttons. Defaults to None.
+        ticks (int, optional): The number of recorded simulation steps. Defaults to 0.
+        columns (int, optional): The width of the recorded game's field. Defaults to COLUMNS.
+        rows (int, optional): The height of the recorded game's field. Defaults to ROWS.
+
+    Returns:
+        None
+    """
+		self.seed = seed
+		self.columns = columns
+		self.rows = rows
+		self.changes = changes if changes is not None else []
+		self.ticks = ticks
+		self.buttons = self.changes[-1][1] if self.changes else 0
+
+	def record(self, buttons):
+		"""
+    Records the buttons held on the next simulation step.
+
+    Args:
+        buttons (int): A bitmask of the held buttons.
+
+    Returns:
+        None
+    """
+		if buttons != self.buttons:
+			self.changes.append((self.ticks, buttons))
+			self.buttons = buttons
+		self.ticks += 1
+
+	def to_bytes(self):
+		"""
+    Encodes the replay as a header with the seed, followed by the field size, varint tick deltas and button bytes.
+
+    Args:
+        None
+
+    Returns:
+        bytes: The encoded replay.
+    """
+		data = bytearray(REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.seed & 0xffffffffffffffff))
+		data += encode_varint(self.columns)
+		data += encode_varint(self.rows)
+		data += encode_varint(self.ticks)
+		data += encode_varint(len(self.changes))
+
+		last_tick = 0
+		for tick, buttons in self.changes:
+			data += encode_varint(tick - last_tick)
+			data.append(buttons)
+			last_tick = tick
+		return bytes(data)
+
+	@classmethod
+	def from_bytes(cls, data):
+		"""
+    Decodes a replay written by to_bytes.
+
+    Args:
+        data (bytes): The encoded replay.
+
+    Returns:
+        Replay: The decoded replay.
+    """
+		magic, version, seed = REPLAY_HEADER.unpack_from(data)
+		if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+			raise ValueError('Not a supported replay file')
+
+		columns, pos = decode_varint(data, REPLAY_HEADER.size)
+		rows, pos = decode_varint(data, pos)
+		ticks, pos = decode_varint(data, pos)
+		count, pos = decode_varint(data, pos)
+
+		changes = []
+		tick = 0
+		for i in range(count):
+			delta, pos = decode_varint(data, pos)
+			tick += delta
+			changes.append((tick, data[pos]))
+			pos += 1
+		return cls(seed, changes, ticks, columns, rows)
+
+	def save(self, path = None):
+		"""
+    Writes the replay to a file.
+
+    Args:
+        path (str, optional): The file to write. Defaults to None for a new timestamped file in REPLAY_FOLDER.
+
+    Returns:
+        str: The path of the written file.
+    """
+		if path is None:
+			makedirs(REPLAY_FOLDER, exist_ok = True)
+			path = join(REPLAY_FOLDER, f'{strftime("%Y%m%d-%H%M%S")}-{self.seed}.replay')
+		with open(path, 'wb') as file:
+			file.write(self.to_bytes())
+		return path
+
+	@classmethod
+	def load(cls, path):
+		"""
+    Reads a replay from a file.
+
+    Args:
+        path (str): The file to read.
+
+    Returns:
+        Replay: The loaded replay.
+    """
+		with open(path, 'rb') as file:
+			return cls.from_bytes(file.read())
+
+class ReplayCursor:
+	def __init__(self, replay):
+		"""
+    Initializes a position in a replay that hands out the recorded buttons one simulation step at a time.
+
+    Args:
+        replay (Replay): The replay to read.
+
+    Returns:
+        None
+    """
+		self.replay = replay
+		self.tick = 0
+		self.index = 0
+		self.buttons = 0
+
+	def done(self):
+		"""
+    Checks if every recorded simulation step has been handed out.
+
+    Args:
+        None
+
+    Returns:
+        bool: True if the replay has ended; otherwise, False.
+    """
+		return self.tick >= self.replay.ticks
+
+	def next_buttons(self):
+		"""
+    Gets the buttons held on the next simulation step.
+
+    Args:
+        None
+
+    Returns:
+        int: A bitmask of the held buttons.
+    """
+		changes = self.replay.changes
+		while self.index < len(changes) and changes[self.index][0] <= self.tick:
+			self.buttons = changes[self.index][1]
+			self.index += 1
+		self.tick += 1
+		return self.buttons
+
+class ReplayPlayer:
+	def __init__(self, replay, checkpoint_interval = CHECKPOINT_INTERVAL):
+		"""
+    Initializes a headless playback of a replay that runs as fast as the CPU allows.
+    The game state is kept every checkpoint_interval steps, so seeking only re-simulates from the nearest one.
+
+    Args:
+        replay (Replay): The replay to play.
+        checkpoint_interval (int, optional): Simulation steps between kept states. Defaults to CHECKPOINT_INTERVAL.
+
+    Returns:
+        None
+    """
+		self.replay = replay
+		self.checkpoint_interval = checkpoint_interval
+
+		self.engine = Engine(replay.seed, columns = replay.columns, rows = replay.rows)
+		self.controls = Controls(self.engine)
+		self.cursor = ReplayCursor(replay)
+
+		self.checkpoints = {0: self.save_checkpoint()}
+
+	@property
+	def tick(self):
+		"""
+    The number of simulation steps played so far.
+    """
+		return self.cursor.tick
+
+	def done(self):
+		"""
+    Checks if the playback has reached the end of the replay or the end of the game.
+
+    Args:
+        None
+
+    Returns:
+        bool: True if there is nothing left to play; otherwise, False.
+    """
+		return self.cursor.done() or self.engine.game_over
+
+	def save_checkpoint(self):
+		"""
+    Takes snapshots of the current game state. The engine's undo history is kept as a tuple
+    of its snapshots, which are shared rather than copied.
+
+    Args:
+        None
+
+    Returns:
+        tuple: The engine snapshot, the undo history, the controls snapshot and the cursor position.
+    """
+		cursor = self.cursor
+		return (self.engine.snapshot(), tuple(self.engine.history), self.controls.snapshot(),
+			(cursor.tick, cursor.index, cursor.buttons))
+
+	def restore_checkpoint(self, checkpoint):
+		"""
+    Puts the game back in the state of a checkpoint. The checkpoint is left as it is, so it can be used again.
+
+    Args:
+        checkpoint (tuple): A state from save_checkpoint.
+
+    Returns:
+        None
+    """
+		engine_snapshot, history, controls_snapshot, position = checkpoint
+		self.engine.restore(engine_snapshot)
+		self.engine.history = deque(history, maxlen = self.engine.history.maxlen)
+		self.controls.restore(controls_snapshot)
+		self.cursor.tick, self.cursor.index, self.cursor.buttons = position
+
+	def step(self):
+		"""
+    Plays the next simulation step of the replay.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+		self.controls.step(self.cursor.next_buttons())
+		if self.tick % self.checkpoint_interval == 0 and self.tick not in self.checkpoints:
+			self.checkpoints[self.tick] = self.save_checkpoint()
+
+	def run(self, ticks = None):
+		"""
+    Plays the replay until it ends, or for a number of simulation steps.
+
+    Args:
+        ticks (int, optional): The number of steps to play. Defaults to None to play to the end.
+
+    Returns:
+        None
+    """
+		end = self.replay.ticks if ticks is None else self.tick + ticks
+		while self.tick < end and not self.done():
+			self.step()
+
+	def seek(self, tick):
+		"""
+    Moves the playback to a simulation step by restoring the nearest earlier checkpoint and playing forward from it.
+
+    Args:
+        tick (int): The simulation step to move to.
+
+    Returns:
+        None
+    """
+		start = max(checkpoint_tick for checkpoint_tick in self.checkpoints if checkpoint_tick <= tick)
+		if not start <= self.tick <= tick:
+			self.restore_checkpoint(self.checkpoints[start])
+		self.run(tick - self.tick)
@@ -0,0 +1,47 @@
+MASK64 = (1 << 64) - 1
+
+class XorShiftRandom:
+	def __init__(self, seed):
+		"""
+    Initializes a small xorshift64* random generator. Its whole state is one 64-bit integer,
+    so a game snapshot can store it in 8 bytes.
+
+    Args:
+        seed (int): The seed, scrambled with splitmix64 so that nearby seeds give unrelated sequences.
+
+    Returns:
+        None
+    """
+		z = (seed + 0x9e3779b97f4a7c15) & MASK64
+		z = ((z ^ (z >> 30)) * 0xbf58476d1ce4e5b9) & MASK64
+		z = ((z ^ (z >> 27)) * 0x94d049bb133111eb) & MASK64
+		self.state = (z ^ (z >> 31)) or 1
+
+	def next(self):
+		"""
+    Advances the generator.
+
+    Args:
+        None
+
+    Returns:
+        int: A random 64-bit integer.
+    """
+		x = self.state
+		x ^= x >> 12
+		x ^= (x << 25) & MASK64
+		x ^= x >> 27
+		self.state = x
+		return (x * 0x2545f4914f6cdd1d) & MASK64
+
+	def choice(self, sequence):
+		"""
+    Picks a random element of a sequence.
+
+    Args:
+        sequence (list): The elements to pick from.
+
+    Returns:
+        The picked element.
+    """
+		return sequence[(self.next() >> 32) * len(sequence) >> 32]
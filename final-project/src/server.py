@@ -0,0 +1,695 @@
+import asyncio
+import base64
+import hashlib
+import socket
+import sys
+import traceback
+from collections import deque
+from functools import partial
+from random import Random
+from time import perf_counter
+from .settings import *
+from .clock import VirtualClock
+from .timer import Scheduler
+from .engine import Engine, send_garbage
+from .controls import Controls, LEFT, RIGHT, ROTATE, DOWN, DROP
+from .network import (PROTOCOL_VERSION, JOIN, INPUT, PING, WELCOME, STATE, PONG, END, MAX_MESSAGE_SIZE, INPUT_BUTTONS,
+	encode_message, decode_values, frame, unframe, state_size, encode_diff, apply_diff)
+
+# WebSocket opcodes, and the GUID hashed with the client's key to accept the handshake
+CONTINUATION = 0
+TEXT = 1
+BINARY = 2
+CLOSE = 8
+WS_PING = 9
+WS_PONG = 10
+WEBSOCKET_GUID = b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+# step times kept for the self-test's percentiles
+STEP_TIMES = 1000
+
+class Match:
+	def __init__(self, seed, players = 2, columns = COLUMNS, rows = ROWS):
+		"""
+    Initializes the authoritative simulation of one networked match. The boards share a simulation clock and
+    scheduler like the boards of a local versus match, and get the same shapes. The buttons from each player
+    are queued with the step they were pressed on and applied when the match reaches that step, one change per step,
+    so a tap that arrives late is shifted to a later step rather than lost.
+
+    Args:
+        seed (int): Seed for the shape generators.
+        players (int, optional): The number of boards. Defaults to 2.
+        columns (int, optional): The width of the fields. Defaults to COLUMNS.
+        rows (int, optional): The height of the fields. Defaults to ROWS.
+
+    Returns:
+        None
+    """
+		self.seed = seed
+		self.players = players
+		self.columns = columns
+		self.rows = rows
+
+		self.clock = VirtualClock()
+		self.scheduler = Scheduler(self.clock)
+		self.engines = [Engine(seed, clock = self.clock, columns = columns, rows = rows, scheduler = self.scheduler, undo_limit = 0)
+			for i in range(players)]
+		self.controls = [Controls(engine) for engine in self.engines]
+		if players > 1:
+			for engine in self.engines:
+				engine.on_clear = partial(send_garbage, self.engines, engine)
+
+		# (step, buttons) changes waiting for each board, and the buttons held
+		self.inputs = [deque(maxlen = MAX_QUEUED_INPUTS) for i in range(players)]
+		self.buttons = [0] * players
+		self.late_inputs = 0
+
+		# steps simulated so far
+		self.tick = 0
+
+		# connection of each board, None once it left, and the state of each board last sent to them
+		self.connections = []
+		self.sent = [bytes(state_size(columns, rows))] * players
+
+	def queue_input(self, player, tick, buttons):
+		"""
+    Queues a change of the buttons a player holds.
+
+    Args:
+        player (int): The player's board.
+        tick (int): The step the buttons were pressed on.
+        buttons (int): A bitmask of the held buttons.
+
+    Returns:
+        None
+    """
+		self.inputs[player].append((tick, buttons))
+
+	def step(self):
+		"""
+    Advances every board still playing by one simulation step: each applies its buttons,
+    then the shared clock is advanced once and the scheduler fires the timers of all of them.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+		for player, controls in enumerate(self.controls):
+			if controls.engine.game_over:
+				continue
+			queue = self.inputs[player]
+			if queue and queue[0][0] <= self.tick:
+				tick, self.buttons[player] = queue.popleft()
+				if tick < self.tick:
+					self.late_inputs += 1
+
+			# clients can't undo, that would let them take back the garbage they sent or rewrite their board
+			controls.apply(self.buttons[player] & INPUT_BUTTONS)
+
+		self.clock.advance(TICK_TIME)
+		self.scheduler.update()
+		self.tick += 1
+
+	def state(self, player):
+		"""
+    Packs a board's state: its engine snapshot followed by its controls snapshot.
+
+    Args:
+        player (int): The board.
+
+    Returns:
+        bytes: The state.
+    """
+		return self.engines[player].snapshot() + self.controls[player].snapshot()
+
+	def forfeit(self, player):
+		"""
+    Ends the game of a player who left.
+
+    Args:
+        player (int): The player's board.
+
+    Returns:
+        None
+    """
+		self.connections[player] = None
+		self.engines[player].game_over = True
+
+	def over(self):
+		"""
+    Checks if the match has ended: with one board when its game is over, with several when at most one is still playing.
+
+    Args:
+        None
+
+    Returns:
+        bool: True if the match has ended; otherwise, False.
+    """
+		playing = sum(not engine.game_over for engine in self.engines)
+		return playing == 0 if self.players == 1 else playing <= 1
+
+	def winner(self):
+		"""
+    Finds the board that won: the last one playing, or the highest score if the last boards lost at once.
+
+    Args:
+        None
+
+    Returns:
+        int: The board.
+    """
+		playing = [i for i, engine in enumerate(self.engines) if not engine.game_over]
+		return playing[0] if playing else max(range(self.players), key = lambda i: self.engines[i].current_score)
+
+class StreamConnection:
+	def __init__(self, reader, writer):
+		"""
+    Initializes a client connection over plain TCP, carrying the length-prefixed messages as they are.
+
+    Args:
+        reader (asyncio.StreamReader): The incoming side of the connection.
+        writer (asyncio.StreamWriter): The outgoing side of the connection.
+
+    Returns:
+        None
+    """
+		self.reader = reader
+		self.writer = writer
+		self.closed = False
+
+		# match joined and the board played in it
+		self.match = None
+		self.player = None
+
+	async def open(self):
+		"""
+    Sets the connection up before messages flow. Over TCP, small messages are sent right away instead of being held
+    back to fill a packet.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+		sock = self.writer.get_extra_info('socket')
+		if sock is not None:
+			sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+	async def read(self):
+		"""
+    Waits for the next bytes from the client.
+
+    Args:
+        None
+
+    Returns:
+        bytes: The bytes, empty when the client closed the connection.
+    """
+		return await self.reader.read(65536)
+
+	def write(self, data):
+		"""
+    Queues bytes to send to the client without waiting for them to go out.
+
+    Args:
+        data (bytes): The bytes.
+
+    Returns:
+        None
+    """
+		if not self.closed:
+			self.writer.write(data)
+
+	def buffered(self):
+		"""
+    Counts the bytes queued for the client that haven't been sent yet.
+
+    Args:
+        None
+
+    Returns:
+        int: The number of bytes.
+    """
+		return self.writer.transport.get_write_buffer_size()
+
+	def close(self):
+		"""
+    Closes the connection once the queued bytes are sent.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+		if not self.closed:
+			self.closed = True
+			self.writer.close()
+
+class WebSocketConnection(StreamConnection):
+	"""
+    A client connection over WebSocket, for browser clients. The same length-prefixed messages travel
+    in binary frames, and a message may be split across frames. Only what the protocol needs is handled:
+    the opening handshake, masked client frames up to MAX_MESSAGE_SIZE, pings and closing.
+    """
+
+	async def open(self):
+		"""
+    Answers the client's HTTP upgrade request.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+		await super().open()
+		request = await self.reader.readuntil(b'\r\n\r\n')
+		headers = {}
+		for line in request.decode('latin-1').split('\r\n')[1:]:
+			name, separator, value = line.partition(':')
+			if separator:
+				headers[name.strip().lower()] = value.strip()
+
+		key = headers.get('sec-websocket-key')
+		if headers.get('upgrade', '').lower() != 'websocket' or not key:
+			self.writer.write(b'HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n')
+			raise ConnectionError('not a WebSocket handshake')
+		accept = base64.b64encode(hashlib.sha1(key.encode('latin-1') + WEBSOCKET_GUID).digest())
+		self.writer.write(b'HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+			b'Sec-WebSocket-Accept: ' + accept + b'\r\n\r\n')
+
+	def send_frame(self, opcode, payload):
+		"""
+    Queues one unmasked WebSocket frame, as a server sends them.
+
+    Args:
+        opcode (int): The frame's opcode.
+        payload (bytes): The frame's payload.
+
+    Returns:
+        None
+    """
+		length = len(payload)
+		if length < 126:
+			header = bytes([0x80 | opcode, length])
+		elif length < 1 << 16:
+			header = bytes([0x80 | opcode, 126]) + length.to_bytes(2, 'big')
+		else:
+			header = bytes([0x80 | opcode, 127]) + length.to_bytes(8, 'big')
+		super().write(header + payload)
+
+	async def read(self):
+		"""
+    Waits for the next binary payload from the client, answering pings on the way.
+
+    Args:
+        None
+
+    Returns:
+        bytes: The payload, empty when the client closed the connection.
+    """
+		reader = self.reader
+		while True:
+			try:
+				header = await reader.readexactly(2)
+			except asyncio.IncompleteReadError:
+				return b''
+			opcode = header[0] & 0x0f
+			length = header[1] & 0x7f
+			if length == 126:
+				length = int.from_bytes(await reader.readexactly(2), 'big')
+			elif length == 127:
+				length = int.from_bytes(await reader.readexactly(8), 'big')
+			if length > MAX_MESSAGE_SIZE:
+				raise ValueError(f'frame of {length} bytes is too long')
+			if not header[1] & 0x80:
+				raise ValueError('client frames must be masked')
+			mask = await reader.readexactly(4)
+			payload = await reader.readexactly(length)
+
+			# unmask all bytes at once as one integer
+			mask = (mask * (length // 4 + 1))[:length]
+			payload = (int.from_bytes(payload, 'big') ^ int.from_bytes(mask, 'big')).to_bytes(length, 'big')
+
+			if opcode == CLOSE:
+				self.send_frame(CLOSE, payload[:2])
+				return b''
+			if opcode == WS_PING:
+				self.send_frame(WS_PONG, payload)
+			elif opcode == TEXT:
+				raise ValueError('text frames are not part of the protocol')
+			elif opcode in (BINARY, CONTINUATION) and payload:
+				return payload
+
+	def write(self, data):
+		"""
+    Queues bytes to send to the client in one binary frame.
+
+    Args:
+        data (bytes): The bytes.
+
+    Returns:
+        None
+    """
+		self.send_frame(BINARY, data)
+
+class GameServer:
+	def __init__(self, players = 2, columns = COLUMNS, rows = ROWS, seed = None):
+		"""
+    Initializes a server that runs many matches in one process on one asyncio event loop. Each connection is a task
+    that only waits on its socket, and a single ticker task steps every match in real time, so there is no thread
+    per game. After each step, the state diff of each board is encoded once and sent to all players of the match
+    in one write per connection.
+
+    Args:
+        players (int, optional): The number of boards in each match. Defaults to 2.
+        columns (int, optional): The width of the fields. Defaults to COLUMNS.
+        rows (int, optional): The height of the fields. Defaults to ROWS.
+        seed (int, optional): Seed for the match seeds. Defaults to None for a random seed.
+
+    Returns:
+        None
+    """
+		self.players = players
+		self.columns = columns
+		self.rows = rows
+		self.random = Random(seed)
+
+		# matches being played, and the one waiting for players
+		self.matches = []
+		self.waiting = None
+
+		# listening servers and the ticker task
+		self.servers = []
+		self.ticker = None
+
+		# seconds taken by the last steps of all matches, and a function called with each match that ends
+		self.step_times = deque(maxlen = STEP_TIMES)
+		self.on_end = None
+
+	async def start(self, host = '127.0.0.1', port = SERVER_PORT, websocket_port = None):
+		"""
+    Starts listening for clients and starts the ticker.
+
+    Args:
+        host (str, optional): The address to listen on. Defaults to '127.0.0.1'.
+        port (int, optional): The TCP port, 0 for any free port. Defaults to SERVER_PORT.
+        websocket_port (int, optional): The WebSocket port. Defaults to None for no WebSocket clients.
+
+    Returns:
+        int: The TCP port listened on.
+    """
+		self.servers.append(await asyncio.start_server(partial(self.serve, StreamConnection), host, port))
+		if websocket_port is not None:
+			self.servers.append(await asyncio.start_server(partial(self.serve, WebSocketConnection), host, websocket_port))
+		self.ticker = asyncio.create_task(self.run_ticks())
+		return self.servers[0].sockets[0].getsockname()[1]
+
+	async def stop(self):
+		"""
+    Stops listening and stops the ticker.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+		for server in self.servers:
+			server.close()
+			await server.wait_closed()
+		if self.ticker:
+			self.ticker.cancel()
+
+	async def serve(self, connection_class, reader, writer):
+		"""
+    Handles one client from connecting to leaving.
+
+    Args:
+        connection_class (type): StreamConnection or WebSocketConnection.
+        reader (asyncio.StreamReader): The incoming side of the connection.
+        writer (asyncio.StreamWriter): The outgoing side of the connection.
+
+    Returns:
+        None
+    """
+		connection = connection_class(reader, writer)
+		buffer = bytearray()
+		try:
+			await connection.open()
+			while not connection.closed:
+				data = await connection.read()
+				if not data:
+					break
+				buffer += data
+				for message in unframe(buffer):
+					self.handle(connection, message)
+		except (ConnectionError, ValueError, IndexError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+			pass
+		finally:
+			self.leave(connection)
+			connection.close()
+
+	def handle(self, connection, message):
+		"""
+    Handles one message from a client. Buttons other than INPUT_BUTTONS, or inputs for steps more than
+    MAX_INPUT_LEAD_TICKS ahead of the match, raise a ConnectionError, which drops the client.
+
+    Args:
+        connection (StreamConnection): The client's connection.
+        message (bytes): The message.
+
+    Returns:
+        None
+    """
+		kind = message[0]
+		if kind == INPUT:
+			tick, buttons, pos = decode_values(message, 2)
+			if buttons & ~INPUT_BUTTONS:
+				raise ConnectionError(f'buttons {buttons} are not allowed')
+			match = connection.match
+			if match is not None and match is not self.waiting:
+				if tick > match.tick + MAX_INPUT_LEAD_TICKS:
+					raise ConnectionError(f'input for step {tick} is too far ahead of step {match.tick}')
+				match.queue_input(connection.player, tick, buttons)
+		elif kind == PING:
+			stamp, pos = decode_values(message, 1)
+			connection.write(frame(encode_message(PONG, stamp)))
+		elif kind == JOIN:
+			version, pos = decode_values(message, 1)
+			if version != PROTOCOL_VERSION:
+				raise ConnectionError(f'protocol version {version} is not supported')
+			if connection.match is None:
+				self.join(connection)
+
+	def join(self, connection):
+		"""
+    Puts a client in the waiting match, and starts the match once it has all its players.
+
+    Args:
+        connection (StreamConnection): The client's connection.
+
+    Returns:
+        None
+    """
+		if self.waiting is None:
+			self.waiting = Match(self.random.getrandbits(32), self.players, self.columns, self.rows)
+		match = self.waiting
+		connection.match = match
+		connection.player = len(match.connections)
+		match.connections.append(connection)
+		if len(match.connections) < match.players:
+			return
+
+		self.waiting = None
+		self.matches.append(match)
+
+		# clients need the seed to predict their boards, which also lets a modified client see every shape to come;
+		# the server still decides where each piece lands
+		for player, connection in enumerate(match.connections):
+			connection.write(frame(encode_message(WELCOME, player, match.players, match.seed, match.columns, match.rows)))
+
+	def leave(self, connection):
+		"""
+    Takes a client that left out of its match. Leaving a match being played forfeits the board.
+
+    Args:
+        connection (StreamConnection): The client's connection.
+
+    Returns:
+        None
+    """
+		match = connection.match
+		connection.match = None
+		if match is None:
+			return
+		if match is self.waiting:
+			match.connections.remove(connection)
+			for player, waiting in enumerate(match.connections):
+				waiting.player = player
+			if not match.connections:
+				self.waiting = None
+		elif match in self.matches:
+			match.forfeit(connection.player)
+			if not any(match.connections):
+				self.matches.remove(match)
+
+	def end_match(self, match):
+		"""
+    Removes a match that ended and closes its connections once the last messages are sent.
+
+    Args:
+        match (Match): The match.
+
+    Returns:
+        None
+    """
+		self.matches.remove(match)
+		for connection in match.connections:
+			if connection:
+				connection.match = None
+				connection.close()
+		if self.on_end:
+			self.on_end(match)
+
+	def step(self):
+		"""
+    Advances every match by one simulation step. A match that fails is ended and logged, and the others carry on.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+		for match in list(self.matches):
+			try:
+				self.step_match(match)
+			except Exception:
+				print(f'Match {match.seed} failed and was ended', file = sys.stderr)
+				traceback.print_exc()
+				if match in self.matches:
+					self.end_match(match)
+
+	def step_match(self, match):
+		"""
+    Advances a match by one simulation step and sends each of its players the diffs of all its boards,
+    followed by the winner if the match ended. Clients that fall too far behind reading are dropped.
+
+    Args:
+        match (Match): The match.
+
+    Returns:
+        None
+    """
+		match.step()
+		messages = bytearray()
+		for board in range(match.players):
+			state = match.state(board)
+			messages += frame(encode_message(STATE, match.tick, board, data = encode_diff(match.sent[board], state)))
+			match.sent[board] = state
+		over = match.over()
+		if over:
+			messages += frame(encode_message(END, match.winner()))
+
+		messages = bytes(messages)
+		for connection in match.connections:
+			if connection:
+				connection.write(messages)
+				if connection.buffered() > MAX_WRITE_BUFFER:
+					connection.close()
+		if over:
+			self.end_match(match)
+
+	async def run_ticks(self):
+		"""
+    Steps the matches every TICK_TIME milliseconds of real time. After a stall, at most MAX_FRAME_TIME
+    milliseconds are caught up on.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+		loop = asyncio.get_running_loop()
+		next_time = loop.time()
+		while True:
+			now = loop.time()
+			next_time = max(next_time, now - MAX_FRAME_TIME / 1000)
+			while next_time <= now:
+				start = perf_counter()
+				self.step()
+				self.step_times.append(perf_counter() - start)
+				next_time += TICK_TIME / 1000
+			await asyncio.sleep(next_time - loop.time())
+
+class LoopbackClient:
+	# buttons the stand-in taps, dropping less often than it moves
+	BUTTONS = (LEFT, RIGHT, ROTATE, ROTATE, DOWN, DROP)
+
+	def __init__(self, seed = None, tap_chance = 0.2):
+		"""
+    Initializes a stand-in client for testing the server over the loopback interface. It joins a match, taps random
+    buttons ahead of the server like a real client, and keeps a copy of every board from the diffs it receives,
+    which should end up the same as the server's.
+
+    Args:
+        seed (int, optional): Seed for the buttons. Defaults to None for a random seed.
+        tap_chance (float, optional): The chance of changing the held buttons each time states arrive. Defaults to 0.2.
+
+    Returns:
+        None
+    """
+		self.random = Random(seed)
+		self.tap_chance = tap_chance
+
+		# match, set by the welcome message
+		self.player = None
+		self.seed = None
+		self.states = []
+		self.tick = 0
+		self.winner = None
+
+	async def play(self, host = '127.0.0.1', port = SERVER_PORT):
+		"""
+    Plays one match until it ends or the server closes the connection.
+
+    Args:
+        host (str, optional): The server's address. Defaults to '127.0.0.1'.
+        port (int, optional): The server's TCP port. Defaults to SERVER_PORT.
+
+    Returns:
+        None
+    """
+		reader, writer = await asyncio.open_connection(host, port)
+		writer.write(frame(encode_message(JOIN, PROTOCOL_VERSION)))
+		buffer = bytearray()
+		buttons = 0
+		try:
+			while self.winner is None:
+				data = await reader.read(65536)
+				if not data:
+					break
+				buffer += data
+				for message in unframe(buffer):
+					kind = message[0]
+					if kind == STATE:
+						tick, board, pos = decode_values(message, 2)
+						self.states[board] = apply_diff(self.states[board], message, pos)
+						self.tick = max(self.tick, tick)
+					elif kind == WELCOME:
+						self.player, players, self.seed, columns, rows, pos = decode_values(message, 5)
+						self.states = [bytes(state_size(columns, rows))] * players
+					elif kind == END:
+						self.winner, pos = decode_values(message, 1)
+
+				if self.player is not None and self.random.random() < self.tap_chance:
+					buttons = 0 if buttons else self.random.choice(self.BUTTONS)
+					writer.write(frame(encode_message(INPUT, self.tick + INPUT_LEAD_TICKS, buttons)))
+		finally:
+			writer.close()
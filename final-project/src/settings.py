@@ -1,8 +1,11 @@
-import pygame
-
 # Constants for the Tetris game
 COLUMNS = 10
 ROWS = 20
+
+# smallest field, an I lying flat must fit and turn
+MIN_COLUMNS = 4
+MIN_ROWS = 4
+
 BLOCK_SIZE = 40
 GAME_WIDTH, GAME_HEIGHT = COLUMNS * BLOCK_SIZE, ROWS * BLOCK_SIZE
 
@@ -14,12 +17,59 @@ PADDING = 20
 WINDOW_WIDTH = GAME_WIDTH + SIDEBAR_WIDTH + PADDING * 3
 WINDOW_HEIGHT = GAME_HEIGHT + PADDING * 2
 
+# wider fields get smaller blocks to fit MAX_GAME_WIDTH, taller fields scroll to keep the Tetromino
+# SCROLL_MARGIN rows from the edges of the view
+MAX_GAME_WIDTH = 1200
+MIN_BLOCK_SIZE = 8
+SCROLL_MARGIN = 2
+
 UPDATE_SPEED = 800
-MOVE_WAIT_TIME = 100
-ROTATE_WAIT_TIME = 200
-DROP_WAIT_TIME = 400
-BLOCK_OFFSET = pygame.Vector2(COLUMNS // 2, -1)
+TICK_RATE = 60
+TICK_TIME = 1000 / TICK_RATE
+MAX_FRAME_TIME = 250
+DAS_TIME = 167
+ARR_TIME = 33
+UNDO_LIMIT = 50
+BLOCK_OFFSET = (COLUMNS // 2, -1)
 SCORE_DATA = {1: 40, 2: 100, 3: 300, 4: 1200}
+LEVEL_LINES = 10
+LEVEL_SPEEDUP = 0.75
+PROFILE_OVERLAY_FRAMES = 30
+PROFILE_FONT_SIZE = 16
+
+# versus, garbage lines sent for clearing 1 to 4 lines at once
+GARBAGE_LINES = {1: 0, 2: 1, 3: 2, 4: 4}
+GARBAGE = 'G'
+
+# boards beyond two are laid out as a wall filling WALL_WIDTH by WALL_HEIGHT,
+# with the score in a strip of STATUS_HEIGHT below each board
+WALL_WIDTH = 1600
+WALL_HEIGHT = 900
+STATUS_HEIGHT = 54
+STATUS_FONT_SIZE = 14
+
+# bots that may plan a placement on each simulation step, the others wait for the next step
+BOT_PLANS_PER_STEP = 1
+
+# work a bot's search may do on one simulation step, counted as the rows and columns measured for each field it tries.
+# A search on a big field that needs more carries on over the next steps while the Tetromino falls
+BOT_SEARCH_WORK = 20000
+
+# networked matches: the server's TCP and WebSocket ports, how many steps clients play ahead of the server
+# so their inputs arrive in time, the input changes queued for a player, and the bytes waiting to be sent
+# to a client before it is dropped as too slow
+SERVER_PORT = 7777
+WEBSOCKET_PORT = 7778
+INPUT_LEAD_TICKS = 2
+MAX_QUEUED_INPUTS = 32
+
+# inputs stamped further ahead of a match than this many steps are refused, no client playing live gets that far ahead
+MAX_INPUT_LEAD_TICKS = TICK_RATE
+MAX_WRITE_BUFFER = 1 << 18
+
+# spectator streams start over from a keyframe with every board's whole state this many simulation steps apart,
+# 10 seconds at 60 steps per second
+STREAM_KEYFRAME_INTERVAL = 600
 
 # Colors
 YELLOW = (255, 213, 0)
@@ -30,6 +80,7 @@ ORANGE = (255, 151, 28)
 CYAN = (108, 198, 217)
 PURPLE = (123, 33, 127)
 GRAY = (28, 28, 28)
+GARBAGE_COLOR = (110, 110, 110)
 LINE_COLOR = (255, 255, 255)
 
 # shapes
@@ -41,4 +92,30 @@ TETROMINOS = {
 	'I': {'shape': [(0,0), (0,-1), (0,-2), (0,1)], 'color': CYAN},
 	'S': {'shape': [(0,0), (-1,0), (0,-1), (1,-1)], 'color': GREEN},
 	'Z': {'shape': [(0,0), (1,0), (0,-1), (-1,-1)], 'color': RED}
-}
\ No newline at end of file
+}
+
+# wall kicks, tried in order when a rotation collides
+# (x, y) offsets with y pointing down like the field, keyed by (from, to) rotation
+# rotations are 0 = spawn, 1 = R, 2 = 180, 3 = L
+WALL_KICKS = {
+	'JLSTZ': {
+		(0,1): [(0,0), (-1,0), (-1,-1), (0,2), (-1,2)],
+		(1,0): [(0,0), (1,0), (1,1), (0,-2), (1,-2)],
+		(1,2): [(0,0), (1,0), (1,1), (0,-2), (1,-2)],
+		(2,1): [(0,0), (-1,0), (-1,-1), (0,2), (-1,2)],
+		(2,3): [(0,0), (1,0), (1,-1), (0,2), (1,2)],
+		(3,2): [(0,0), (-1,0), (-1,1), (0,-2), (-1,-2)],
+		(3,0): [(0,0), (-1,0), (-1,1), (0,-2), (-1,-2)],
+		(0,3): [(0,0), (1,0), (1,-1), (0,2), (1,2)]
+	},
+	'I': {
+		(0,1): [(0,0), (-2,0), (1,0), (-2,1), (1,-2)],
+		(1,0): [(0,0), (2,0), (-1,0), (2,-1), (-1,2)],
+		(1,2): [(0,0), (-1,0), (2,0), (-1,-2), (2,1)],
+		(2,1): [(0,0), (1,0), (-2,0), (1,2), (-2,-1)],
+		(2,3): [(0,0), (2,0), (-1,0), (2,-1), (-1,2)],
+		(3,2): [(0,0), (-2,0), (1,0), (-2,1), (1,-2)],
+		(3,0): [(0,0), (1,0), (-2,0), (1,2), (-2,-1)],
+		(0,3): [(0,0), (-1,0), (2,0), (-1,-2), (2,1)]
+	}
+}
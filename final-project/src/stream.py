@@ -0,0 +1,508 @@
+import struct
+from functools import partial
+from .settings import *
+from .tetrominos import ROTATIONS
+from .board import SHAPE_CODES, CODE_SHAPES
+from .engine import SNAPSHOT
+from .encoding import encode_varint, decode_varint, encode_signed, decode_signed
+from .network import encode_diff, apply_diff
+
+STREAM_MAGIC = b'TSTM'
+STREAM_VERSION = 1
+STREAM_HEADER = struct.Struct('<4sB')
+
+# frame types, the first byte of every frame: a key frame holds every board's whole state
+# and its absolute step, a delta frame the changes since the frame before and the steps since it
+KEY_FRAME = 1
+DELTA_FRAME = 2
+
+# record kinds, each record is a varint board, the kind byte and its data
+FULL = 1      # varint length, engine snapshot with the cells
+SPAWN = 2     # shape code, code of the shape that joined the preview queue
+MOVE = 3      # zigzag varint columns and rows moved
+ROTATE = 4    # rotation, zigzag varint columns and rows kicked
+LOCK = 5      # shape code, zigzag varint column and row, rotation
+CLEAR = 6     # varint count, varint rows from the bottom up
+SCORE = 7     # varint score, lines and level
+CELLS = 8     # varint length, diff of the cells
+PREVIEW = 9   # varint count, shape codes
+OVER = 10     # game over byte
+
+class BoardView:
+	def __init__(self, columns = COLUMNS, rows = ROWS):
+		"""
+    Initializes what a spectator knows of a board: the cells, the falling Tetromino, the preview queue,
+    the score and whether the game is over. It is kept up to date by the records of a stream,
+    and is empty until the first key frame.
+
+    Args:
+        columns (int, optional): The width of the field. Defaults to COLUMNS.
+        rows (int, optional): The height of the field. Defaults to ROWS.
+
+    Returns:
+        None
+    """
+		self.columns = columns
+		self.rows = rows
+		self.cells = bytearray(columns * rows)
+
+		# falling Tetromino, None until the first key frame
+		self.shape = None
+		self.x, self.y = columns // 2, BLOCK_OFFSET[1]
+		self.rotation = 0
+		self.next_shapes = []
+
+		self.score = 0
+		self.lines = 0
+		self.level = 1
+		self.game_over = False
+
+		# rows taken out by the last line clear, bottom up, for an overlay to flash
+		self.cleared_rows = []
+
+	def load(self, snapshot):
+		"""
+    Takes the whole state from an engine snapshot.
+
+    Args:
+        snapshot (bytes): A snapshot from Engine.snapshot.
+
+    Returns:
+        None
+    """
+		(time, random_state, garbage_state, pending_garbage, self.game_over, down_speed, down_pressed, start_time, active,
+			self.score, self.lines, self.level, pieces,
+			shape, self.x, self.y, self.rotation, next_shapes) = SNAPSHOT.unpack_from(snapshot)
+		self.cells[:] = snapshot[SNAPSHOT.size:]
+		self.shape = CODE_SHAPES[shape]
+		self.next_shapes = [CODE_SHAPES[code] for code in next_shapes]
+
+	def blocks(self):
+		"""
+    Finds the cells of the falling Tetromino.
+
+    Args:
+        None
+
+    Returns:
+        list: The (x, y) cells of the blocks.
+    """
+		return [(self.x + dx, self.y + dy) for dx, dy in ROTATIONS[self.shape][self.rotation]]
+
+	def place(self, shape, x, y, rotation):
+		"""
+    Writes a locked Tetromino's cells into the field, leaving out cells above it like Board.place.
+
+    Args:
+        shape (str): The Tetromino's shape.
+        x (int): The column of its pivot block.
+        y (int): The row of its pivot block.
+        rotation (int): Its rotation.
+
+    Returns:
+        None
+    """
+		code = SHAPE_CODES[shape]
+		for dx, dy in ROTATIONS[shape][rotation]:
+			if 0 <= y + dy < self.rows:
+				self.cells[(y + dy) * self.columns + x + dx] = code
+
+	def full_rows(self, rows):
+		"""
+    Finds the full rows among some rows.
+
+    Args:
+        rows (iterable): The row indexes to check.
+
+    Returns:
+        list: The full rows, bottom up.
+    """
+		columns = self.columns
+		return sorted((y for y in set(rows) if 0 <= y < self.rows and self.cells.find(0, y * columns, (y + 1) * columns) < 0),
+			reverse = True)
+
+	def clear(self, cleared_rows):
+		"""
+    Takes full rows out of the field and moves the rows above them down, like Board.clear_rows.
+
+    Args:
+        cleared_rows (list): The row indexes.
+
+    Returns:
+        None
+    """
+		columns = self.columns
+		kept = [self.cells[y * columns:(y + 1) * columns] for y in range(self.rows) if y not in cleared_rows]
+		self.cells[:] = bytes(columns * len(cleared_rows)) + b''.join(kept)
+		self.cleared_rows = cleared_rows
+
+	def apply(self, kind, data, pos):
+		"""
+    Applies one record.
+
+    Args:
+        kind (int): The record kind.
+        data (bytes): The data holding the record.
+        pos (int): The index of the first byte after the kind.
+
+    Returns:
+        int: The index of the first byte after the record.
+    """
+		if kind == MOVE:
+			dx, pos = decode_signed(data, pos)
+			dy, pos = decode_signed(data, pos)
+			self.x += dx
+			self.y += dy
+		elif kind == ROTATE:
+			self.rotation = data[pos]
+			dx, pos = decode_signed(data, pos + 1)
+			dy, pos = decode_signed(data, pos)
+			self.x += dx
+			self.y += dy
+		elif kind == SPAWN:
+			self.shape = CODE_SHAPES[data[pos]]
+			self.next_shapes = self.next_shapes[1:] + [CODE_SHAPES[data[pos + 1]]]
+			self.x, self.y = self.columns // 2, BLOCK_OFFSET[1]
+			self.rotation = 0
+			pos += 2
+		elif kind == LOCK:
+			shape = CODE_SHAPES[data[pos]]
+			x, pos = decode_signed(data, pos + 1)
+			y, pos = decode_signed(data, pos)
+			self.place(shape, x, y, data[pos])
+			pos += 1
+		elif kind == CLEAR:
+			count, pos = decode_varint(data, pos)
+			cleared_rows = []
+			for i in range(count):
+				row, pos = decode_varint(data, pos)
+				cleared_rows.append(row)
+			self.clear(cleared_rows)
+		elif kind == SCORE:
+			self.score, pos = decode_varint(data, pos)
+			self.lines, pos = decode_varint(data, pos)
+			self.level, pos = decode_varint(data, pos)
+		elif kind == CELLS:
+			length, pos = decode_varint(data, pos)
+			self.cells[:] = apply_diff(self.cells, data[pos:pos + length])
+			pos += length
+		elif kind == PREVIEW:
+			count, pos = decode_varint(data, pos)
+			self.next_shapes = [CODE_SHAPES[code] for code in data[pos:pos + count]]
+			pos += count
+		elif kind == OVER:
+			self.game_over = bool(data[pos])
+			pos += 1
+		elif kind == FULL:
+			length, pos = decode_varint(data, pos)
+			self.load(data[pos:pos + length])
+			pos += length
+		else:
+			raise ValueError(f'unknown record kind {kind}')
+		return pos
+
+def encode_header(boards, columns, rows):
+	"""
+    Encodes the header a stream starts with.
+
+    Args:
+        boards (int): The number of boards in the stream.
+        columns (int): The width of the fields.
+        rows (int): The height of the fields.
+
+    Returns:
+        bytes: The header.
+    """
+	return STREAM_HEADER.pack(STREAM_MAGIC, STREAM_VERSION) + encode_varint(boards) + encode_varint(columns) + encode_varint(rows)
+
+class StreamWriter:
+	def __init__(self, engines, file = None, keyframe_interval = STREAM_KEYFRAME_INTERVAL):
+		"""
+    Initializes a stream of the changes of a set of boards, for spectators and broadcast overlays.
+    Each frame says what happened on each board since the last one in the terms of the rules: pieces spawning,
+    moving, rotating and locking, lines clearing and the score changing, a few bytes for each. Locks are reported
+    by the engines as they happen, so none are missed when frames are further apart than a simulation step.
+    Anything else that changed the field, such as garbage or an undo, is sent as a diff of the cells.
+    Every keyframe_interval steps a key frame holds the whole state of every board, so spectators can join
+    from the latest key frame. The writer keeps the boards as its spectators see them and only sends what differs.
+
+    Args:
+        engines (list): The engines of the boards.
+        file (file, optional): A binary file the header and every frame are written to. Defaults to None.
+        keyframe_interval (int, optional): Simulation steps between key frames. Defaults to STREAM_KEYFRAME_INTERVAL.
+
+    Returns:
+        None
+    """
+		self.file = file
+		self.keyframe_interval = keyframe_interval
+		self.header = encode_header(len(engines), engines[0].board.width, engines[0].board.height)
+		if file:
+			file.write(self.header)
+
+		# steps streamed so far, and the step of the last frame
+		self.tick = 0
+		self.frame_tick = 0
+
+		# latest key frame and the delta frames since, all a late joiner needs
+		self.keyframe = None
+		self.keyframe_tick = 0
+		self.deltas = []
+
+		self.attach(engines)
+
+	def attach(self, engines):
+		"""
+    Streams a new set of engines of the same size, such as after a restart. The next frame is a key frame.
+
+    Args:
+        engines (list): The engines of the boards.
+
+    Returns:
+        None
+    """
+		self.engines = engines
+		self.views = [BoardView(engine.board.width, engine.board.height) for engine in engines]
+		self.tetrominos = [None] * len(engines)
+		self.locks = [[] for engine in engines]
+		for board, engine in enumerate(engines):
+			engine.on_lock = partial(self.locked, board)
+		self.keyframe = None
+		self.deltas = []
+
+	def locked(self, board, tetromino):
+		"""
+    Keeps a Tetromino that locked, as an engine's on_lock function.
+
+    Args:
+        board (int): The board it locked on.
+        tetromino (Tetromino): The Tetromino.
+
+    Returns:
+        None
+    """
+		self.locks[board].append((tetromino.shape, tetromino.x, tetromino.y, tetromino.rotation))
+
+	def board_records(self, board):
+		"""
+    Encodes the records that bring a spectator's view of a board up to date, and applies them to the writer's view.
+
+    Args:
+        board (int): The board.
+
+    Returns:
+        bytes: The records.
+    """
+		engine = self.engines[board]
+		view = self.views[board]
+		prefix = encode_varint(board)
+		data = bytearray()
+
+		def record(kind, payload):
+			data.extend(prefix)
+			data.append(kind)
+			data.extend(payload)
+			view.apply(kind, payload, 0)
+
+		# the engine clears the rows a Tetromino completed, unless it locked above the field and ended the game
+		for shape, x, y, rotation in self.locks[board]:
+			record(LOCK, bytes([SHAPE_CODES[shape]]) + encode_signed(x) + encode_signed(y) + bytes([rotation]))
+			rows = [y + dy for dx, dy in ROTATIONS[shape][rotation]]
+			cleared_rows = view.full_rows(rows) if min(rows) >= 0 else []
+			if cleared_rows:
+				record(CLEAR, encode_varint(len(cleared_rows)) + b''.join(encode_varint(row) for row in cleared_rows))
+		self.locks[board].clear()
+
+		tetromino = engine.tetromino
+		if tetromino is not self.tetrominos[board]:
+			self.tetrominos[board] = tetromino
+			record(SPAWN, bytes([SHAPE_CODES[tetromino.shape], SHAPE_CODES[engine.next_shapes[-1]]]))
+		if view.next_shapes != engine.next_shapes:
+			record(PREVIEW, encode_varint(len(engine.next_shapes)) + bytes(SHAPE_CODES[shape] for shape in engine.next_shapes))
+
+		if tetromino.rotation != view.rotation:
+			record(ROTATE, bytes([tetromino.rotation]) + encode_signed(tetromino.x - view.x) + encode_signed(tetromino.y - view.y))
+		elif (tetromino.x, tetromino.y) != (view.x, view.y):
+			record(MOVE, encode_signed(tetromino.x - view.x) + encode_signed(tetromino.y - view.y))
+
+		if view.cells != engine.board.cells:
+			diff = encode_diff(view.cells, engine.board.cells)
+			record(CELLS, encode_varint(len(diff)) + diff)
+		if (view.score, view.lines, view.level) != (engine.current_score, engine.current_lines, engine.current_level):
+			record(SCORE, encode_varint(engine.current_score) + encode_varint(engine.current_lines) + encode_varint(engine.current_level))
+		if view.game_over != engine.game_over:
+			record(OVER, bytes([engine.game_over]))
+		return bytes(data)
+
+	def write_frame(self, ticks = 1):
+		"""
+    Streams the changes of the boards over some simulation steps as one frame, or a key frame when one is due.
+    Nothing is sent when nothing changed, the steps are counted in the next frame.
+
+    Args:
+        ticks (int, optional): The simulation steps since the last call. Defaults to 1.
+
+    Returns:
+        bytes: The frame, empty if nothing changed.
+    """
+		self.tick += ticks
+		if self.keyframe is None or self.tick - self.keyframe_tick >= self.keyframe_interval:
+			records = bytearray()
+			for board, engine in enumerate(self.engines):
+				snapshot = engine.snapshot()
+				self.views[board].load(snapshot)
+				self.tetrominos[board] = engine.tetromino
+				self.locks[board].clear()
+				records += encode_varint(board) + bytes([FULL]) + encode_varint(len(snapshot)) + snapshot
+			frame = bytes([KEY_FRAME]) + encode_varint(self.tick) + encode_varint(len(records)) + records
+			self.keyframe = frame
+			self.keyframe_tick = self.tick
+			self.deltas = []
+		else:
+			records = b''.join(self.board_records(board) for board in range(len(self.engines)))
+			if not records:
+				return b''
+			frame = bytes([DELTA_FRAME]) + encode_varint(self.tick - self.frame_tick) + encode_varint(len(records)) + records
+			self.deltas.append(frame)
+
+		self.frame_tick = self.tick
+		if self.file:
+			self.file.write(frame)
+		return frame
+
+	def join(self):
+		"""
+    Encodes what a spectator joining now needs: the header, the latest key frame and the frames since.
+
+    Args:
+        None
+
+    Returns:
+        bytes: The start of a stream.
+    """
+		return self.header + (self.keyframe or b'') + b''.join(self.deltas)
+
+class StreamReader:
+	def __init__(self):
+		"""
+    Initializes a spectator's reader of a stream, fed bytes as they arrive over a connection or from a file.
+    Delta frames before the first key frame are skipped, so a reader can also start at any key frame.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+		self.buffer = bytearray()
+		self.views = None
+		self.tick = 0
+		self.synced = False
+
+	def read_header(self):
+		"""
+    Reads the header off the front of the buffer once it has all arrived, and makes a view for each board.
+
+    Args:
+        None
+
+    Returns:
+        bool: True if the header was read; otherwise, False.
+    """
+		buffer = self.buffer
+		if len(buffer) < STREAM_HEADER.size:
+			return False
+		magic, version = STREAM_HEADER.unpack_from(buffer)
+		if magic != STREAM_MAGIC or version != STREAM_VERSION:
+			raise ValueError('Not a supported stream')
+		try:
+			boards, pos = decode_varint(buffer, STREAM_HEADER.size)
+			columns, pos = decode_varint(buffer, pos)
+			rows, pos = decode_varint(buffer, pos)
+		except IndexError:
+			return False
+		self.views = [BoardView(columns, rows) for board in range(boards)]
+		del buffer[:pos]
+		return True
+
+	def feed(self, data):
+		"""
+    Reads the complete frames in the bytes received so far and applies them to the views.
+
+    Args:
+        data (bytes): The bytes received since the last call.
+
+    Returns:
+        int: The number of frames applied.
+    """
+		self.buffer += data
+		if self.views is None and not self.read_header():
+			return 0
+
+		buffer = self.buffer
+		frames = 0
+		pos = 0
+		while pos < len(buffer):
+			try:
+				tick, start = decode_varint(buffer, pos + 1)
+				length, start = decode_varint(buffer, start)
+			except IndexError:
+				break
+			end = start + length
+			if end > len(buffer):
+				break
+
+			frame_type = buffer[pos]
+			if frame_type == KEY_FRAME:
+				self.tick = tick
+				self.synced = True
+			elif frame_type == DELTA_FRAME:
+				self.tick += tick
+			else:
+				raise ValueError(f'unknown frame type {frame_type}')
+
+			if self.synced:
+				data = bytes(buffer[start:end])
+				record_pos = 0
+				while record_pos < length:
+					board, record_pos = decode_varint(data, record_pos)
+					record_pos = self.views[board].apply(data[record_pos], data, record_pos + 1)
+				frames += 1
+			pos = end
+		del buffer[:pos]
+		return frames
+
+def header_size(data):
+	"""
+    Finds the length of a stream's header, the fixed part followed by the varint board count and field size.
+
+    Args:
+        data (bytes): The stream.
+
+    Returns:
+        int: The length in bytes.
+    """
+	pos = STREAM_HEADER.size
+	for field in range(3):
+		value, pos = decode_varint(data, pos)
+	return pos
+
+def keyframe_offsets(data):
+	"""
+    Finds where the key frames of a stream file start, by skipping over the frames with their lengths.
+
+    Args:
+        data (bytes): The whole stream, with its header.
+
+    Returns:
+        list: The index of the first byte of each key frame.
+    """
+	pos = header_size(data)
+	offsets = []
+	while pos < len(data):
+		if data[pos] == KEY_FRAME:
+			offsets.append(pos)
+		tick, start = decode_varint(data, pos + 1)
+		length, start = decode_varint(data, start)
+		pos = start + length
+	return offsets
@@ -1,29 +1,98 @@
 from .settings import *
 
+def rotate_offsets(offsets):
+	"""
+    Rotates block offsets 90 degrees clockwise around the pivot block at (0, 0).
+
+    Args:
+        offsets (tuple): The (x, y) offsets of the blocks from the pivot.
+
+    Returns:
+        tuple: The rotated (x, y) offsets.
+    """
+	return tuple((-y, x) for x, y in offsets)
+
+def build_rotations(shape):
+	"""
+    Builds the block offsets of a shape for each rotation (0, R, 2, L).
+
+    Args:
+        shape (str): The type of Tetromino (e.g., 'I', 'O', 'T', etc.).
+
+    Returns:
+        tuple: Four tuples of (x, y) offsets, indexed by rotation.
+    """
+	offsets = tuple(TETROMINOS[shape]['shape'])
+	if shape == 'O':
+		return (offsets,) * 4
+
+	rotations = [offsets]
+	for rotation in range(3):
+		rotations.append(rotate_offsets(rotations[-1]))
+	return tuple(rotations)
+
+# integer offsets for every shape and rotation, built once
+ROTATIONS = {shape: build_rotations(shape) for shape in TETROMINOS}
+
+# wall kicks for every shape, the O piece does not rotate
+KICKS = {shape: WALL_KICKS['I' if shape == 'I' else 'JLSTZ'] for shape in TETROMINOS if shape != 'O'}
+
 class Tetromino:
-	def __init__(self, shape, group, create_new_tetromino, field_data):
+	def __init__(self, shape, create_new_tetromino, board):
 		"""
-	Initializes a Tetromino instance with its shape, group, and position data.
+	Initializes a Tetromino instance with its shape and position data.
 
     Args:
         shape (str): The type of Tetromino (e.g., 'I', 'O', 'T', etc.).
-        group (object): The group to which the Tetromino's blocks belong.
         create_new_tetromino (function): A function to create a new Tetromino when the current one is placed.
-        field_data (list): A 2D list representing the game field's current state.
+        board (Board): The game field the Tetromino moves on.
 
     Returns:
         None
 	"""
-		# setup 
+		# setup
 		self.shape = shape
 		self.block_positions = TETROMINOS[shape]['shape']
 		self.color = TETROMINOS[shape]['color']
 		self.create_new_tetromino = create_new_tetromino
-		self.field_data = field_data
+		self.board = board
+
+		# position of the pivot block and current rotation
+		self.x, self.y = board.spawn
+		self.rotation = 0
+		self.rotations = ROTATIONS[shape]
 
-		# create blocks
-		self.blocks = [Block(group, pos, self.color) for pos in self.block_positions]
-	
+		# create blocks as integer (x, y) field cells
+		self.blocks = self.cells(self.x, self.y, self.rotation)
+
+	def cells(self, x, y, rotation):
+		"""
+    Looks up the field cells the Tetromino would cover at a given position and rotation.
+
+    Args:
+        x (int): The column of the pivot block.
+        y (int): The row of the pivot block.
+        rotation (int): The rotation index (0 = spawn, 1 = R, 2 = 180, 3 = L).
+
+    Returns:
+        list: The (x, y) cells of the blocks.
+    """
+		return [(x + dx, y + dy) for dx, dy in self.rotations[rotation]]
+
+	def set_position(self, x, y, rotation):
+		"""
+    Moves the Tetromino's pivot to a new position and rotation.
+
+    Args:
+        x (int): The column of the pivot block.
+        y (int): The row of the pivot block.
+        rotation (int): The rotation index.
+
+    Returns:
+        None
+    """
+		self.x, self.y, self.rotation = x, y, rotation
+		self.blocks = self.cells(x, y, rotation)
 
 	# collisions
 	def next_move_horizontal_collide(self, blocks, amount):
@@ -31,31 +100,29 @@ class Tetromino:
     Checks if the Tetromino will collide with another object when moving horizontally.
 
     Args:
-        blocks (list): A list of Block objects representing the Tetromino.
+        blocks (list): A list of (x, y) cells representing the Tetromino.
         amount (int): The number of units to move horizontally.
 
     Returns:
         bool: True if a collision is detected; otherwise, False.
     """
-		collision_list = [block.horizontal_collide(int(block.pos.x + amount), self.field_data) for block in self.blocks]
-		return True if any(collision_list) else False
+		return self.board.collide([(x + amount, y) for x, y in blocks])
 
 	def next_move_vertical_collide(self, blocks, amount):
 		"""
     Checks if the Tetromino will collide with another object when moving vertically.
 
     Args:
-        blocks (list): A list of Block objects representing the Tetromino.
+        blocks (list): A list of (x, y) cells representing the Tetromino.
         amount (int): The number of units to move vertically.
 
     Returns:
         bool: True if a collision is detected; otherwise, False.
     """
-		collision_list = [block.vertical_collide(int(block.pos.y + amount), self.field_data) for block in self.blocks]
-		return True if any(collision_list) else False
+		return self.board.collide([(x, y + amount) for x, y in blocks])
 
 	# movement
-	def move_horizontal(self, amount): 
+	def move_horizontal(self, amount):
 		"""
     Moves the Tetromino horizontally if no collision is detected.
 
@@ -66,8 +133,7 @@ class Tetromino:
 		None
        """
 		if not self.next_move_horizontal_collide(self.blocks, amount):
-			for block in self.blocks:
-				block.pos.x += amount
+			self.set_position(self.x + amount, self.y, self.rotation)
 
 	def move_down(self):
 		"""
@@ -81,12 +147,10 @@ class Tetromino:
         None
     """
 		if not self.next_move_vertical_collide(self.blocks, 1):
-			for block in self.blocks:
-				block.pos.y += 1
+			self.set_position(self.x, self.y + 1, self.rotation)
 		else:
-			for block in self.blocks:
-				self.field_data[int(block.pos.y)][int(block.pos.x)] = block
-			self.create_new_tetromino()
+			self.place()
+
 	# drop
 	def instant_drop(self):
 		"""
@@ -98,141 +162,52 @@ class Tetromino:
     Returns:
         None
     """
-		try:
-			# Drop the Tetromino as far down as possible
-			while not self.next_move_vertical_collide(self.blocks, 1):
-				for block in self.blocks:
-					block.pos.y += 1
-        	
-			# Place the Tetromino on the field
-			for block in self.blocks:
-				x, y = int(block.pos.x), int(block.pos.y)
-				if 0 <= y < ROWS:  # Ensure the block is within bounds
-					if self.field_data[y][x] == 0:  # Ensure no duplicate placement
-						self.field_data[y][x] = block
-				else:
-					raise ValueError()
-
-		# Safely create the new Tetromino
-			if not self.next_move_vertical_collide(self.blocks, 1):  # Avoid redundant creation
-				self.create_new_tetromino()
-
-		except Exception as e:
-			# Log the issue for debugging
-			print(f"Game Over {e}")
+		self.set_position(self.x, self.y + self.board.drop_distance(self.blocks), self.rotation)
+		self.place()
 
-	# rotate
-	def rotate(self):
+	def ghost_blocks(self):
 		"""
-    Rotates the Tetromino around its pivot point, if no collision is detected.
+    Finds the cells the Tetromino would land on if it was dropped now.
 
     Args:
         None
 
     Returns:
-        None
+        list: The (x, y) cells of the landing position.
     """
-		if self.shape != 'O':
+		return self.cells(self.x, self.y + self.board.drop_distance(self.blocks), self.rotation)
 
-			# 1. pivot point 
-			pivot_pos = self.blocks[0].pos
-
-			# 2. new block positions
-			new_block_positions = [block.rotate(pivot_pos) for block in self.blocks]
-
-			# 3. collision check
-			for pos in new_block_positions:
-				# horizontal 
-				if pos.x < 0 or pos.x >= COLUMNS:
-					return
-
-				# field check -> collision with other pieces
-				if self.field_data[int(pos.y)][int(pos.x)]:
-					return
-
-				# vertical / floor check
-				if pos.y > ROWS:
-					return
-
-			# 4. implement new positions
-			for i, block in enumerate(self.blocks):
-				block.pos = new_block_positions[i]
-	
-
-class Block(pygame.sprite.Sprite):
-	def __init__(self, group, pos, color):
+	def place(self):
 		"""
-    Initializes a Block instance with its group, position, and color.
+    Writes the Tetromino's cells into the field and creates a new Tetromino.
+    Cells above the visible field are left out; the game checks them for game over.
 
     Args:
-        group (object): The group to which the block belongs.
-        pos (tuple): The initial position of the block as (x, y).
-        color (tuple): The RGB color of the block.
-
-    Returns:
         None
-    """
-		# general
-		super().__init__(group)
-		self.image = pygame.Surface((BLOCK_SIZE, BLOCK_SIZE))
-		self.image.fill(color)
-		
-		# position
-		self.pos = pygame.Vector2(pos) + BLOCK_OFFSET
-		self.rect = self.image.get_rect(topleft = self.pos * BLOCK_SIZE)
-
-	def rotate(self, pivot_pos):
-		"""
-    Rotates the block around a pivot point.
-
-    Args:
-        pivot_pos (pygame.Vector2): The pivot position around which the block will rotate.
 
     Returns:
-        pygame.Vector2: The new position of the block after rotation.
-    """
-		return pivot_pos + (self.pos - pivot_pos).rotate(90)
-
-	def horizontal_collide(self, x, field_data):
-		"""
-    Checks if the block will collide horizontally with the game field's boundaries or another block.
-
-    Args:
-        x (int): The x-coordinate to check for collision.
-        field_data (list): A 2D list representing the game field's current state.
-
-    Returns:
-        bool: True if a collision is detected; otherwise, False.
-    """
-		if not 0 <= x < COLUMNS:
-			return True
-		if field_data[int(self.pos.y)][x]:
-			return True
-
-	def vertical_collide(self, y, field_data):
-		"""
-    Checks if the block will collide vertically with the game field's boundaries or another block.
-
-    Args:
-        y (int): The y-coordinate to check for collision.
-        field_data (list): A 2D list representing the game field's current state.
-
-    Returns:
-        bool: True if a collision is detected; otherwise, False.
+        None
     """
-		if y >= ROWS:
-			return True
-		if y >= 0 and field_data[y][int(self.pos.x)]:
-			return True
+		self.board.place(self.blocks, self.shape)
+		self.create_new_tetromino()
 
-	def update(self):
+	# rotate
+	def rotate(self, direction = 1):
 		"""
-    Updates the block's position on the screen based on its current logical position.
+    Rotates the Tetromino 90 degrees around its pivot block using the rotation table.
+    If the new rotation collides, the wall kicks are tried in order and the first free one is used.
 
     Args:
-        None
+        direction (int, optional): 1 to rotate clockwise, -1 to rotate counterclockwise. Defaults to 1.
 
     Returns:
         None
     """
-		self.rect.topleft = self.pos * BLOCK_SIZE
+		if self.shape != 'O':
+			rotation = (self.rotation + direction) % 4
+
+			for kick_x, kick_y in KICKS[self.shape][(self.rotation, rotation)]:
+				x, y = self.x + kick_x, self.y + kick_y
+				if not self.board.collide(self.cells(x, y, rotation)):
+					self.set_position(x, y, rotation)
+					return
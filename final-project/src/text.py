@@ -0,0 +1,34 @@
+import pygame
+from os.path import join
+from functools import lru_cache
+
+FONT_PATH = join('final-project','assets','font','NotoSans-Regular.ttf')
+
+@lru_cache(maxsize = None)
+def get_font(size):
+	"""
+    Loads the game font at a given size. Each size is only read from disk once and shared by all components.
+
+    Args:
+        size (int): The font size in points.
+
+    Returns:
+        pygame.font.Font: The loaded font.
+    """
+	return pygame.font.Font(FONT_PATH, size)
+
+@lru_cache(maxsize = 64)
+def render_text(text, size, color):
+	"""
+    Renders a line of text with the game font. Surfaces are cached by text, size and color,
+    so a label is only rendered again when its text changes.
+
+    Args:
+        text (str): The text to render.
+        size (int): The font size in points.
+        color (str or tuple): The text color.
+
+    Returns:
+        pygame.Surface: The rendered text.
+    """
+	return get_font(size).render(text, True, color)
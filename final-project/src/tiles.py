@@ -0,0 +1,99 @@
+import pygame
+from functools import lru_cache
+from .settings import *
+
+class TileAtlas:
+	def __init__(self, size = BLOCK_SIZE):
+		"""
+    Pre-renders one block tile and one ghost outline tile per Tetromino color, and one for garbage, into a single atlas surface.
+    All blocks are drawn from these shared tiles instead of owning a surface each.
+
+    Args:
+        size (int, optional): The width and height of a tile in pixels. Defaults to BLOCK_SIZE.
+
+    Returns:
+        None
+    """
+		self.size = size
+		colors = {shape: data['color'] for shape, data in TETROMINOS.items()}
+		colors[GARBAGE] = GARBAGE_COLOR
+		self.surface = pygame.Surface((size * len(colors), size * 2), pygame.SRCALPHA)
+
+		self.tiles = {}
+		self.ghost_tiles = {}
+		for i, (shape, color) in enumerate(colors.items()):
+			tile_rect = pygame.Rect(i * size, 0, size, size)
+			ghost_rect = pygame.Rect(i * size, size, size, size)
+			self.surface.fill(color, tile_rect)
+			pygame.draw.rect(self.surface, color, ghost_rect, 2)
+
+			self.tiles[shape] = self.surface.subsurface(tile_rect)
+			self.ghost_tiles[shape] = self.surface.subsurface(ghost_rect)
+
+	def draw(self, surface, blocks, shape, offset = 0):
+		"""
+    Draws blocks of one shape onto a surface with a single batched blit.
+
+    Args:
+        surface (pygame.Surface): The surface to draw onto.
+        blocks (iterable): The (x, y) field cells to draw.
+        shape (str): The shape whose tile is used.
+        offset (int, optional): A vertical pixel offset for all blocks. Defaults to 0.
+
+    Returns:
+        None
+    """
+		tile = self.tiles[shape]
+		size = self.size
+		surface.blits([(tile, (x * size, y * size + offset)) for x, y in blocks], False)
+
+	def draw_ghost(self, surface, blocks, shape, offset = 0):
+		"""
+    Draws the landing preview outline of one shape onto a surface with a single batched blit.
+
+    Args:
+        surface (pygame.Surface): The surface to draw onto.
+        blocks (iterable): The (x, y) field cells to draw.
+        shape (str): The shape whose ghost tile is used.
+        offset (int, optional): A vertical pixel offset for all blocks. Defaults to 0.
+
+    Returns:
+        None
+    """
+		tile = self.ghost_tiles[shape]
+		size = self.size
+		surface.blits([(tile, (x * size, y * size + offset)) for x, y in blocks], False)
+
+	def draw_field(self, surface, field_data, first = 0, last = None, top = 0):
+		"""
+    Draws the placed blocks of some rows of a field onto a surface with a single batched blit.
+
+    Args:
+        surface (pygame.Surface): The surface to draw onto.
+        field_data (list): A 2D list of shapes, with 0 for empty cells.
+        first (int, optional): The first row to draw. Defaults to 0.
+        last (int, optional): The row after the last one to draw. Defaults to None for the bottom of the field.
+        top (int, optional): The row drawn at the top of the surface. Defaults to 0.
+
+    Returns:
+        None
+    """
+		tiles = self.tiles
+		size = self.size
+		surface.blits([
+			(tiles[shape], (x * size, (y - top) * size))
+			for y, row in enumerate(field_data[first:last], first)
+			for x, shape in enumerate(row) if shape], False)
+
+@lru_cache(maxsize = None)
+def get_tiles(size):
+	"""
+    Gets the flat tile atlas for a block size. Each size is only rendered once and shared by all games.
+
+    Args:
+        size (int): The width and height of a tile in pixels.
+
+    Returns:
+        TileAtlas: The atlas.
+    """
+	return TileAtlas(size)
@@ -1,9 +1,11 @@
-from pygame.time import get_ticks
+from heapq import heappush, heappop
+from itertools import count
 
 class Timer:
 	def __init__(self, duration, repeated = False, func = None):
 		"""
     Initializes a timer with a specified duration, repeat behavior, and optional callback function.
+    Timers are started, stopped and fired by a Scheduler.
 
     Args:
         duration (int): The duration of the timer in milliseconds.
@@ -20,36 +22,82 @@ class Timer:
 		self.start_time = 0
 		self.active = False
 
-	def activate(self):
+		# bumped whenever the timer is started or stopped, so its old entries in the queue are skipped
+		self.generation = 0
+
+class Scheduler:
+	def __init__(self, clock = None):
 		"""
-    Activates the timer and records the current start time.
+    Initializes a scheduler that keeps the deadlines of the active timers in a priority queue,
+    so each update reads the clock once and only looks at the timers that are due.
 
     Args:
+        clock (VirtualClock, optional): The clock the timers run on. Defaults to None for pygame's wall clock.
+
+    Returns:
         None
+    """
+		if clock:
+			self.get_ticks = clock.get_ticks
+		else:
+			from pygame.time import get_ticks
+			self.get_ticks = get_ticks
+
+		# (deadline, order, timer, generation), the order keeps timers with equal deadlines first in, first out
+		self.queue = []
+		self.order = count()
+
+	def start(self, timer, start_time = None):
+		"""
+    Activates a timer, or restarts it if it is already active.
+
+    Args:
+        timer (Timer): The timer.
+        start_time (float, optional): The time the timer started. Defaults to None for now.
 
     Returns:
         None
     """
-		self.active = True
-		self.start_time = get_ticks()
+		timer.active = True
+		timer.start_time = self.get_ticks() if start_time is None else start_time
+		timer.generation += 1
+		heappush(self.queue, (timer.start_time + timer.duration, next(self.order), timer, timer.generation))
 
-	def deactivate(self):
+	def stop(self, timer):
 		"""
-    Deactivates the timer and resets the start time.
+    Deactivates a timer. Its entry stays in the queue and is dropped when it comes up.
 
     Args:
+        timer (Timer): The timer.
+
+    Returns:
         None
+    """
+		timer.active = False
+		timer.start_time = 0
+		timer.generation += 1
+
+	def set_duration(self, timer, duration):
+		"""
+    Changes a timer's duration. An active timer keeps its start time, so it fires at the start time plus the new duration.
+
+    Args:
+        timer (Timer): The timer.
+        duration (float): The new duration in milliseconds.
 
     Returns:
         None
     """
-		self.active = False
-		self.start_time = 0
+		if duration == timer.duration:
+			return
+		timer.duration = duration
+		if timer.active:
+			self.start(timer, timer.start_time)
 
 	def update(self):
 		"""
-    Checks if the timer has reached its duration. If so, executes the optional callback function, 
-    deactivates the timer, and optionally reactivates it if it is set to repeat.
+    Fires every timer that is due, in the order of their deadlines, and restarts the repeated ones.
+    Each timer fires at most once per update, and a due timer that an earlier callback stopped or restarted doesn't fire.
 
     Args:
         None
@@ -57,15 +105,28 @@ class Timer:
     Returns:
         None
     """
-		current_time = get_ticks()
-		if current_time - self.start_time >= self.duration and self.active:
-			
-			if self.func and self.start_time != 0:
-				self.func()
+		queue = self.queue
+		current_time = self.get_ticks()
+
+		due = []
+		while queue:
+			deadline, order, timer, generation = queue[0]
+			if generation != timer.generation:
+				heappop(queue)
+			elif current_time - timer.start_time >= timer.duration:
+				due.append(heappop(queue)[2:])
+			else:
+				break
+
+		for timer, generation in due:
+			if generation != timer.generation:
+				continue
+			if timer.func:
+				timer.func()
 
 			# reset timer
-			self.deactivate()
+			self.stop(timer)
 
 			# repeat the timer
-			if self.repeated:
-				self.activate()
\ No newline at end of file
+			if timer.repeated:
+				self.start(timer)
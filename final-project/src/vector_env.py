@@ -0,0 +1,202 @@
+import numpy as np
+from .settings import *
+from .tetrominos import ROTATIONS
+
+# shapes by index, a board cell holds the index + 1 and 0 when empty
+SHAPES = list(TETROMINOS.keys())
+
+# block offsets as an array of (shape, rotation, block, (dx, dy))
+OFFSETS = np.array([ROTATIONS[shape] for shape in SHAPES], dtype = np.int64)
+
+# lowest pivot column that keeps every block inside the field, by (shape, rotation)
+MIN_X = -OFFSETS[:, :, :, 0].min(axis = 2)
+
+def legal_action_table(columns):
+	"""
+    Finds which actions fit in a field of some width for each shape. Actions are rotation * columns + pivot column.
+
+    Args:
+        columns (int): The width of the field.
+
+    Returns:
+        tuple: The highest pivot column that keeps every block inside the field, by (shape, rotation),
+        and a boolean mask of the legal actions, of shape (shapes, 4 * columns).
+    """
+	max_x = columns - 1 - OFFSETS[:, :, :, 0].max(axis = 2)
+	legal = np.array([
+		[MIN_X[shape, action // columns] <= action % columns <= max_x[shape, action // columns] for action in range(4 * columns)]
+		for shape in range(len(SHAPES))])
+	return max_x, legal
+
+# points by lines cleared, 0 for no lines
+SCORE_TABLE = np.array([0] + [SCORE_DATA[lines] for lines in range(1, 5)], dtype = np.int64)
+
+class VectorEnv:
+	def __init__(self, num_boards, seed = None, columns = COLUMNS, rows = ROWS):
+		"""
+    Initializes a batch of boards held in one NumPy array, stepped together with array operations.
+    Each action places the falling piece in one rotation and column and drops it straight down,
+    so there is no fall timer. Lines clear and score the same way as the Engine.
+
+    Args:
+        num_boards (int): The number of boards.
+        seed (int, optional): Seed for the shape generator. Defaults to None for a random seed.
+        columns (int, optional): The width of the fields. Defaults to COLUMNS.
+        rows (int, optional): The height of the fields. Defaults to ROWS.
+
+    Returns:
+        None
+    """
+		self.num_boards = num_boards
+		self.columns = columns
+		self.rows = rows
+		self.random = np.random.default_rng(seed)
+
+		# actions are rotation * columns + pivot column, legal when the piece fits in the field
+		self.num_actions = 4 * columns
+		self.max_x, self.legal_action_mask = legal_action_table(columns)
+
+		# state
+		self.boards = np.zeros((num_boards, rows, columns), dtype = np.uint8)
+		self.shapes = np.zeros(num_boards, dtype = np.int64)
+		self.next_shapes = np.zeros((num_boards, 3), dtype = np.int64)
+		self.scores = np.zeros(num_boards, dtype = np.int64)
+		self.lines = np.zeros(num_boards, dtype = np.int64)
+		self.levels = np.ones(num_boards, dtype = np.int64)
+		self.done = np.zeros(num_boards, dtype = bool)
+
+		# read-only views handed out as observations, they always show the current state
+		self.board_view = self.read_only(self.boards)
+		self.shape_view = self.read_only(self.shapes)
+		self.next_shape_view = self.read_only(self.next_shapes)
+		self.done_view = self.read_only(self.done)
+
+		self.reset()
+
+	@staticmethod
+	def read_only(array):
+		"""
+    Makes a read-only view of an array without copying it.
+
+    Args:
+        array (numpy.ndarray): The array to view.
+
+    Returns:
+        numpy.ndarray: The view.
+    """
+		view = array.view()
+		view.flags.writeable = False
+		return view
+
+	def observe(self):
+		"""
+    Gets the observation of every board. The arrays are views of the state, not copies.
+
+    Args:
+        None
+
+    Returns:
+        tuple: The boards (num_boards, rows, columns), the falling shapes (num_boards,) and the preview queues (num_boards, 3).
+    """
+		return self.board_view, self.shape_view, self.next_shape_view
+
+	def reset(self, indices = None):
+		"""
+    Starts new games on some or all boards.
+
+    Args:
+        indices (array, optional): The boards to reset, as indexes or a boolean mask. Defaults to None for all boards.
+
+    Returns:
+        tuple: The observation of every board.
+    """
+		if indices is None:
+			indices = slice(None)
+		count = len(self.shapes[indices])
+
+		self.boards[indices] = 0
+		self.shapes[indices] = self.random.integers(len(SHAPES), size = count)
+		self.next_shapes[indices] = self.random.integers(len(SHAPES), size = (count, 3))
+		self.scores[indices] = 0
+		self.lines[indices] = 0
+		self.levels[indices] = 1
+		self.done[indices] = False
+		return self.observe()
+
+	def legal_actions(self):
+		"""
+    Gets which actions fit in the field for each board's falling shape.
+
+    Args:
+        None
+
+    Returns:
+        numpy.ndarray: A boolean mask of shape (num_boards, num_actions).
+    """
+		return self.legal_action_mask[self.shapes]
+
+	def column_tops(self):
+		"""
+    Finds the top filled row of each column on every board.
+
+    Args:
+        None
+
+    Returns:
+        numpy.ndarray: The rows, the height for empty columns, of shape (num_boards, columns).
+    """
+		filled = self.boards != 0
+		return np.where(filled.any(axis = 1), filled.argmax(axis = 1), self.rows)
+
+	def step(self, actions):
+		"""
+    Places the falling piece on every board that is not done, clears full lines and scores them.
+    Pivot columns outside the field are moved to the nearest column that fits.
+    A board is done when a piece lands with a block above the field.
+
+    Args:
+        actions (array): One action per board, rotation * columns + pivot column.
+
+    Returns:
+        tuple: The observation, the score gained on each board and the done flags (a view).
+    """
+		actions = np.asarray(actions)
+		boards = np.arange(self.num_boards)
+		active = ~self.done
+
+		# block cells, dropped until the first block lands on its column
+		shapes = self.shapes
+		rotations = actions // self.columns % 4
+		pivots = np.clip(actions % self.columns, MIN_X[shapes, rotations], self.max_x[shapes, rotations])
+		offsets = OFFSETS[shapes, rotations]
+		columns = pivots[:, None] + offsets[:, :, 0]
+		tops = np.take_along_axis(self.column_tops(), columns, axis = 1)
+		landing = (tops - 1 - offsets[:, :, 1]).min(axis = 1)
+		rows = landing[:, None] + offsets[:, :, 1]
+
+		# game over when a block stays above the field
+		lost = active & (rows.min(axis = 1) < 0)
+		placed = active & ~lost
+		self.boards[boards[placed, None], rows[placed], columns[placed]] = shapes[placed, None] + 1
+
+		# line clears, full rows are sorted to the top and emptied
+		full = (self.boards != 0).all(axis = 2) & placed[:, None]
+		lines = full.sum(axis = 1)
+		if lines.any():
+			order = np.argsort(~full, axis = 1, kind = 'stable')
+			self.boards[:] = np.take_along_axis(self.boards, order[:, :, None], axis = 1)
+			self.boards[np.arange(self.rows)[None, :] < lines[:, None]] = 0
+
+		# score and level, as in Engine.calculate_score
+		rewards = SCORE_TABLE[lines] * self.levels
+		self.scores += rewards
+		self.lines += lines
+		self.levels += (self.lines / LEVEL_LINES > self.levels) & (lines > 0)
+
+		# next pieces
+		self.shapes[placed] = self.next_shapes[placed, 0]
+		self.next_shapes[placed] = np.roll(self.next_shapes[placed], -1, axis = 1)
+		self.next_shapes[placed, 2] = self.random.integers(len(SHAPES), size = placed.sum())
+		self.done |= lost
+
+		return self.observe(), rewards, self.done_view
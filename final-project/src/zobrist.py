@@ -0,0 +1,136 @@
+from random import Random
+from collections import OrderedDict
+from .settings import *
+
+# one random 64-bit key per field cell and per shape, from a fixed seed so hashes are the same in every process
+_random = Random(0x5eed)
+CELL_KEYS = [[_random.getrandbits(64) for x in range(COLUMNS)] for y in range(ROWS)]
+SHAPE_KEYS = {shape: _random.getrandbits(64) for shape in TETROMINOS}
+
+# entries kept by a TranspositionTable by default
+TRANSPOSITION_SIZE = 1 << 16
+
+# cell keys for each (columns, rows) field size in use
+_cell_keys = {(COLUMNS, ROWS): CELL_KEYS}
+
+def cell_keys(columns, rows):
+	"""
+    Gets the cell keys for a field size. Other sizes than the default get their own keys, from a seed made of the size,
+    so they are also the same in every process.
+
+    Args:
+        columns (int): The width of the field.
+        rows (int): The height of the field.
+
+    Returns:
+        list: One list of keys per row.
+    """
+	keys = _cell_keys.get((columns, rows))
+	if keys is None:
+		random = Random(0x5eed ^ columns << 32 ^ rows << 48)
+		keys = _cell_keys[columns, rows] = [[random.getrandbits(64) for x in range(columns)] for y in range(rows)]
+	return keys
+
+def row_hash(y, row, keys = CELL_KEYS):
+	"""
+    Hashes the filled cells of one row.
+
+    Args:
+        y (int): The row index.
+        row (int): The row's bitmask.
+        keys (list, optional): The cell keys of the field size. Defaults to CELL_KEYS.
+
+    Returns:
+        int: The XOR of the keys of the filled cells.
+    """
+	keys = keys[y]
+	key = 0
+	while row:
+		bit = row & -row
+		key ^= keys[bit.bit_length() - 1]
+		row ^= bit
+	return key
+
+def board_hash(rows, keys = CELL_KEYS):
+	"""
+    Hashes a whole field from scratch. Boards keep their hash up to date instead.
+
+    Args:
+        rows (list): One bitmask per row, from the top.
+        keys (list, optional): The cell keys of the field size. Defaults to CELL_KEYS.
+
+    Returns:
+        int: The XOR of the keys of the filled cells.
+    """
+	key = 0
+	for y, row in enumerate(rows):
+		if row:
+			key ^= row_hash(y, row, keys)
+	return key
+
+class TranspositionTable:
+	def __init__(self, size = TRANSPOSITION_SIZE):
+		"""
+    Initializes a bounded cache of results by position hash that drops the least recently used entry when it is full.
+
+    Args:
+        size (int, optional): The most entries to keep. Defaults to TRANSPOSITION_SIZE.
+
+    Returns:
+        None
+    """
+		self.size = size
+		self.entries = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+
+	def get(self, key):
+		"""
+    Looks up a result and counts the hit or miss.
+
+    Args:
+        key (int): The position hash.
+
+    Returns:
+        The stored result, or None if there is none.
+    """
+		value = self.entries.get(key)
+		if value is None:
+			self.misses += 1
+		else:
+			self.hits += 1
+			self.entries.move_to_end(key)
+		return value
+
+	def put(self, key, value):
+		"""
+    Stores a result, dropping the least recently used one if the table is full.
+
+    Args:
+        key (int): The position hash.
+        value: The result, anything but None.
+
+    Returns:
+        None
+    """
+		self.entries[key] = value
+		if len(self.entries) > self.size:
+			self.entries.popitem(last = False)
+
+	def stats(self):
+		"""
+    Sums up how well the table is doing.
+
+    Args:
+        None
+
+    Returns:
+        dict: The hits, misses, hit rate and number of stored entries.
+    """
+		lookups = self.hits + self.misses
+		return {
+			'hits': self.hits,
+			'misses': self.misses,
+			'hit rate': self.hits / lookups if lookups else 0,
+			'entries': len(self.entries)
+		}
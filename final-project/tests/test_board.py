@@ -0,0 +1,126 @@
+import pytest
+from src.settings import *
+from src.board import Board, GARBAGE_CODE
+from src.zobrist import board_hash
+
+def assert_consistent(board):
+	"""
+    Checks that the row masks, shapes, column heights and hash a board keeps up to date match the ones rebuilt from its cells.
+
+    Args:
+        board (Board): The board.
+
+    Returns:
+        None
+    """
+	rebuilt = Board(board.width, board.height)
+	rebuilt.load_cells(bytes(board.cells))
+	assert board.rows == rebuilt.rows
+	assert board.field_data == rebuilt.field_data
+	assert board.heights == rebuilt.heights
+	assert board.hash == rebuilt.hash == board_hash(board.rows, board.cell_keys)
+
+def fill_row(board, y, hole = None):
+	"""
+    Fills a row with O blocks, leaving out one column.
+
+    Args:
+        board (Board): The board.
+        y (int): The row.
+        hole (int, optional): The column left empty. Defaults to None for a full row.
+
+    Returns:
+        None
+    """
+	board.place([(x, y) for x in range(board.width) if x != hole], 'O')
+
+def test_clear_rows_moves_the_rows_above_down():
+	"""Only full rows are taken out, and the rows above them fall by the number cleared below them."""
+	board = Board()
+	fill_row(board, 19)
+	fill_row(board, 18, hole = 3)
+	fill_row(board, 17)
+	board.place([(0, 16), (9, 15)], 'T')
+	assert_consistent(board)
+
+	assert board.clear_rows([16, 17, 18, 19]) == 2
+	assert board.rows[19] == board.full_row & ~(1 << 3)
+	assert board.rows[18] == 1
+	assert board.rows[17] == 1 << 9
+	assert not any(board.rows[:17])
+	assert board.field_data[18][0] == 'T'
+	assert_consistent(board)
+
+def test_clear_rows_ignores_rows_that_are_not_full():
+	"""Nothing changes when none of the rows checked is full."""
+	board = Board()
+	fill_row(board, 19, hole = 0)
+	rows = list(board.rows)
+	assert board.clear_rows([19, 25, -1]) == 0
+	assert board.rows == rows
+
+def test_collide():
+	"""Cells collide with the walls, the floor and placed blocks, and above the field only with the walls."""
+	board = Board()
+	board.place([(4, 19), (4, -1)], 'I')
+	assert board.rows[19] == 1 << 4
+	assert board.collide([(4, 19)])
+	assert board.collide([(-1, 5)]) and board.collide([(COLUMNS, 5)]) and board.collide([(0, ROWS)])
+	assert not board.collide([(4, -1), (5, 19)])
+
+def test_drop_distance():
+	"""Cells fall to the top of the highest column under them, or step down from under an overhang."""
+	board = Board()
+	board.place([(2, 15), (3, 18)], 'L')
+	assert board.drop_distance([(2, 0), (3, 0)]) == 14
+	assert board.drop_distance([(3, 0), (4, 0)]) == 17
+	assert board.drop_distance([(2, 17)]) == 2
+
+def test_add_garbage_pushes_the_field_up():
+	"""Garbage rows come in at the bottom with one hole, and the stack moves up."""
+	board = Board()
+	board.place([(4, 19), (5, 19)], 'S')
+	assert not board.add_garbage(2, hole = 7)
+	assert board.rows[17] == 0b110000
+	assert board.rows[18] == board.rows[19] == board.full_row & ~(1 << 7)
+	assert board.cells[19 * board.width] == GARBAGE_CODE
+	assert board.field_data[19][0] == GARBAGE
+	assert board.heights[7] == board.height
+	assert_consistent(board)
+
+def test_add_garbage_over_the_top_ends_the_game():
+	"""Blocks pushed out of the top are lost and reported."""
+	board = Board(4, 4)
+	board.place([(0, 1), (0, 2)], 'I')
+	assert board.add_garbage(2, hole = 1)
+	assert board.rows[0] == 1
+	assert_consistent(board)
+
+@pytest.mark.parametrize('columns, rows', [(4, 4), (7, 12), (16, 30)])
+def test_other_field_sizes(columns, rows):
+	"""Fields of any size spawn in the middle, clear their full rows and keep their own hash keys."""
+	board = Board(columns, rows)
+	assert len(board.rows) == rows and len(board.cells) == columns * rows
+	assert board.full_row == (1 << columns) - 1
+	assert board.spawn[0] == columns // 2
+	assert board.collide([(columns, 0)]) and board.collide([(0, rows)])
+	assert not board.collide([(columns - 1, rows - 1)])
+
+	fill_row(board, rows - 1)
+	fill_row(board, rows - 2, hole = 1)
+	board.place([(columns - 1, rows - 3)], 'T')
+	assert board.drop_distance([(1, 0)]) == rows - 2
+	assert_consistent(board)
+
+	assert board.clear_rows([rows - 1]) == 1
+	assert board.rows[rows - 1] == board.full_row & ~(1 << 1)
+	assert board.rows[rows - 2] == 1 << columns - 1
+	assert board.heights[columns - 1] == rows - 2
+	assert_consistent(board)
+
+	board.add_garbage(1, hole = 0)
+	assert board.rows[rows - 1] == board.full_row & ~1
+	assert board.clear_rows(range(rows)) == 0
+	assert_consistent(board)
+	if (columns, rows) != (COLUMNS, ROWS):
+		assert board.cell_keys != Board().cell_keys
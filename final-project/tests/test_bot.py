@@ -0,0 +1,93 @@
+import pytest
+from src.settings import *
+from src.board import Board
+from src.engine import Engine
+from src.controls import Controls
+from src.tetrominos import ROTATIONS
+from src.bot import Bot, board_features, drop_shape
+from src.zobrist import board_hash
+
+# a field with a few blocks at the bottom, from the top
+FIELD = ['.' * COLUMNS] * (ROWS - 4) + [
+	'#.........',
+	'##........',
+	'#..#......',
+	'.#.##.....']
+
+def field_rows(field):
+	"""
+    Turns a field drawn as strings, # for a filled cell, into row bitmasks.
+
+    Args:
+        field (list): One string per row, from the top.
+
+    Returns:
+        list: One bitmask per row.
+    """
+	return [sum(1 << x for x, cell in enumerate(row) if cell == '#') for row in field]
+
+def brute_force_drop(rows, offsets, x):
+	"""
+    Drops blocks straight down from above the field one row at a time, then clears the full rows.
+
+    Args:
+        rows (list): One bitmask per row, from the top.
+        offsets (tuple): The (x, y) offsets of the blocks from the pivot.
+        x (int): The pivot column.
+
+    Returns:
+        tuple: The new rows and the number of lines cleared, or None if a block doesn't fit in the field.
+    """
+	board = Board()
+	board.rows = list(rows)
+	y = -5
+	if board.collide([(x + dx, y + dy) for dx, dy in offsets]):
+		return None
+	while not board.collide([(x + dx, y + 1 + dy) for dx, dy in offsets]):
+		y += 1
+	cells = [(x + dx, y + dy) for dx, dy in offsets]
+	if min(cell_y for cell_x, cell_y in cells) < 0:
+		return None
+	for cell_x, cell_y in cells:
+		board.rows[cell_y] |= 1 << cell_x
+	remaining = [row for row in board.rows if row != (1 << COLUMNS) - 1]
+	return [0] * (ROWS - len(remaining)) + remaining, ROWS - len(remaining)
+
+def test_board_features():
+	"""The column tops, holes, height and bumpiness of a fixed field."""
+	tops, holes, height, bumpiness = board_features(field_rows(FIELD))
+	assert list(tops) == [16, 17, 20, 18, 19, 20, 20, 20, 20, 20]
+	assert holes == 2
+	assert height == 4 + 3 + 2 + 1
+	assert bumpiness == 1 + 3 + 2 + 1 + 1
+
+def test_placements_match_a_brute_force_drop():
+	"""Every shape's placements reach the fields a brute-force drop does, land the same and hash as if from scratch."""
+	field = FIELD[:-1] + ['.####.####']
+	rows = field_rows(field)
+	tops = board_features(rows)[0]
+	for shape in TETROMINOS:
+		placements = drop_shape(rows, tops, shape, board_hash(rows))
+		for rotation, x, new_rows, lines, key in placements:
+			assert brute_force_drop(rows, ROTATIONS[shape][rotation], x) == (list(new_rows), lines)
+			assert key == board_hash(new_rows)
+
+		fields = {tuple(new_rows) for rotation, x, new_rows, lines, key in placements}
+		dropped = (brute_force_drop(rows, offsets, x) for offsets in ROTATIONS[shape] for x in range(COLUMNS))
+		assert fields == {tuple(result[0]) for result in dropped if result}
+
+@pytest.mark.parametrize('columns, rows', [(COLUMNS, ROWS), (7, 12), (16, 30)])
+def test_bot_lands_where_it_planned(columns, rows):
+	"""The buttons the bot taps through the controls put every Tetromino where its search placed it."""
+	engine = Engine(6, columns = columns, rows = rows, undo_limit = 0)
+	controls = Controls(engine)
+	bot = Bot(engine)
+	placed = 0
+	while placed < 40 and not engine.game_over:
+		tetromino = engine.tetromino
+		controls.step(bot.get_buttons())
+		if engine.tetromino is not tetromino:
+			assert (tetromino.rotation, tetromino.x) == bot.target
+			placed += 1
+	assert placed == 40
+	assert engine.current_lines
@@ -0,0 +1,92 @@
+from src.settings import *
+from src.engine import Engine
+from src.controls import Controls, LEFT, RIGHT, ROTATE, DROP, UNDO
+import src.controls
+
+def new_controls():
+	"""
+    Makes controls for a new game that starts with a T.
+
+    Args:
+        None
+
+    Returns:
+        Controls: The controls.
+    """
+	return Controls(Engine(2))
+
+def left_wall(tetromino):
+	"""
+    Finds the pivot column of a Tetromino pushed against the left wall.
+
+    Args:
+        tetromino (Tetromino): The Tetromino.
+
+    Returns:
+        int: The column.
+    """
+	return -min(dx for dx, dy in tetromino.rotations[tetromino.rotation])
+
+def test_held_direction_auto_shifts():
+	"""A held direction moves once, then again after DAS_TIME and every ARR_TIME after that."""
+	controls = new_controls()
+	engine = controls.engine
+	start = engine.tetromino.x
+	wall = left_wall(engine.tetromino)
+	for step in range(30):
+		now = engine.clock.get_ticks()
+		controls.step(LEFT)
+		moves = 1 if now < DAS_TIME else 2 + int((now - DAS_TIME) // ARR_TIME)
+		assert engine.tetromino.x == max(start - moves, wall), f'step {step}'
+
+def test_no_repeat_time_shifts_to_the_wall(monkeypatch):
+	"""With ARR_TIME 0 the Tetromino goes straight to the wall once DAS_TIME has passed."""
+	monkeypatch.setattr(src.controls, 'ARR_TIME', 0)
+	controls = new_controls()
+	engine = controls.engine
+	start = engine.tetromino.x
+	while engine.clock.get_ticks() < DAS_TIME:
+		controls.step(RIGHT)
+		assert engine.tetromino.x == start + 1
+	controls.step(RIGHT)
+	assert engine.tetromino.x == COLUMNS - 1 - max(dx for dx, dy in engine.tetromino.rotations[engine.tetromino.rotation])
+
+def test_newest_direction_wins():
+	"""Pressing the other direction while one is held turns around, and letting go of it turns back."""
+	controls = new_controls()
+	engine = controls.engine
+	start = engine.tetromino.x
+	controls.step(LEFT)
+	controls.step(LEFT | RIGHT)
+	assert engine.tetromino.x == start
+	controls.step(LEFT)
+	assert engine.tetromino.x == start - 1
+	controls.step(0)
+	for step in range(3):
+		controls.step(RIGHT)
+	assert engine.tetromino.x == start
+
+def test_actions_fire_once_per_press():
+	"""Holding rotate, drop or undo acts once, and pressing again acts again."""
+	controls = new_controls()
+	engine = controls.engine
+	for step in range(20):
+		controls.step(ROTATE)
+	assert engine.tetromino.rotation == 1
+	controls.step(0)
+	controls.step(ROTATE)
+	assert engine.tetromino.rotation == 2
+
+	pieces = engine.pieces
+	for step in range(20):
+		controls.step(DROP)
+	controls.step(0)
+	controls.step(DROP)
+	assert engine.pieces == pieces + 2
+
+	for step in range(20):
+		controls.step(UNDO)
+	assert engine.pieces == pieces + 1
+	controls.step(0)
+	controls.step(UNDO)
+	assert engine.pieces == pieces
@@ -0,0 +1,44 @@
+import pytest
+from src.encoding import encode_varint, decode_varint, encode_signed, decode_signed
+
+@pytest.mark.parametrize('value, encoded', [
+	(0, b'\x00'),
+	(1, b'\x01'),
+	(127, b'\x7f'),
+	(128, b'\x80\x01'),
+	(300, b'\xac\x02'),
+	(1 << 64, b'\x80\x80\x80\x80\x80\x80\x80\x80\x80\x02')])
+def test_varint(value, encoded):
+	"""Varints use 7 bits per byte, low bits first."""
+	assert encode_varint(value) == encoded
+	assert decode_varint(b'junk' + encoded + b'more', 4) == (value, 4 + len(encoded))
+
+@pytest.mark.parametrize('value, encoded', [(0, b'\x00'), (-1, b'\x01'), (1, b'\x02'), (-2, b'\x03'), (-64, b'\x7f'), (64, b'\x80\x01')])
+def test_zigzag(value, encoded):
+	"""Small values of either sign stay one byte."""
+	assert encode_signed(value) == encoded
+	assert decode_signed(encoded, 0) == (value, len(encoded))
+
+def test_round_trip_sequence():
+	"""Values written one after another are read back in order."""
+	values = [0, 5, 300, 1 << 40, 127, 128]
+	data = b''.join(encode_varint(value) for value in values)
+	pos = 0
+	decoded = []
+	for value in values:
+		value, pos = decode_varint(data, pos)
+		decoded.append(value)
+	assert decoded == values
+	assert pos == len(data)
+
+def test_round_trip_signed_sequence():
+	"""Signed values written one after another are read back in order."""
+	values = [0, -1, 5, -300, 1 << 40, -(1 << 40)]
+	data = b''.join(encode_signed(value) for value in values)
+	pos = 0
+	decoded = []
+	for value in values:
+		value, pos = decode_signed(data, pos)
+		decoded.append(value)
+	assert decoded == values
+	assert pos == len(data)
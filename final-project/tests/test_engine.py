@@ -0,0 +1,129 @@
+from src.settings import *
+from src.engine import Engine
+from src.controls import Controls
+from src.bot import Bot
+
+def play(engine, controls, buttons):
+	"""
+    Plays a list of held buttons, one entry per simulation step.
+
+    Args:
+        engine (Engine): The game.
+        controls (Controls): The game's controls.
+        buttons (list): A bitmask of the held buttons for each step.
+
+    Returns:
+        None
+    """
+	for held in buttons:
+		if engine.game_over:
+			break
+		controls.step(held)
+
+def record(engine, controls, bot, ticks):
+	"""
+    Lets a bot play, and records the buttons it held.
+
+    Args:
+        engine (Engine): The game.
+        controls (Controls): The game's controls.
+        bot (Bot): The bot playing the game.
+        ticks (int): The number of simulation steps to play.
+
+    Returns:
+        list: A bitmask of the held buttons for each step.
+    """
+	buttons = []
+	for i in range(ticks):
+		if engine.game_over:
+			break
+		buttons.append(bot.get_buttons())
+		controls.step(buttons[-1])
+	return buttons
+
+def test_snapshot_restore_round_trip():
+	"""A restored game, garbage included, plays on exactly like the game it was taken from."""
+	engine = Engine(5, undo_limit = 0)
+	controls = Controls(engine)
+	bot = Bot(engine)
+	record(engine, controls, bot, 300)
+	engine.receive_garbage(2)
+	record(engine, controls, bot, 300)
+	engine.receive_garbage(3)
+	assert engine.pending_garbage == 3
+	snapshot = engine.snapshot()
+	controls_snapshot = controls.snapshot()
+
+	buttons = record(engine, controls, bot, 600)
+	assert engine.current_lines
+	assert engine.pending_garbage == 0
+
+	# a game with another seed, so everything that matters has to come from the snapshot
+	restored = Engine(6, undo_limit = 0)
+	restored_controls = Controls(restored)
+	restored.restore(snapshot)
+	restored_controls.restore(controls_snapshot)
+	assert restored.snapshot() == snapshot
+	assert restored.pending_garbage == 3
+
+	play(restored, restored_controls, buttons)
+	assert restored.snapshot() == engine.snapshot()
+
+def test_other_field_sizes():
+	"""A tall, wide field round trips through a snapshot with its Tetromino far down, and without undo takes no snapshots."""
+	engine = Engine(7, columns = 16, rows = 300, undo_limit = 0)
+	assert engine.tetromino.x == 8
+	engine.tetromino.set_position(3, 280, 1)
+	snapshot = engine.snapshot()
+
+	restored = Engine(8, columns = 16, rows = 300)
+	restored.restore(snapshot)
+	assert restored.snapshot() == snapshot
+	assert (restored.tetromino.x, restored.tetromino.y, restored.tetromino.rotation) == (3, 280, 1)
+
+	engine.instant_drop()
+	cells = bytes(engine.board.cells)
+	engine.undo()
+	assert engine.board.cells == cells
+
+def test_undo_takes_back_a_tetromino():
+	"""Undo puts back the field, the Tetromino and the preview queue from before the last lock."""
+	engine = Engine(8)
+	engine.instant_drop()
+	cells = bytes(engine.board.cells)
+	shape, next_shapes = engine.tetromino.shape, list(engine.next_shapes)
+
+	engine.instant_drop()
+	assert engine.board.cells != cells
+	engine.undo()
+	assert engine.board.cells == cells
+	assert (engine.tetromino.shape, engine.next_shapes) == (shape, next_shapes)
+
+def test_undo_stops_at_the_first_tetromino():
+	"""There is nothing to take back on a new game."""
+	engine = Engine(8)
+	snapshot = engine.snapshot()
+	engine.undo()
+	assert engine.snapshot() == snapshot
+
+def test_versus_games_cant_undo():
+	"""A game that sends garbage keeps its Tetrominoes."""
+	engine = Engine(8)
+	engine.on_clear = lambda lines: None
+	engine.instant_drop()
+	cells = bytes(engine.board.cells)
+	engine.undo()
+	assert engine.board.cells == cells
+
+def test_garbage_comes_with_the_next_tetromino():
+	"""Queued garbage is added when the next Tetromino appears, and doesn't change the shapes that come."""
+	engine = Engine(9)
+	plain = Engine(9)
+	engine.receive_garbage(2)
+	assert not any(engine.board.rows)
+	engine.instant_drop()
+	plain.instant_drop()
+	assert engine.pending_garbage == 0
+	assert engine.board.rows[-2:] == [engine.board.rows[-1]] * 2
+	assert bin(engine.board.rows[-1]).count('1') == COLUMNS - 1
+	assert engine.tetromino.shape == plain.tetromino.shape and engine.next_shapes == plain.next_shapes
@@ -0,0 +1,121 @@
+import pytest
+from src.settings import *
+from src.board import SHAPE_CODES
+from src.tetrominos import Tetromino
+from src.env import TetrisEnv
+
+def fill_rows(env, rows, hole):
+	"""
+    Fills rows of a game's field with O blocks, leaving out one column.
+
+    Args:
+        env (TetrisEnv): The game.
+        rows (iterable): The rows to fill.
+        hole (int): The column left empty.
+
+    Returns:
+        None
+    """
+	env.engine.board.place([(x, y) for y in rows for x in range(COLUMNS) if x != hole], 'O')
+
+def falling(env, shape):
+	"""
+    Replaces the falling Tetromino.
+
+    Args:
+        env (TetrisEnv): The game.
+        shape (str): The shape of the new Tetromino.
+
+    Returns:
+        None
+    """
+	engine = env.engine
+	engine.tetromino = Tetromino(shape, engine.create_new_tetromino, engine.board)
+	env.update_pieces()
+
+def test_step_scores_a_clear():
+	"""An I dropped into a well clears four lines and scores them."""
+	env = TetrisEnv(1)
+	fill_rows(env, range(ROWS - 4, ROWS), 0)
+	falling(env, 'I')
+	observation, reward, done = env.step(0 * COLUMNS + 0)
+	assert (reward, done) == (SCORE_DATA[4], False)
+	assert not any(env.engine.board.cells)
+	assert env.engine.current_lines == 4
+
+def test_step_ends_the_game():
+	"""A Tetromino locking above the field ends the game, and no more actions are taken."""
+	env = TetrisEnv(1)
+	fill_rows(env, range(ROWS), COLUMNS - 1)
+	observation, reward, done = env.step(env.legal_actions()[0])
+	assert (reward, done) == (0, True)
+	assert env.legal_actions() == []
+	with pytest.raises(ValueError):
+		env.step(0)
+
+def test_legal_actions_dont_collide():
+	"""The legal actions are the placements in the field, less the ones a block in the way keeps the Tetromino from."""
+	env = TetrisEnv(2)
+	tetromino = env.engine.tetromino
+	assert env.legal_actions() == [action for action in range(env.num_actions)
+		if not env.engine.board.collide(tetromino.cells(action % COLUMNS, tetromino.y, action // COLUMNS))]
+
+	# an upright I reaches into the top row, where a block stops it going left of column 3
+	falling(env, 'I')
+	env.engine.board.place([(2, 0)], 'O')
+	assert env.legal_actions() == [rotation * COLUMNS + x
+		for rotation, columns in ((0, range(3, 10)), (1, range(1, 8)), (2, range(3, 10)), (3, range(2, 9))) for x in columns]
+	with pytest.raises(ValueError):
+		env.step(0)
+
+def test_observation_follows_the_board():
+	"""The observation is read-only and shows the field and pieces as they are, without copying."""
+	env = TetrisEnv(3)
+	board, pieces = env.observe()
+	assert isinstance(board, memoryview) and board.readonly and pieces.readonly
+	assert board.shape == (ROWS, COLUMNS)
+	with pytest.raises(TypeError):
+		board[0, 0] = 1
+
+	shape = env.engine.tetromino.shape
+	env.step(env.legal_actions()[0])
+	assert env.observe()[0] is board
+	assert board.tobytes() == bytes(env.engine.board.cells)
+	assert any(board.tobytes())
+	assert pieces[0] == SHAPE_CODES[env.engine.tetromino.shape]
+	assert list(pieces[1:]) == [SHAPE_CODES[shape] for shape in env.engine.next_shapes]
+
+def test_snapshot_restore():
+	"""A restored game is back where the snapshot was taken, and plays on the same, with the same views."""
+	env = TetrisEnv(4)
+	for i in range(5):
+		env.step(env.legal_actions()[-1])
+	board, pieces = env.observe()
+	snapshot = env.snapshot()
+	field = board.tobytes()
+
+	actions = []
+	for i in range(5):
+		actions.append(env.legal_actions()[0])
+		env.step(actions[-1])
+	after = env.snapshot()
+
+	env.restore(snapshot)
+	assert env.observe()[0] is board and env.observe()[1] is pieces
+	assert board.tobytes() == field
+	assert env.snapshot() == snapshot
+	for action in actions:
+		env.step(action)
+	assert env.snapshot() == after
+
+def test_other_field_sizes():
+	"""A game on another field size has an action per rotation and column, and an observation of its size."""
+	env = TetrisEnv(5, columns = 7, rows = 30)
+	assert env.num_actions == 4 * 7
+	assert env.observe()[0].shape == (30, 7)
+	tetromino = env.engine.tetromino
+	assert env.legal_actions() == [action for action in range(env.num_actions)
+		if not env.engine.board.collide(tetromino.cells(action % 7, tetromino.y, action // 7))]
+	while not env.engine.game_over:
+		env.step(env.legal_actions()[0])
+	assert env.engine.pieces > 30 // 4
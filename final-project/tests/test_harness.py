@@ -0,0 +1,37 @@
+from src.settings import *
+from src.bot import DEFAULT_WEIGHTS
+from src.harness import play_game, summarize
+
+BOT = {'lookahead': 3, 'beam_width': 4, 'weights': DEFAULT_WEIGHTS}
+
+def test_summarize():
+	"""Results are summed up as means, ranges and throughput."""
+	results = [
+		{'seed': 0, 'score': 100, 'lines': 4, 'level': 1, 'pieces': 30, 'ticks': 600, 'seconds': 0.5, 'table hits': 30, 'table misses': 10},
+		{'seed': 1, 'score': 300, 'lines': 10, 'level': 2, 'pieces': 90, 'ticks': 1200, 'seconds': 1.0, 'table hits': 50, 'table misses': 10},
+		{'seed': 2, 'score': 0, 'lines': 0, 'level': 1, 'pieces': 0, 'ticks': 0, 'seconds': 0.0, 'table hits': 0, 'table misses': 0}]
+	summary = summarize(results, 2.0)
+	assert summary['games'] == 3
+	assert summary['score'] == {'mean': 400 / 3, 'min': 0, 'max': 300}
+	assert summary['lines'] == {'mean': 14 / 3, 'min': 0, 'max': 10}
+	assert summary['level'] == {'mean': 4 / 3, 'min': 1, 'max': 2}
+
+	# games that played no steps have no rate
+	slow, fast = 30 / (600 / TICK_RATE), 90 / (1200 / TICK_RATE)
+	assert summary['pieces per second'] == {'mean': (slow + fast) / 2, 'min': slow, 'max': fast}
+	assert summary['ticks'] == 1800
+	assert summary['ticks per second'] == 900
+	assert summary['seconds'] == 2.0
+	assert summary['table'] == {'hits': 80, 'misses': 20, 'hit rate': 0.8}
+
+def test_play_game_takes_the_bot_settings():
+	"""The bot plays with the search and weights of the job, and the same job plays the same game."""
+	job = {'seed': 7, 'replay': None, 'max_ticks': 1200, 'rules': {}, 'bot': BOT}
+	result = play_game(job)
+	assert result == dict(play_game(job), seconds = result['seconds'])
+	assert result['ticks'] == 1200 and result['lines']
+	assert result['table hits'] and result['table misses']
+
+	# a bot that likes holes and height plays worse
+	careless = play_game(dict(job, bot = dict(BOT, weights = dict(DEFAULT_WEIGHTS, holes = 1, height = 1))))
+	assert careless['lines'] < result['lines']
@@ -0,0 +1,46 @@
+import pygame
+from src.controls import LEFT, DROP
+from src.keyboard import Keyboard
+
+def key(event_type, key):
+	"""
+    Makes a key event.
+
+    Args:
+        event_type (int): pygame.KEYDOWN or pygame.KEYUP.
+        key (int): The key.
+
+    Returns:
+        pygame.event.Event: The event.
+    """
+	return pygame.event.Event(event_type, key = key)
+
+def test_tap_between_steps_is_held_for_one_step():
+	"""A key pressed and let go between two steps is held on the next step only."""
+	keyboard = Keyboard()
+	keyboard.handle(key(pygame.KEYDOWN, pygame.K_SPACE))
+	keyboard.handle(key(pygame.KEYUP, pygame.K_SPACE))
+	assert keyboard.read() == DROP
+	assert keyboard.read() == 0
+
+def test_release_all_drops_queued_key_ups():
+	"""Losing focus lets go of every button, and key ups that were waiting are not read afterwards."""
+	keyboard = Keyboard()
+	keyboard.handle(key(pygame.KEYDOWN, pygame.K_LEFT))
+	assert keyboard.read() == LEFT
+	keyboard.handle(key(pygame.KEYDOWN, pygame.K_RIGHT))
+	keyboard.handle(key(pygame.KEYUP, pygame.K_RIGHT))
+	keyboard.release_all()
+	assert keyboard.released == LEFT
+	assert keyboard.read() == 0
+	assert keyboard.released == 0
+
+def test_press_again_after_release_all_is_a_new_press():
+	"""A button held before focus was lost and pressed again is let go for one step, so the press is seen."""
+	keyboard = Keyboard()
+	keyboard.handle(key(pygame.KEYDOWN, pygame.K_LEFT))
+	assert keyboard.read() == LEFT
+	keyboard.release_all()
+	keyboard.handle(key(pygame.KEYDOWN, pygame.K_LEFT))
+	assert keyboard.read() == 0
+	assert keyboard.read() == LEFT
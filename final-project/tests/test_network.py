@@ -0,0 +1,141 @@
+from collections import defaultdict
+from random import Random
+import pytest
+from src.settings import *
+from src.engine import Engine
+from src.controls import Controls
+from src.bot import Bot
+from src.server import Match
+from src.network import Prediction, INPUT_BUTTONS, RUN_GAP, encode_diff, apply_diff, encode_message, decode_values, frame, unframe
+
+def play_match(seed, delay, ticks):
+	"""
+    Plays a two-board match between bots on clients that predict their boards, like the Controller's network mode,
+    with every message between the server and the clients arriving delay steps after it was sent.
+    The bots look ahead differently, so their boards differ and garbage goes both ways.
+
+    Args:
+        seed (int): Seed for the match.
+        delay (int): Steps each message takes to arrive.
+        ticks (int): Steps to play at most.
+
+    Returns:
+        tuple: The match, the predictions, the (board, step) of each garbage the server queued,
+        and the (board, step) of each state that differed from the prediction.
+    """
+	match = Match(seed, 2)
+	received = set()
+	for board, engine in enumerate(match.engines):
+		def receive_garbage(lines, engine = engine, board = board):
+			received.add((board, match.tick + 1))
+			Engine.receive_garbage(engine, lines)
+		engine.receive_garbage = receive_garbage
+
+	predictions = []
+	bots = []
+	for board in range(2):
+		engine = Engine(seed, undo_limit = 0)
+		predictions.append(Prediction(engine, Controls(engine)))
+		bots.append(Bot(engine, lookahead = 3 - 2 * board))
+	buttons = [0, 0]
+
+	to_server = defaultdict(list)
+	to_client = defaultdict(list)
+	wrong = []
+	for now in range(ticks):
+		for board, tick, held in to_server.pop(now, []):
+			match.queue_input(board, tick, held)
+		match.step()
+		for board in range(2):
+			to_client[now + delay].append((board, match.tick, match.state(board)))
+
+		for board, tick, state in to_client.pop(now, []):
+			prediction = predictions[board]
+			if tick in prediction.predicted and prediction.predicted[tick] != state:
+				wrong.append((board, tick))
+			prediction.reconcile(tick, state)
+
+		# the clients play ahead so their inputs arrive in time, and hold nothing on the first steps,
+		# whose inputs can't reach the server before it plays them
+		for board, prediction in enumerate(predictions):
+			while prediction.tick < now + delay + INPUT_LEAD_TICKS and not prediction.engine.game_over:
+				held = bots[board].get_buttons() & INPUT_BUTTONS if prediction.tick >= 2 * delay + INPUT_LEAD_TICKS else 0
+				prediction.controls.step(held)
+				if held != buttons[board]:
+					buttons[board] = held
+					to_server[now + delay].append((board, prediction.tick, held))
+				prediction.stepped(held)
+		if match.over():
+			break
+	return match, predictions, received, wrong
+
+def test_prediction_converges_with_garbage():
+	"""Delayed server states only correct the steps garbage arrived on, once each."""
+	match, predictions, received, wrong = play_match(1, 4, 3000)
+	assert match.late_inputs == 0
+	assert all(engine.current_lines for engine in match.engines)
+	assert {board for board, tick in received} == {0, 1}
+
+	# the board's own clears and the garbage spawning are predicted, only garbage arriving isn't
+	assert set(wrong) <= received
+	for board, prediction in enumerate(predictions):
+		assert prediction.rollbacks <= sum(1 for garbage_board, tick in received if garbage_board == board)
+
+def test_prediction_jumps_to_server_when_behind():
+	"""A state for a step the board hasn't reached replaces the board without simulating again."""
+	engine = Engine(3, undo_limit = 0)
+	prediction = Prediction(engine, Controls(engine))
+	server = Match(3, 1)
+	for i in range(10):
+		server.step()
+	prediction.reconcile(server.tick, server.state(0))
+	assert prediction.tick == 10
+	assert prediction.state() == server.state(0)
+	assert prediction.rollbacks == 0
+
+def test_diff_round_trip():
+	"""Diffs of random changes rebuild the next state, and are empty when nothing changed."""
+	random = Random(4)
+	old = bytes(random.randrange(8) for i in range(300))
+	assert encode_diff(old, old) == b''
+	for changes in (1, 5, 40, 300):
+		new = bytearray(old)
+		for i in range(changes):
+			new[random.randrange(len(new))] = random.randrange(256)
+		new = bytes(new)
+		assert apply_diff(old, encode_diff(old, new)) == new
+
+@pytest.mark.parametrize('changed', [[0], [299], [0, 299], [10, 11, 12], [10, 10 + RUN_GAP], [10, 10 + RUN_GAP + 1]])
+def test_diff_runs(changed):
+	"""Changes at the ends and changes closer than RUN_GAP, which share a run, come through."""
+	old = bytes(300)
+	new = bytearray(old)
+	for i in changed:
+		new[i] = 1
+	diff = encode_diff(old, bytes(new))
+	assert apply_diff(old, b'xy' + diff, 2) == new
+
+def test_diff_shorter_than_gap():
+	"""Runs separated by less than RUN_GAP unchanged bytes are sent as one."""
+	old = bytes(20)
+	new = bytearray(old)
+	new[5] = new[5 + RUN_GAP] = 1
+	assert encode_diff(old, bytes(new)) == bytes([5, RUN_GAP + 1]) + new[5:6 + RUN_GAP]
+
+def test_diff_past_the_end():
+	"""A diff longer than the state is refused."""
+	with pytest.raises(ValueError):
+		apply_diff(bytes(4), bytes([2, 3, 1, 1, 1]))
+
+def test_messages_in_pieces():
+	"""Framed messages are taken off the buffer only once they have all arrived."""
+	messages = [encode_message(1, 5, 300, data = b'abc'), b'', encode_message(2, data = bytes(200))]
+	data = b''.join(frame(message) for message in messages)
+	buffer = bytearray()
+	received = []
+	for byte in data:
+		buffer.append(byte)
+		received += unframe(buffer)
+	assert received == messages
+	assert not buffer
+	assert decode_values(messages[0], 2) == (5, 300, 4)
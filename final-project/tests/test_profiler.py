@@ -0,0 +1,93 @@
+import csv
+import json
+import pytest
+import src.profiler
+from src.profiler import Profiler, STAGES, percentiles
+
+MILLISECOND = 1_000_000
+
+def profile(monkeypatch, frames, window = 600):
+	"""
+    Times frames whose draw stage takes 1, 2, ... milliseconds and whose other stages take no time,
+    on a clock that only moves when told to.
+
+    Args:
+        monkeypatch (pytest.MonkeyPatch): Replaces the profiler's clock.
+        frames (int): The number of frames to time.
+        window (int, optional): The number of recent frames the profiler keeps. Defaults to 600.
+
+    Returns:
+        Profiler: The profiler that timed the frames.
+    """
+	clock = [0]
+	monkeypatch.setattr(src.profiler, 'perf_counter_ns', lambda: clock[0])
+	profiler = Profiler(window)
+	for i in range(frames):
+		profiler.begin()
+		for stage in STAGES:
+			if stage == 'draw':
+				clock[0] += (i + 1) * MILLISECOND
+			profiler.lap(stage)
+		profiler.end()
+	return profiler
+
+def test_percentiles():
+	"""Percentiles are picked from the sorted samples, and no samples give zeros."""
+	assert percentiles(range(100)) == (50, 95, 99)
+	assert percentiles([]) == (0, 0, 0)
+
+def test_rolling_percentiles(monkeypatch):
+	"""The rolling percentiles come from the recent frames, a stage that took no time stays at zero."""
+	profiler = profile(monkeypatch, 100)
+	rolling = profiler.rolling()
+	assert rolling['draw'] == (51 * MILLISECOND, 96 * MILLISECOND, 100 * MILLISECOND)
+	assert rolling['frame'] == rolling['draw']
+	assert rolling['rules'] == (0, 0, 0)
+	assert profiler.frames == 100
+
+def test_rolling_window_drops_old_frames(monkeypatch):
+	"""Only the last window of frames count toward the rolling percentiles."""
+	profiler = profile(monkeypatch, 100, window = 10)
+	assert list(profiler.recent['draw']) == [time * MILLISECOND for time in range(91, 101)]
+	assert profiler.rolling()['draw'] == (96 * MILLISECOND, 100 * MILLISECOND, 100 * MILLISECOND)
+
+def test_laps_outside_a_frame_are_ignored(monkeypatch):
+	"""Laps and ends without a begun frame don't record anything."""
+	profiler = profile(monkeypatch, 0)
+	profiler.lap('draw')
+	profiler.end()
+	assert profiler.frames == 0
+	assert not profiler.recent['draw']
+
+def test_summary_covers_the_whole_session(monkeypatch):
+	"""The session percentiles are the upper edges of the histogram bins, for every frame ever timed."""
+	profiler = profile(monkeypatch, 100, window = 10)
+	summary = profiler.summary()
+	assert summary['draw'] == pytest.approx({'p50': 50.01, 'p95': 95.01, 'p99': 99.01})
+	assert summary['frame'] == summary['draw']
+	assert summary['rules'] == pytest.approx({'p50': 0.01, 'p95': 0.01, 'p99': 0.01})
+	assert Profiler().summary()['draw'] == {'p50': 0, 'p95': 0, 'p99': 0}
+
+def test_save_csv(monkeypatch, tmp_path):
+	"""A .csv file gets a row of session percentiles per stage."""
+	profiler = profile(monkeypatch, 100)
+	path = str(tmp_path / 'profile.csv')
+	profiler.save(path)
+	with open(path, newline = '') as file:
+		rows = list(csv.reader(file))
+	assert rows[0] == ['stage', 'p50 ms', 'p95 ms', 'p99 ms']
+	assert [row[0] for row in rows[1:]] == list(STAGES) + ['frame']
+	draw = dict((row[0], row[1:]) for row in rows[1:])['draw']
+	assert [float(value) for value in draw] == pytest.approx([50.01, 95.01, 99.01])
+
+def test_save_json(monkeypatch, tmp_path):
+	"""Any other file gets the session percentiles and the recent frame times as JSON."""
+	profiler = profile(monkeypatch, 100, window = 10)
+	path = str(tmp_path / 'profile.json')
+	profiler.save(path)
+	with open(path) as file:
+		data = json.load(file)
+	assert data['frames'] == 100
+	assert data['stages'] == json.loads(json.dumps(profiler.summary()))
+	assert data['recent ms']['draw'] == [float(time) for time in range(91, 101)]
+	assert data['recent ms']['events'] == [0.0] * 10
@@ -0,0 +1,108 @@
+from random import Random
+import pytest
+from src.settings import *
+from src.engine import Engine
+from src.controls import Controls, LEFT, RIGHT, ROTATE, DOWN, DROP
+from src.replay import Replay, ReplayPlayer
+
+# buttons the recorded games hold, each for a few steps
+BUTTONS = [0, 0, LEFT, RIGHT, ROTATE, DOWN, LEFT | ROTATE, DROP]
+
+def game_state(engine):
+	"""
+    Gets what a player can see of a game.
+
+    Args:
+        engine (Engine): The game.
+
+    Returns:
+        tuple: The field, the falling Tetromino, the preview queue, the score and the clock.
+    """
+	tetromino = engine.tetromino
+	return (list(engine.board.rows), tetromino.shape, tetromino.x, tetromino.y, tetromino.rotation, list(engine.next_shapes),
+		engine.current_score, engine.current_lines, engine.current_level, engine.game_over, engine.clock.get_ticks())
+
+def record_game(seed, ticks, columns = COLUMNS, rows = ROWS):
+	"""
+    Records a game played with random buttons.
+
+    Args:
+        seed (int): Seed for the game and the buttons.
+        ticks (int): The number of simulation steps to play at most.
+        columns (int, optional): The width of the field. Defaults to COLUMNS.
+        rows (int, optional): The height of the field. Defaults to ROWS.
+
+    Returns:
+        tuple: The replay and the game's engine.
+    """
+	random = Random(seed)
+	engine = Engine(seed, columns = columns, rows = rows)
+	controls = Controls(engine)
+	replay = Replay(seed, columns = columns, rows = rows)
+	buttons = 0
+	for tick in range(ticks):
+		if engine.game_over:
+			break
+		if tick % 6 == 0:
+			buttons = random.choice(BUTTONS)
+		replay.record(buttons)
+		controls.step(buttons)
+	return replay, engine
+
+def test_encode_decode():
+	"""A replay comes back from its bytes unchanged."""
+	replay, engine = record_game(2, 1000)
+	decoded = Replay.from_bytes(replay.to_bytes())
+	assert decoded.seed == 2
+	assert (decoded.columns, decoded.rows) == (COLUMNS, ROWS)
+	assert decoded.ticks == replay.ticks
+	assert decoded.changes == replay.changes
+
+def test_only_changes_are_stored():
+	"""Steps holding the same buttons as the one before add nothing."""
+	replay = Replay(1)
+	for buttons in (0, 0, LEFT, LEFT, LEFT, 0, DROP):
+		replay.record(buttons)
+	assert replay.changes == [(2, LEFT), (5, 0), (6, DROP)]
+	assert replay.ticks == 7
+
+def test_rejects_other_versions():
+	"""Files of another version or format are refused."""
+	data = bytearray(Replay(1).to_bytes())
+	data[4] += 1
+	with pytest.raises(ValueError):
+		Replay.from_bytes(bytes(data))
+	with pytest.raises(ValueError):
+		Replay.from_bytes(b'JUNK' + bytes(data[4:]))
+
+def test_playback_matches_the_game():
+	"""Playing a decoded replay ends in the recorded game's state."""
+	replay, engine = record_game(3, 2000)
+	player = ReplayPlayer(Replay.from_bytes(replay.to_bytes()))
+	player.run()
+	assert game_state(player.engine) == game_state(engine)
+
+def test_other_field_sizes():
+	"""A replay keeps its field size and plays back on it."""
+	replay, engine = record_game(5, 1500, columns = 7, rows = 30)
+	decoded = Replay.from_bytes(replay.to_bytes())
+	assert (decoded.columns, decoded.rows) == (7, 30)
+	player = ReplayPlayer(decoded)
+	player.run()
+	assert len(player.engine.board.rows) == 30
+	assert game_state(player.engine) == game_state(engine)
+
+def test_seek_matches_playing_straight():
+	"""Seeking forwards and back lands on the same state as playing from the start."""
+	replay, engine = record_game(4, 1500)
+	player = ReplayPlayer(replay, checkpoint_interval = 200)
+	player.run()
+	end = player.tick
+	assert sorted(player.checkpoints) == list(range(0, end + 1, 200))
+
+	for tick in (450, end, 50, 600, 600):
+		player.seek(tick)
+		straight = ReplayPlayer(replay)
+		straight.run(tick)
+		assert player.tick == tick
+		assert game_state(player.engine) == game_state(straight.engine)
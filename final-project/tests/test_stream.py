@@ -0,0 +1,82 @@
+from io import BytesIO
+from src.settings import *
+from src.bot import Bot
+from src.server import Match
+from src.board import GARBAGE_CODE
+from src.stream import StreamWriter, StreamReader, BoardView, keyframe_offsets
+
+def assert_views_match(views, engines):
+	"""
+    Checks that a spectator's views show the boards as they are.
+
+    Args:
+        views (list): The BoardViews of a StreamReader.
+        engines (list): The engines of the boards.
+
+    Returns:
+        None
+    """
+	for view, engine in zip(views, engines):
+		expected = BoardView(engine.board.width, engine.board.height)
+		expected.load(engine.snapshot())
+		assert view.cells == expected.cells
+		assert (view.shape, view.x, view.y, view.rotation) == (expected.shape, expected.x, expected.y, expected.rotation)
+		assert view.next_shapes == expected.next_shapes
+		assert (view.score, view.lines, view.level, view.game_over) == (expected.score, expected.lines, expected.level, expected.game_over)
+
+def test_stream_round_trip():
+	"""Spectators following the stream from the start, from a late join or in odd-sized reads see every board as it is."""
+	match = Match(9, 2)
+	bots = [Bot(engine, lookahead = 3 - 2 * board) for board, engine in enumerate(match.engines)]
+	file = BytesIO()
+	writer = StreamWriter(match.engines, file, keyframe_interval = 250)
+	reader = StreamReader()
+	reader.feed(writer.header)
+	late = None
+	garbage = False
+
+	for tick in range(1500):
+		for board, bot in enumerate(bots):
+			match.queue_input(board, match.tick, bot.get_buttons())
+		match.step()
+		frame = writer.write_frame()
+		reader.feed(frame)
+		assert_views_match(reader.views, match.engines)
+		garbage = garbage or any(GARBAGE_CODE in engine.board.cells for engine in match.engines)
+
+		if tick == 700:
+			late = StreamReader()
+			late.feed(writer.join())
+		elif late:
+			late.feed(frame)
+			assert_views_match(late.views, match.engines)
+			assert late.tick == reader.tick
+		if match.over():
+			break
+
+	# the match sent garbage, which only reaches spectators as diffs of the cells
+	assert all(engine.current_lines for engine in match.engines)
+	assert garbage
+
+	data = file.getvalue()
+	assert len(keyframe_offsets(data)) == (match.tick - 1) // 250 + 1
+
+	chunked = StreamReader()
+	for start in range(0, len(data), 7):
+		chunked.feed(data[start:start + 7])
+	assert chunked.tick == reader.tick
+	assert_views_match(chunked.views, match.engines)
+
+def test_reader_starts_at_a_key_frame():
+	"""Delta frames before the first key frame are skipped."""
+	match = Match(10, 1)
+	writer = StreamWriter(match.engines, keyframe_interval = 30)
+	frames = []
+	for tick in range(100):
+		match.step()
+		frames.append(writer.write_frame())
+
+	reader = StreamReader()
+	reader.feed(writer.header + b''.join(frames[10:]))
+	assert reader.synced
+	assert_views_match(reader.views, match.engines)
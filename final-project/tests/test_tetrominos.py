@@ -0,0 +1,53 @@
+from src.settings import *
+from src.board import Board
+from src.tetrominos import Tetromino, ROTATIONS
+
+def fill_row(board, y, hole = None):
+	"""
+    Fills a row with O blocks, leaving out one column.
+
+    Args:
+        board (Board): The board.
+        y (int): The row.
+        hole (int, optional): The column left empty. Defaults to None for a full row.
+
+    Returns:
+        None
+    """
+	board.place([(x, y) for x in range(COLUMNS) if x != hole], 'O')
+
+def test_rotations_turn_clockwise():
+	"""Each rotation is the one before turned a quarter clockwise, and four make a full turn."""
+	for shape, rotations in ROTATIONS.items():
+		assert len(rotations) == 4
+		if shape != 'O':
+			assert rotations[1] == tuple((-y, x) for x, y in rotations[0])
+			assert tuple((-y, x) for x, y in rotations[3]) == rotations[0]
+
+def test_rotation_kicks_off_the_wall():
+	"""A rotation blocked by the wall takes the first free kick."""
+	board = Board()
+	tetromino = Tetromino('T', lambda: None, board)
+	tetromino.set_position(0, 10, 1)
+	tetromino.rotate(1)
+	assert (tetromino.x, tetromino.y, tetromino.rotation) == (1, 10, 2)
+	assert not board.collide(tetromino.blocks)
+
+def test_i_rotation_uses_i_kicks():
+	"""The I piece uses its own kick table against the wall, where the first kick is blocked too."""
+	board = Board()
+	tetromino = Tetromino('I', lambda: None, board)
+	tetromino.set_position(0, 10, 0)
+	tetromino.rotate(1)
+	assert (tetromino.x, tetromino.y, tetromino.rotation) == (1, 10, 1)
+	assert not board.collide(tetromino.blocks)
+
+def test_blocked_rotation_stays():
+	"""A rotation with no free kick leaves the Tetromino where it was."""
+	board = Board()
+	for y in range(ROWS):
+		fill_row(board, y, hole = 5)
+	tetromino = Tetromino('I', lambda: None, board)
+	tetromino.set_position(5, 10, 0)
+	tetromino.rotate(1)
+	assert (tetromino.x, tetromino.y, tetromino.rotation) == (5, 10, 0)
@@ -0,0 +1,86 @@
+from src.clock import VirtualClock
+from src.timer import Timer, Scheduler
+
+def make_scheduler():
+	"""
+    Makes a scheduler on a virtual clock starting at 0.
+
+    Args:
+        None
+
+    Returns:
+        tuple: The clock and the scheduler.
+    """
+	clock = VirtualClock()
+	return clock, Scheduler(clock)
+
+def test_timers_fire_in_deadline_order_and_repeat():
+	"""Due timers fire by deadline, repeated ones start over and one-shot ones stop."""
+	clock, scheduler = make_scheduler()
+	fired = []
+	repeated = Timer(100, True, lambda: fired.append('repeated'))
+	once = Timer(50, False, lambda: fired.append('once'))
+	scheduler.start(repeated)
+	scheduler.start(once)
+
+	clock.advance(100)
+	scheduler.update()
+	assert fired == ['once', 'repeated']
+	assert repeated.active and not once.active
+
+	clock.advance(100)
+	scheduler.update()
+	assert fired == ['once', 'repeated', 'repeated']
+
+def test_stopped_timer_does_not_fire():
+	"""A stopped timer's entry is skipped, and restarting it only keeps the new deadline."""
+	clock, scheduler = make_scheduler()
+	fired = []
+	timer = Timer(100, False, lambda: fired.append(clock.get_ticks()))
+	scheduler.start(timer)
+	scheduler.stop(timer)
+	clock.advance(150)
+	scheduler.update()
+	assert fired == []
+
+	scheduler.start(timer)
+	scheduler.start(timer, clock.get_ticks() + 50)
+	clock.advance(100)
+	scheduler.update()
+	assert fired == []
+	clock.advance(50)
+	scheduler.update()
+	assert fired == [300]
+
+def test_set_duration_keeps_start_time():
+	"""A new duration moves the deadline from the timer's start time."""
+	clock, scheduler = make_scheduler()
+	fired = []
+	timer = Timer(100, False, lambda: fired.append(clock.get_ticks()))
+	scheduler.start(timer)
+	clock.advance(30)
+	scheduler.set_duration(timer, 40)
+	clock.advance(10)
+	scheduler.update()
+	assert fired == [40]
+
+def test_timer_stopped_by_earlier_callback_in_same_update_does_not_fire():
+	"""A due timer stopped or restarted by a callback that fired before it in the same update is left alone."""
+	clock, scheduler = make_scheduler()
+	fired = []
+	stopped = Timer(100, True, lambda: fired.append('stopped'))
+	restarted = Timer(100, False, lambda: fired.append('restarted'))
+	first = Timer(50, False, lambda: (fired.append('first'), scheduler.stop(stopped), scheduler.start(restarted)))
+	scheduler.start(first)
+	scheduler.start(stopped)
+	scheduler.start(restarted)
+
+	clock.advance(100)
+	scheduler.update()
+	assert fired == ['first']
+	assert not stopped.active
+	assert restarted.active and restarted.start_time == 100
+
+	clock.advance(100)
+	scheduler.update()
+	assert fired == ['first', 'restarted']
@@ -0,0 +1,52 @@
+from random import Random
+import pytest
+from src.settings import *
+from src.engine import Engine
+from src.tetrominos import ROTATIONS
+
+np = pytest.importorskip('numpy')
+from src.vector_env import VectorEnv, SHAPES, legal_action_table
+
+@pytest.mark.parametrize('columns, rows', [(COLUMNS, ROWS), (7, 12), (16, 30)])
+def test_matches_the_engine(columns, rows):
+	"""Placing the same pieces in the same places gives the same fields and points as the Engine."""
+	random = Random(5)
+	engine = Engine(11, columns = columns, rows = rows, undo_limit = 0)
+	vector_env = VectorEnv(1, seed = 11, columns = columns, rows = rows)
+
+	done = False
+	while not done:
+		tetromino = engine.tetromino
+		vector_env.shapes[0] = SHAPES.index(tetromino.shape)
+
+		# the actions the Engine can drop straight down from where the Tetromino is, the ones landing lowest
+		# so lines get cleared
+		landings = {}
+		for action in map(int, np.flatnonzero(vector_env.legal_actions()[0])):
+			cells = tetromino.cells(action % columns, tetromino.y, action // columns)
+			if not engine.board.collide(cells):
+				landings[action] = min(y for x, y in cells) + engine.board.drop_distance(cells)
+		lowest = max(landings.values())
+		action = random.choice([action for action, landing in landings.items() if landing == lowest])
+
+		score = engine.current_score
+		tetromino.set_position(action % columns, tetromino.y, action // columns)
+		engine.instant_drop()
+		observation, rewards, dones = vector_env.step([action])
+		done = engine.game_over
+		assert dones[0] == done
+
+		# the boards only differ on where a piece that doesn't fit is left once the game is over
+		if not done:
+			assert rewards[0] == engine.current_score - score
+			assert (observation[0][0] != 0).tolist() == [[bool(row >> x & 1) for x in range(columns)] for row in engine.board.rows]
+	assert engine.current_lines == vector_env.lines[0] > 0
+
+@pytest.mark.parametrize('columns', [4, COLUMNS, 16])
+def test_legal_action_table(columns):
+	"""The legal actions of each shape are the rotations and columns that keep its blocks between the walls."""
+	legal = legal_action_table(columns)[1]
+	assert legal.shape == (len(SHAPES), 4 * columns)
+	for index, shape in enumerate(SHAPES):
+		assert legal[index].tolist() == [all(0 <= action % columns + dx < columns for dx, dy in ROTATIONS[shape][action // columns])
+			for action in range(4 * columns)]
@@ -0,0 +1,41 @@
+from random import Random
+from src.settings import *
+from src.board import Board
+from src.zobrist import TranspositionTable, board_hash
+
+def test_board_hash_follows_placements_clears_and_garbage():
+	"""The hash a board keeps up to date is the hash of its field from scratch, and goes back when the field does."""
+	random = Random(1)
+	board = Board()
+	assert board.hash == 0
+	hashes = {}
+	lines = 0
+	for i in range(400):
+		# fill random cells in the bottom rows so lines keep clearing
+		y = random.randrange(ROWS - 4, ROWS)
+		cells = [(x, y) for x in random.sample(range(COLUMNS), 3) if not board.rows[y] >> x & 1]
+		board.place(cells, random.choice(list(TETROMINOS)))
+		lines += board.clear_rows([y])
+		if i % 50 == 49:
+			board.add_garbage(random.randint(1, 2), random.randrange(COLUMNS))
+		assert board.hash == board_hash(board.rows)
+		if hashes.setdefault(tuple(board.rows), board.hash) != board.hash:
+			raise AssertionError('the same field hashed differently')
+	assert lines > 10
+
+def test_table_evicts_the_least_recently_used():
+	"""A full table drops the entry looked up least recently, and counts hits and misses."""
+	table = TranspositionTable(2)
+	table.put(1, 'a')
+	table.put(2, 'b')
+	assert table.get(1) == 'a'
+	table.put(3, 'c')
+	assert table.get(2) is None
+	assert table.get(1) == 'a' and table.get(3) == 'c'
+	table.put(4, 'd')
+	assert table.get(1) is None
+	assert table.stats() == {'hits': 3, 'misses': 2, 'hit rate': 0.6, 'entries': 2}
+
+def test_empty_table_stats():
+	"""A table nobody looked anything up in has a hit rate of 0."""
+	assert TranspositionTable().stats() == {'hits': 0, 'misses': 0, 'hit rate': 0, 'entries': 0}